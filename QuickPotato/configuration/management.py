@@ -17,6 +17,14 @@ class Configuration(object):
 
         self.contents = yaml.safe_load(open(self.PATH + self.FILE_NAME))
 
+        # Options introduced after the file was written fall back to their defaults
+        missing_options = {
+            key: value for key, value in default_quick_potato_configuration.items() if key not in self.contents
+        }
+        if len(missing_options) > 0:
+            self.contents.update(missing_options)
+            self.dump_configuration_to_yaml_file(self.contents)
+
     def dump_configuration_to_yaml_file(self, contents):
         with open(self.PATH + self.FILE_NAME, 'w') as file:
             yaml.dump(contents, file)
@@ -30,6 +38,111 @@ class Configuration(object):
         self.contents["enable_intrusive_profiling"] = value
         self.dump_configuration_to_yaml_file(self.contents)
 
+    @property
+    def profiling_mode(self):
+        """Specify how the performance breakpoint collects its statistics.
+        "deterministic": traces every function call with cProfile.
+        "sampling":      periodically captures the stack of the profiled thread.
+        "timing":        only measures the wall clock and CPU time of the method.
+        """
+        return self.contents["profiling_mode"]
+
+    @profiling_mode.setter
+    def profiling_mode(self, value):
+        self.contents["profiling_mode"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def sampling_profiler_interval(self):
+        """The number of seconds the sampling profiler waits between two stack captures."""
+        return self.contents["sampling_profiler_interval"]
+
+    @sampling_profiler_interval.setter
+    def sampling_profiler_interval(self, value):
+        self.contents["sampling_profiler_interval"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def sample_one_in(self):
+        """Profile on average one in N calls of a decorated method, 1 profiles every call."""
+        return self.contents["sample_one_in"]
+
+    @sample_one_in.setter
+    def sample_one_in(self, value):
+        self.contents["sample_one_in"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def maximum_profiles_per_second(self):
+        """The maximum number of profiles a decorated method collects per second, None is unlimited."""
+        return self.contents["maximum_profiles_per_second"]
+
+    @maximum_profiles_per_second.setter
+    def maximum_profiles_per_second(self, value):
+        self.contents["maximum_profiles_per_second"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def maximum_profiles_per_test_id(self):
+        """The maximum number of profiles a decorated method collects per test id, None is unlimited."""
+        return self.contents["maximum_profiles_per_test_id"]
+
+    @maximum_profiles_per_test_id.setter
+    def maximum_profiles_per_test_id(self, value):
+        self.contents["maximum_profiles_per_test_id"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def enable_profiler_overhead_correction(self):
+        """Subtract the calibrated cProfile overhead from the stored total and cumulative times."""
+        return self.contents["enable_profiler_overhead_correction"]
+
+    @enable_profiler_overhead_correction.setter
+    def enable_profiler_overhead_correction(self, value):
+        self.contents["enable_profiler_overhead_correction"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def profiler_overhead_per_call(self):
+        """The calibrated cProfile overhead per call in seconds split in a "caller" and "callee" part,
+        None when it has not been calibrated."""
+        return self.contents["profiler_overhead_per_call"]
+
+    @profiler_overhead_per_call.setter
+    def profiler_overhead_per_call(self, value):
+        self.contents["profiler_overhead_per_call"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def enable_system_resource_collection(self):
+        """Store the memory, context switch, page fault and I/O deltas of every sample."""
+        return self.contents["enable_system_resource_collection"]
+
+    @enable_system_resource_collection.setter
+    def enable_system_resource_collection(self, value):
+        self.contents["enable_system_resource_collection"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def enable_allocation_profiling(self):
+        """Trace the memory allocations of every sample with tracemalloc."""
+        return self.contents["enable_allocation_profiling"]
+
+    @enable_allocation_profiling.setter
+    def enable_allocation_profiling(self, value):
+        self.contents["enable_allocation_profiling"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def number_of_allocation_sites(self):
+        """The number of largest allocation sites that are stored per sample."""
+        return self.contents["number_of_allocation_sites"]
+
+    @number_of_allocation_sites.setter
+    def number_of_allocation_sites(self, value):
+        self.contents["number_of_allocation_sites"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
     @property
     def enable_the_selection_of_untested_or_failed_test_ids(self):
         return self.contents["enable_the_selection_of_untested_or_failed_test_ids"]
@@ -75,6 +188,60 @@ class Configuration(object):
             self.contents["enable_asynchronous_payload_delivery"] = False
             self.dump_configuration_to_yaml_file(self.contents)
 
+    @property
+    def payload_delivery_queue_size(self):
+        """The maximum number of samples waiting for the background writer."""
+        return self.contents["payload_delivery_queue_size"]
+
+    @payload_delivery_queue_size.setter
+    def payload_delivery_queue_size(self, value):
+        self.contents["payload_delivery_queue_size"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def payload_delivery_batch_size(self):
+        """The number of samples the background writer coalesces into one bulk insert."""
+        return self.contents["payload_delivery_batch_size"]
+
+    @payload_delivery_batch_size.setter
+    def payload_delivery_batch_size(self, value):
+        self.contents["payload_delivery_batch_size"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def payload_delivery_flush_interval(self):
+        """The maximum number of seconds a sample waits before the background writer inserts it."""
+        return self.contents["payload_delivery_flush_interval"]
+
+    @payload_delivery_flush_interval.setter
+    def payload_delivery_flush_interval(self, value):
+        self.contents["payload_delivery_flush_interval"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def payload_delivery_drop_policy(self):
+        """What happens when the queue of the background writer is full: "block" or "drop"."""
+        return self.contents["payload_delivery_drop_policy"]
+
+    @payload_delivery_drop_policy.setter
+    def payload_delivery_drop_policy(self, value):
+        self.contents["payload_delivery_drop_policy"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
+    @property
+    def storage_mode(self):
+        """Specify how the call graph of every sample is stored.
+        "samples":   stores every call edge of every sample.
+        "aggregate": keeps the distribution of every call edge per test id in memory and stores it once,
+                     only the response times of the samples themselves are stored per sample.
+        """
+        return self.contents["storage_mode"]
+
+    @storage_mode.setter
+    def storage_mode(self, value):
+        self.contents["storage_mode"] = value
+        self.dump_configuration_to_yaml_file(self.contents)
+
     @property
     def enable_auto_clean_up_old_test_results(self):
         return self.contents["enable_auto_clean_up_old_test_results"]
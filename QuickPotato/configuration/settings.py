@@ -3,6 +3,7 @@
 class Boundaries(object):
 
     def __init__(self):
+        self.boundary_metric = "total_response_time"
         self.max_and_min_boundary_for_average = {"max": None, "min": None}
         self.max_and_min_boundary_for_largest_outlier = {"max": None, "min": None}
         self.max_and_min_boundary_for_percentile_5th = {"max": None, "min": None}
@@ -24,6 +25,8 @@ class Boundaries(object):
         self.max_and_min_boundary_for_percentile_85th = {"max": None, "min": None}
         self.max_and_min_boundary_for_percentile_90th = {"max": None, "min": None}
         self.max_and_min_boundary_for_percentile_95th = {"max": None, "min": None}
+        self.max_and_min_boundary_for_peak_memory = {"max": None, "min": None}
+        self.max_and_min_boundary_for_allocated_memory = {"max": None, "min": None}
 
     @property
     def boundary_policy(self):
@@ -55,16 +58,29 @@ class Boundaries(object):
     def boundary_policy(self, new_policy):
         self.__dict__.update(new_policy)
 
+    @property
+    def memory_boundary_policy(self):
+        return {
+            "max_and_min_boundary_for_peak_memory": self.max_and_min_boundary_for_peak_memory,
+            "max_and_min_boundary_for_allocated_memory": self.max_and_min_boundary_for_allocated_memory,
+        }
+
+    @memory_boundary_policy.setter
+    def memory_boundary_policy(self, new_policy):
+        self.__dict__.update(new_policy)
+
 
 class RegressionSettings(object):
 
     def __init__(self):
         self.run_t_test = True
+        self.regression_metric = "total_response_time"
 
     @property
     def regression_settings_policy(self):
         return {
-            "run_t_test": self.run_t_test
+            "run_t_test": self.run_t_test,
+            "regression_metric": self.regression_metric
         }
 
     @regression_settings_policy.setter
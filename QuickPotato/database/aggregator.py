@@ -0,0 +1,195 @@
+from QuickPotato.database.queries import Crud
+from threading import Lock
+from functools import partial
+from math import floor, log2
+import atexit
+import json
+import os
+
+
+class StatisticsAggregator(Crud):
+
+    HISTOGRAM_BUCKETS_PER_DOUBLING = 4
+    HISTOGRAM_MINIMUM = 1e-9
+
+    def __init__(self):
+        """
+        Keeps a running aggregate of the call edges of every test in memory, so a long benchmark run
+        stores one row per call edge instead of one row per call edge for every sample.
+        """
+        super(StatisticsAggregator, self).__init__()
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._aggregates = {}
+
+    def merge(self, database_name, test_id, rows):
+        """
+        Merges the call edges of one sample into the aggregate of its test.
+
+        :param database_name: The database the aggregate belongs in.
+        :param test_id: The test id the sample belongs to.
+        :param rows: The performance statistics rows of the sample.
+        """
+        with self._lock:
+            aggregate = self._aggregates.setdefault((database_name, test_id), {})
+            for row in rows:
+                edge = aggregate.setdefault((row["child_function_id"], row["parent_function_id"]), self._empty_edge())
+                cumulative_time = float(row["cumulative_time"])
+                bucket = self.histogram_bucket(cumulative_time)
+
+                edge["number_of_samples"] += 1
+                edge["number_of_calls"] += int(row["number_of_calls"])
+                edge["total_time_sum"] += float(row["total_time"])
+                edge["cumulative_time_sum"] += cumulative_time
+                edge["cumulative_time_sum_of_squares"] += cumulative_time ** 2
+                edge["cumulative_time_minimum"] = min(edge["cumulative_time_minimum"], cumulative_time)
+                edge["cumulative_time_maximum"] = max(edge["cumulative_time_maximum"], cumulative_time)
+                edge["cumulative_time_histogram"][bucket] = edge["cumulative_time_histogram"].get(bucket, 0) + 1
+
+    def flush(self, database_name=None, test_id=None):
+        """
+        Writes the aggregates to the database, merged with what an earlier flush of the same test has written.
+        The aggregates are taken out under the lock and written outside of it, so profiled methods never
+        wait on the database. An aggregate that fails to be written is merged back before the error is raised.
+
+        :param database_name: Only flushes the aggregates of this database, defaults to all databases.
+        :param test_id: Only flushes the aggregate of this test id, defaults to all test ids.
+        """
+        with self._flush_lock:
+            with self._lock:
+                aggregates = {
+                    key: self._aggregates.pop(key) for key in list(self._aggregates)
+                    if (database_name is None or key[0] == database_name) and (test_id is None or key[1] == test_id)
+                }
+
+            for key in list(aggregates):
+                try:
+                    self._write_aggregate(key[0], key[1], aggregates[key])
+
+                except Exception:
+                    self._restore_aggregates(aggregates)
+                    raise
+
+                del aggregates[key]
+
+        return True
+
+    def _restore_aggregates(self, aggregates):
+        """
+        Merges aggregates that could not be written back into the aggregates that are kept in memory.
+
+        :param aggregates: A dictionary with a (database name, test id) tuple as key and the aggregate as value.
+        """
+        with self._lock:
+            for key, aggregate in aggregates.items():
+                current_aggregate = self._aggregates.setdefault(key, {})
+                for edge_key, edge in aggregate.items():
+                    self._combine_edges(current_aggregate.setdefault(edge_key, self._empty_edge()), edge)
+
+    def _write_aggregate(self, database_name, test_id, aggregate):
+        """
+
+        :param database_name:
+        :param test_id:
+        :param aggregate: A dictionary with a (child function id, parent function id) tuple as key
+                          and the statistics of the call edge as value.
+        """
+        self.insert_performance_statistics_aggregate(
+            database_name, test_id, partial(self._merge_with_stored_rows, test_id, aggregate)
+        )
+
+    def _merge_with_stored_rows(self, test_id, aggregate, stored_rows):
+        """
+        Combines the aggregate with the rows an earlier flush has stored, without changing the aggregate.
+
+        :param test_id:
+        :param aggregate: A dictionary with a (child function id, parent function id) tuple as key
+                          and the statistics of the call edge as value.
+        :param stored_rows: The stored aggregate rows of the test id.
+        :return: The rows that replace the stored rows.
+        """
+        combined_aggregate = {}
+        for row in stored_rows:
+            stored_edge = {key: row[key] for key in self._empty_edge()}
+            stored_edge["cumulative_time_histogram"] = self.load_histogram(row["cumulative_time_histogram"])
+            combined_aggregate[(row["child_function_id"], row["parent_function_id"])] = stored_edge
+
+        for edge_key, edge in aggregate.items():
+            self._combine_edges(combined_aggregate.setdefault(edge_key, self._empty_edge()), edge)
+
+        payload = []
+        for (child_function_id, parent_function_id), edge in combined_aggregate.items():
+            payload.append({
+                "test_id": test_id,
+                "child_function_id": child_function_id,
+                "parent_function_id": parent_function_id,
+                **edge,
+                "cumulative_time_histogram": self.dump_histogram(edge["cumulative_time_histogram"])
+            })
+        return payload
+
+    @staticmethod
+    def _empty_edge():
+        return {
+            "number_of_samples": 0,
+            "number_of_calls": 0,
+            "total_time_sum": 0.0,
+            "cumulative_time_sum": 0.0,
+            "cumulative_time_sum_of_squares": 0.0,
+            "cumulative_time_minimum": float("inf"),
+            "cumulative_time_maximum": float("-inf"),
+            "cumulative_time_histogram": {}
+        }
+
+    @staticmethod
+    def _combine_edges(edge, other_edge):
+        """
+        Adds the statistics of the other call edge to the edge.
+
+        :param edge: The call edge that is updated.
+        :param other_edge: The call edge that is added.
+        """
+        for key in ("number_of_samples", "number_of_calls", "total_time_sum",
+                    "cumulative_time_sum", "cumulative_time_sum_of_squares"):
+            edge[key] += other_edge[key]
+        edge["cumulative_time_minimum"] = min(edge["cumulative_time_minimum"], other_edge["cumulative_time_minimum"])
+        edge["cumulative_time_maximum"] = max(edge["cumulative_time_maximum"], other_edge["cumulative_time_maximum"])
+        for bucket, count in other_edge["cumulative_time_histogram"].items():
+            edge["cumulative_time_histogram"][bucket] = edge["cumulative_time_histogram"].get(bucket, 0) + count
+
+    @classmethod
+    def histogram_bucket(cls, value):
+        """
+        The buckets grow exponentially, every doubling of the time is split into the same number of buckets.
+
+        :param value: A cumulative time in seconds.
+        :return: The index of the bucket, the bucket starts at 2 ** (index / HISTOGRAM_BUCKETS_PER_DOUBLING).
+        """
+        return floor(log2(max(value, cls.HISTOGRAM_MINIMUM)) * cls.HISTOGRAM_BUCKETS_PER_DOUBLING)
+
+    @classmethod
+    def dump_histogram(cls, histogram):
+        return json.dumps(
+            {"buckets_per_doubling": cls.HISTOGRAM_BUCKETS_PER_DOUBLING,
+             "counts": {str(bucket): count for bucket, count in sorted(histogram.items())}}
+        )
+
+    @staticmethod
+    def load_histogram(histogram):
+        return {int(bucket): count for bucket, count in json.loads(histogram)["counts"].items()}
+
+    def _abandon_aggregates_after_fork(self):
+        """
+        A forked child starts with an empty aggregate, otherwise the samples of the
+        parent would be written twice. The lock may have been held during the fork.
+        """
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._aggregates = {}
+
+
+statistics_aggregator = StatisticsAggregator()
+atexit.register(statistics_aggregator.flush)
+# Windows can not fork so it has no fork hooks
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=statistics_aggregator._abandon_aggregates_after_fork)
@@ -1,32 +1,94 @@
 from QuickPotato.configuration.management import options
-from QuickPotato.database.schemas import RawStatisticsSchemas, UnitPerformanceTestResultSchemas
-from sqlalchemy import create_engine
+from QuickPotato.database.schemas import RawStatisticsSchemas, MemoryAllocationSchemas, \
+    UnitPerformanceTestResultSchemas
+from sqlalchemy import create_engine, inspect, select, func, union, and_, MetaData, Table
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import ProgrammingError
 from QuickPotato.utilities.exceptions import DatabaseConnectionCannotBeSpawned, DatabaseSchemaCannotBeSpawned
 from sqlalchemy_utils import database_exists, create_database, drop_database
+from threading import Lock
 import tempfile
+import hashlib
+import os
 
 
-class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
+class ContextManager(RawStatisticsSchemas, MemoryAllocationSchemas, UnitPerformanceTestResultSchemas):
 
     URL = options.connection_url
 
+    # One pooled engine per database url, shared by every instance for the lifetime of the process
+    _engines = {}
+    _engines_lock = Lock()
+    _engines_inherited_from_parent = []
+
     def __init__(self):
         RawStatisticsSchemas.__init__(self)
+        MemoryAllocationSchemas.__init__(self)
         UnitPerformanceTestResultSchemas.__init__(self)
 
     def spawn_engine(self, database_name):
         """
+        Returns the cached engine of the database or creates it on first use.
+
         :return:
         """
         try:
             url = self._validate_connection_url(database_name=database_name)
-            engine = create_engine(url, echo=options.enable_database_echo)
+            with self._engines_lock:
+                engine = self._engines.get(url)
+                if engine is None:
+                    engine = self._create_pooled_engine(url)
+                    self._engines[url] = engine
             return engine
 
         except Exception:
             raise DatabaseConnectionCannotBeSpawned()
 
+    @staticmethod
+    def _create_pooled_engine(url):
+        """
+        SQLAlchemy does not pool file based SQLite connections by default,
+        so they get a thread-safe queue pool like the server based databases.
+
+        :param url:
+        :return:
+        """
+        if url.startswith("sqlite"):
+            return create_engine(
+                url,
+                echo=options.enable_database_echo,
+                poolclass=QueuePool,
+                connect_args={"check_same_thread": False}
+            )
+
+        return create_engine(url, echo=options.enable_database_echo)
+
+    def dispose_engine(self, database_name):
+        """
+        Closes the pooled connections of a database and removes its engine from the registry.
+
+        :param database_name:
+        :return:
+        """
+        url = self._validate_connection_url(database_name=database_name)
+        with self._engines_lock:
+            engine = self._engines.pop(url, None)
+
+        if engine is not None:
+            engine.dispose()
+        return True
+
+    @classmethod
+    def _abandon_engines_after_fork(cls):
+        """
+        A forked child must not use or close the pooled connections of its parent.
+        The inherited engines are kept referenced so their connections are never
+        garbage collected (and closed) in the child, which starts with an empty registry.
+        """
+        cls._engines_lock = Lock()
+        cls._engines_inherited_from_parent.extend(cls._engines.values())
+        cls._engines = {}
+
     def spawn_connection(self, database):
         """
 
@@ -48,8 +110,8 @@ class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
         :param connection:
         :return:
         """
+        # Returns the connection to the pool of the engine, the engine itself stays cached
         connection.close()
-        engine.dispose()
         return True
 
     @staticmethod
@@ -71,7 +133,104 @@ class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
         """
         engine = self.spawn_engine(database)
         schema.metadata.create_all(engine)
-        engine.dispose()
+        self.upgrade_schema(engine, schema)
+        return True
+
+    @staticmethod
+    def upgrade_schema(engine, schema):
+        """
+        Adds the columns and indexes that were introduced in a later version of QuickPotato
+        to a table that already existed in the database.
+
+        :param engine:
+        :param schema:
+        :return:
+        """
+        inspector = inspect(engine)
+        existing_columns = [column["name"] for column in inspector.get_columns(schema.name)]
+        for column in schema.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=engine.dialect)
+                engine.execute(f"ALTER TABLE {schema.name} ADD COLUMN {column.name} {column_type}")
+
+        existing_indexes = [index["name"] for index in inspector.get_indexes(schema.name)]
+        for index in schema.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+        return True
+
+    @staticmethod
+    def migrate_per_sample_columns(engine, samples):
+        """
+        Copies the per sample columns that older versions of QuickPotato repeated on every
+        row of the performance statistics into one row per sample in the samples table.
+
+        :param engine:
+        :param samples: The samples schema.
+        :return: True when the database held per sample columns that were migrated.
+        """
+        legacy_table = Table("performance_statistics", MetaData(), autoload=True, autoload_with=engine)
+        if "total_response_time" not in legacy_table.c:
+            return False
+
+        columns = [column.name for column in samples.c if column.name not in ("id", "sample_id")
+                   and column.name in legacy_table.c]
+        query = select(
+            [legacy_table.c.sample_id] + [func.min(legacy_table.c[column]).label(column) for column in columns]
+        ).where(legacy_table.c.sample_id.notin_(select([samples.c.sample_id]))).group_by(legacy_table.c.sample_id)
+        engine.execute(samples.insert().from_select(["sample_id"] + columns, query))
+        return True
+
+    @staticmethod
+    def function_hash(path, line_number, function_name):
+        """
+        A fixed length key of a function, which the functions table keeps unique.
+
+        :param path: The path of the file the function is defined in.
+        :param line_number: The line number the function is defined on.
+        :param function_name: The name of the function.
+        :return: The hexadecimal SHA-256 digest of the path, line number and name.
+        """
+        return hashlib.sha256(f"{path}\x00{line_number}\x00{function_name}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def migrate_function_columns(engine, functions):
+        """
+        Interns the paths and names that older versions of QuickPotato stored on every row
+        of the performance statistics into the functions table and links the rows to them.
+
+        :param engine:
+        :param functions: The functions schema.
+        :return: True when the database held function columns that were migrated.
+        """
+        legacy_table = Table("performance_statistics", MetaData(), autoload=True, autoload_with=engine)
+        if "child_path" not in legacy_table.c:
+            return False
+
+        distinct_functions = union(
+            select([legacy_table.c.child_path, legacy_table.c.child_line_number, legacy_table.c.child_function_name]),
+            select([legacy_table.c.parent_path, legacy_table.c.parent_line_number,
+                    legacy_table.c.parent_function_name]).where(
+                legacy_table.c.parent_function_name != legacy_table.c.sample_id)
+        )
+        distinct_functions = [
+            {"path": path, "line_number": line_number, "function_name": function_name,
+             "function_hash": ContextManager.function_hash(path, line_number, function_name)}
+            for path, line_number, function_name in engine.execute(distinct_functions)
+        ]
+        if len(distinct_functions) > 0:
+            engine.execute(functions.insert(), distinct_functions)
+
+        function_ids = {}
+        for relation in ("child", "parent"):
+            function_ids[f"{relation}_function_id"] = select([functions.c.id]).where(
+                and_(
+                    functions.c.path == legacy_table.c[f"{relation}_path"],
+                    functions.c.line_number == legacy_table.c[f"{relation}_line_number"],
+                    functions.c.function_name == legacy_table.c[f"{relation}_function_name"]
+                )
+            ).as_scalar()
+        engine.execute(legacy_table.update().values(function_ids))
         return True
 
     def create_database(self, database_name):
@@ -85,7 +244,6 @@ class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
             engine = self.spawn_engine(database_name)
             if not database_exists(engine.url):
                 create_database(engine.url)
-            engine.dispose()
 
         except ProgrammingError:
             # Database exists no need to re-create it
@@ -100,9 +258,10 @@ class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
         :param database_name:
         :return:
         """
-        engine = self.spawn_engine(database_name)
-        if database_exists(engine.url):
-            drop_database(engine.url)
+        url = self._validate_connection_url(database_name=database_name)
+        self.dispose_engine(database_name)
+        if database_exists(url):
+            drop_database(url)
         return True
 
     def _validate_connection_url(self, database_name):
@@ -119,3 +278,8 @@ class ContextManager(RawStatisticsSchemas, UnitPerformanceTestResultSchemas):
 
         else:
             return f"{self.URL}/{database_name}"
+
+
+# Windows can not fork so it has no fork hooks
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ContextManager._abandon_engines_after_fork)
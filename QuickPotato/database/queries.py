@@ -1,6 +1,8 @@
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal
 from QuickPotato.database.operations import ContextManager
 from QuickPotato.configuration.management import options
+import numpy as np
+import pandas as pd
 
 
 class Create(ContextManager):
@@ -19,6 +21,56 @@ class Create(ContextManager):
         self.execute_query(connection, query=table.insert().values(payload))
         self.close_connection(engine, connection)
 
+    def insert_system_resource_statistics(self, database, payload):
+        """
+
+        :param database:
+        :param payload:
+        """
+        table = self.system_resource_statistics_schema()
+        engine, connection = self.spawn_connection(database)
+        self.execute_query(connection, query=table.insert().values(payload))
+        self.close_connection(engine, connection)
+
+    def insert_memory_allocation_statistics(self, database, payload, allocation_sites):
+        """
+
+        :param database:
+        :param payload:
+        :param allocation_sites:
+        """
+        engine, connection = self.spawn_connection(database)
+        table = self.memory_allocation_statistics_schema()
+        self.execute_query(connection, query=table.insert().values(payload))
+        if len(allocation_sites) > 0:
+            table = self.memory_allocation_sites_schema()
+            self.execute_query(connection, query=table.insert().values(allocation_sites))
+        self.close_connection(engine, connection)
+
+    def insert_payload_in_bulk(self, database, payload):
+        """
+        Inserts the rows of many samples in a single transaction,
+        every table is written with one executemany.
+
+        :param database:
+        :param payload: A dictionary with the table name as key and a list of rows as value.
+        """
+        tables = {
+            table.name: table for table in (
+                self.samples_schema(),
+                self.performance_statistics_schema(),
+                self.system_resource_statistics_schema(),
+                self.memory_allocation_statistics_schema(),
+                self.memory_allocation_sites_schema()
+            )
+        }
+        engine, connection = self.spawn_connection(database)
+        with connection.begin():
+            for table_name, rows in payload.items():
+                if len(rows) > 0:
+                    connection.execute(tables[table_name].insert(), rows)
+        self.close_connection(engine, connection)
+
     def insert_boundaries_test_evidence(self, database, payload):
         """
 
@@ -52,12 +104,94 @@ class Create(ContextManager):
         self.execute_query(connection, query=table.insert().values(payload))
         self.close_connection(engine, connection)
 
+    def insert_functions(self, database, functions):
+        """
+
+        :param database:
+        :param functions: A list of (path, line number, function name) tuples.
+        """
+        table = self.functions_schema()
+        engine, connection = self.spawn_connection(database)
+        self.execute_query(
+            connection,
+            query=table.insert().values(
+                [{"path": path, "line_number": line_number, "function_name": function_name,
+                  "function_hash": self.function_hash(path, line_number, function_name)}
+                 for path, line_number, function_name in functions]
+            )
+        )
+        self.close_connection(engine, connection)
+
+    def insert_performance_statistics_aggregate(self, database, test_id, merge_payload):
+        """
+        Merges the aggregated performance statistics of a test id with the stored rows and replaces them.
+        The stored rows are read in the same transaction, so two flushes can not overwrite each other.
+
+        :param database:
+        :param test_id:
+        :param merge_payload: A function that receives the stored rows and returns one row per call edge.
+        """
+        table = self.performance_statistics_aggregate_schema()
+        engine, connection = self.spawn_connection(database)
+        with connection.begin():
+            query = select([table]).where(table.c.test_id == str(test_id)).with_for_update()
+            payload = merge_payload([dict(row) for row in connection.execute(query)])
+            connection.execute(table.delete().where(table.c.test_id == str(test_id)))
+            if len(payload) > 0:
+                connection.execute(table.insert(), payload)
+        self.close_connection(engine, connection)
+
+    def insert_test_summary(self, database, payload):
+        """
+        Replaces the summary of a test id and metric in a single transaction.
+
+        :param database:
+        :param payload:
+        """
+        table = self.test_summary_schema()
+        engine, connection = self.spawn_connection(database)
+        with connection.begin():
+            connection.execute(
+                table.delete().where(table.c.test_id == str(payload["test_id"])).where(
+                    table.c.metric == payload["metric"])
+            )
+            connection.execute(table.insert().values(payload))
+        self.close_connection(engine, connection)
+
     def spawn_performance_statistics_schema(self, database):
         """
+        Spawns the samples and functions tables together with the performance statistics that reference them.
+        A database that predates one of these tables has its rows migrated once.
 
         :param database:
         """
+        engine = self.spawn_engine(database)
+        migrate_samples = engine.has_table("performance_statistics") and not engine.has_table("samples")
+        migrate_functions = engine.has_table("performance_statistics") and not engine.has_table("functions")
+
+        self.create_schema(database, self.samples_schema())
+        self.create_schema(database, self.functions_schema())
         self.create_schema(database, self.performance_statistics_schema())
+        self.create_schema(database, self.performance_statistics_aggregate_schema())
+        if migrate_samples:
+            self.migrate_per_sample_columns(engine, self.samples_schema())
+        if migrate_functions:
+            self.migrate_function_columns(engine, self.functions_schema())
+
+    def spawn_system_resource_statistics_schema(self, database):
+        """
+
+        :param database:
+        """
+        self.create_schema(database, self.system_resource_statistics_schema())
+
+    def spawn_memory_allocation_schemas(self, database):
+        """
+
+        :param database:
+        """
+        self.create_schema(database, self.memory_allocation_statistics_schema())
+        self.create_schema(database, self.memory_allocation_sites_schema())
 
     def spawn_test_report_schema(self, database):
         """
@@ -80,6 +214,13 @@ class Create(ContextManager):
         """
         self.create_schema(database, self.regression_test_evidence_schema())
 
+    def spawn_test_summary_schema(self, database):
+        """
+
+        :param database:
+        """
+        self.create_schema(database, self.test_summary_schema())
+
     def spawn_result_database(self, database_name):
         """
 
@@ -93,20 +234,125 @@ class Read(ContextManager):
     def __init__(self):
         super(Read, self).__init__()
 
-    def select_response_times(self, database, test_id):
+    def select_function_ids(self, database):
+        """
+
+        :param database:
+        :return: A dictionary with a (path, line number, function name) tuple as key and the function id as value.
+        """
+        table = ContextManager.functions_schema()
+        engine, connection = self.spawn_connection(database)
+        query = select([table.c.id, table.c.path, table.c.line_number, table.c.function_name])
+        results = {
+            (row.path, row.line_number, row.function_name): row.id for row in self.execute_query(connection, query)
+        }
+        self.close_connection(engine, connection)
+        return results
+
+    def select_response_times(self, database, test_id, metric="total_response_time"):
         """
 
         :param database:
         :param test_id:
+        :param metric: The per sample measurement that is selected, for example "total_cpu_time".
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        return self.select_response_times_as_array(database, test_id, metric).tolist()
+
+    def select_number_of_samples(self, database, test_id, metric="total_response_time"):
+        """
+
+        :param database:
+        :param test_id:
+        :param metric: Only counts the samples in which this measurement has been recorded.
+        :return:
+        """
+        table = ContextManager.samples_schema()
+        engine, connection = self.spawn_connection(database)
+        query = select([func.count()]).where(table.c.test_id == test_id).where(table.c[metric].isnot(None))
+        results = int([row[0] for row in self.execute_query(connection, query)][0])
+        self.close_connection(engine, connection)
+        return results
+
+    def select_response_times_as_array(self, database, test_id, metric="total_response_time"):
+        """
+        Reads the measurements of a test id straight from the cursor into a NumPy array.
+
+        :param database:
+        :param test_id:
+        :param metric: The per sample measurement that is selected, for example "total_cpu_time".
+        :return: A one dimensional float array.
+        """
+        table = ContextManager.samples_schema()
         engine, connection = self.spawn_connection(database)
-        query = select([table.c.sample_id.distinct(), table.c.total_response_time]).where(table.c.test_id == test_id)
-        results = [float(row.total_response_time) for row in self.execute_query(connection, query)]
+        column = table.c[metric]
+        query = select([column]).where(table.c.test_id == test_id).where(column.isnot(None)).order_by(table.c.id)
+        results = np.fromiter((row[0] for row in self.execute_query(connection, query)), dtype=np.float64)
         self.close_connection(engine, connection)
         return results
 
+    def iterate_performance_statistics_in_chunks(self, database, test_ids, columns=None, chunk_size=10000):
+        """
+        Streams the performance statistics of one or more test ids as DataFrames that are
+        built from the raw cursor tuples, so no dictionary is created per row.
+
+        :param database:
+        :param test_ids: A test id or a list of test ids.
+        :param columns: The names of the columns that are selected, defaults to all columns.
+        :param chunk_size: The maximum number of rows in one DataFrame.
+        :return: A generator that yields DataFrames ordered by test id, sample id and cumulative time.
+        """
+        test_ids = [str(test_ids)] if isinstance(test_ids, str) else [str(test_id) for test_id in test_ids]
+        joined_tables, joined_columns = self._performance_statistics_with_samples()
+        selected_columns = list(joined_columns.values()) if columns is None else \
+            [joined_columns[column] for column in columns]
+        query = select(selected_columns).select_from(joined_tables).where(
+            joined_columns["test_id"].in_(test_ids)).order_by(
+            joined_columns["test_id"], joined_columns["sample_id"], joined_columns["cumulative_time"].desc()
+        )
+
+        engine, connection = self.spawn_connection(database)
+        try:
+            cursor = connection.execution_options(stream_results=True).execute(query)
+            names = [column.name for column in selected_columns]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                yield pd.DataFrame.from_records([tuple(row) for row in rows], columns=names)
+
+        finally:
+            self.close_connection(engine, connection)
+
+    def select_performance_statistics_as_data_frame(self, database, test_ids, columns=None, chunk_size=10000):
+        """
+
+        :param database:
+        :param test_ids: A test id or a list of test ids.
+        :param columns: The names of the columns that are selected, defaults to all columns.
+        :param chunk_size: The number of rows that are fetched from the cursor at once.
+        :return: A single DataFrame with the performance statistics of the test ids.
+        """
+        chunks = list(self.iterate_performance_statistics_in_chunks(database, test_ids, columns, chunk_size))
+        if len(chunks) == 0:
+            _, joined_columns = self._performance_statistics_with_samples()
+            return pd.DataFrame(columns=list(joined_columns) if columns is None else columns)
+
+        return pd.concat(chunks, ignore_index=True)
+
+    def select_performance_statistics_as_array(self, database, test_ids, columns=None, chunk_size=10000):
+        """
+
+        :param database:
+        :param test_ids: A test id or a list of test ids.
+        :param columns: The names of the columns that are selected, defaults to all columns.
+        :param chunk_size: The number of rows that are fetched from the cursor at once.
+        :return: A NumPy structured array with one field per column.
+        """
+        return self.select_performance_statistics_as_data_frame(
+            database, test_ids, columns, chunk_size
+        ).to_records(index=False)
+
     def select_cumulative_latency(self, database, test_id):
         """
 
@@ -128,9 +374,10 @@ class Read(ContextManager):
         :param number:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        table = ContextManager.samples_schema()
         engine, connection = self.spawn_connection(database)
-        query = select([table.c.test_id]).distinct().limit(number)
+        # An index that leads with the test id returns distinct test ids sorted, not in the order they were created
+        query = select([table.c.test_id]).group_by(table.c.test_id).order_by(func.min(table.c.id)).limit(number)
         results = [str(row.test_id) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return results
@@ -144,7 +391,8 @@ class Read(ContextManager):
         """
         table = ContextManager.test_report_schema()
         engine, connection = self.spawn_connection(database)
-        query = select([table.c.test_id]).distinct().limit(number)
+        # An index that leads with the test id returns distinct test ids sorted, not in the order they were created
+        query = select([table.c.test_id]).group_by(table.c.test_id).order_by(func.min(table.c.id)).limit(number)
         results = [str(row.test_id) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return results
@@ -155,9 +403,9 @@ class Read(ContextManager):
         :param database:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        table = ContextManager.samples_schema()
         engine, connection = self.spawn_connection(database)
-        query = select([table.c.test_id]).distinct()
+        query = select([table.c.test_id]).group_by(table.c.test_id).order_by(func.min(table.c.id))
         results = [str(row.test_id) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return None if len(results) == 0 else results[-1]
@@ -181,7 +429,7 @@ class Read(ContextManager):
         :param database:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        table = ContextManager.samples_schema()
         engine, connection = self.spawn_connection(database)
         query = select([func.count(table.c.test_id.distinct())])
         results = int([row[0] for row in self.execute_query(connection, query)][0])
@@ -195,33 +443,11 @@ class Read(ContextManager):
         :param sample_id:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        query, columns = self._select_call_stack_rows()
+        query = query.where(columns["sample_id"] == str(sample_id)).order_by(columns["cumulative_time"].desc())
         engine, connection = self.spawn_connection(database)
-        query = table.select().where(table.c.sample_id == str(sample_id)).order_by(table.c.cumulative_time.desc())
 
-        results = []
-        for row in self.execute_query(connection, query):
-            results.append(
-                {
-                    "id": row.id,
-                    "test_id": row.test_id,
-                    "test_case_name": row.test_case_name,
-                    "sample_id": row.sample_id,
-                    "name_of_method_under_test": row.name_of_method_under_test,
-                    "epoch_timestamp": int(row.epoch_timestamp),
-                    "human_timestamp": row.human_timestamp,
-                    "child_path": row.child_path,
-                    "child_line_number": row.child_line_number,
-                    "child_function_name": row.child_function_name,
-                    "parent_path": row.parent_path,
-                    "parent_line_number": row.parent_line_number,
-                    "parent_function_name": row.parent_function_name,
-                    "number_of_calls": row.number_of_calls,
-                    "total_time": float(row.total_time),
-                    "cumulative_time": float(row.cumulative_time),
-                    "total_response_time": float(row.total_response_time)
-                }
-            )
+        results = [self._call_stack_row(row) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return results
 
@@ -232,33 +458,144 @@ class Read(ContextManager):
         :param test_id:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        query, columns = self._select_call_stack_rows()
+        query = query.where(columns["test_id"] == str(test_id)).order_by(columns["cumulative_time"].desc())
         engine, connection = self.spawn_connection(database)
-        query = table.select().where(table.c.test_id == str(test_id)).order_by(table.c.cumulative_time.desc())
 
-        results = []
-        for row in self.execute_query(connection, query):
-            results.append(
-                {
-                    "id": row.id,
-                    "test_id": row.test_id,
-                    "test_case_name": row.test_case_name,
-                    "sample_id": row.sample_id,
-                    "name_of_method_under_test": row.name_of_method_under_test,
-                    "epoch_timestamp": int(row.epoch_timestamp),
-                    "human_timestamp": row.human_timestamp,
-                    "child_path": row.child_path,
-                    "child_line_number": row.child_line_number,
-                    "child_function_name": row.child_function_name,
-                    "parent_path": row.parent_path,
-                    "parent_line_number": row.parent_line_number,
-                    "parent_function_name": row.parent_function_name,
-                    "number_of_calls": row.number_of_calls,
-                    "total_time": float(row.total_time),
-                    "cumulative_time": float(row.cumulative_time),
-                    "total_response_time": float(row.total_response_time)
-                }
-            )
+        results = [self._call_stack_row(row) for row in self.execute_query(connection, query)]
+        self.close_connection(engine, connection)
+        return results
+
+    def select_call_stacks_by_test_ids(self, database, test_ids):
+        """
+        Streams the call stacks of every sample of one or more test ids with a single query.
+
+        :param database:
+        :param test_ids: A test id or a list of test ids.
+        :return: A generator that yields a (test_id, sample_id, call stack) tuple per sample.
+        """
+        test_ids = [str(test_ids)] if isinstance(test_ids, str) else [str(test_id) for test_id in test_ids]
+        query, columns = self._select_call_stack_rows()
+        query = query.where(columns["test_id"].in_(test_ids)).order_by(
+            columns["test_id"], columns["sample_id"], columns["cumulative_time"].desc()
+        )
+        engine, connection = self.spawn_connection(database)
+
+        try:
+            current_sample = None
+            stack = []
+            for row in connection.execution_options(stream_results=True).execute(query):
+                if (row.test_id, row.sample_id) != current_sample:
+                    if current_sample is not None:
+                        yield current_sample[0], current_sample[1], stack
+                    current_sample = (row.test_id, row.sample_id)
+                    stack = []
+                stack.append(self._call_stack_row(row))
+
+            if current_sample is not None:
+                yield current_sample[0], current_sample[1], stack
+
+        finally:
+            self.close_connection(engine, connection)
+
+    @staticmethod
+    def _performance_statistics_with_samples():
+        """
+        Joins the performance statistics with the sample and the functions they reference, so every row
+        carries the per sample columns and the path, line number and name of both functions.
+        The method under test has no parent function, it is shown as called by its sample.
+
+        :return: The joined tables and a dictionary with the column name as key and the column as value.
+        """
+        table = ContextManager.performance_statistics_schema()
+        samples = ContextManager.samples_schema()
+        functions = ContextManager.functions_schema()
+        child_function = functions.alias("child_function")
+        parent_function = functions.alias("parent_function")
+
+        columns = {column.name: column for column in table.c}
+        columns.update({column.name: column for column in samples.c if column.name not in columns})
+        columns.update(
+            {
+                "child_path": child_function.c.path.label("child_path"),
+                "child_line_number": child_function.c.line_number.label("child_line_number"),
+                "child_function_name": child_function.c.function_name.label("child_function_name"),
+                "parent_path": func.coalesce(parent_function.c.path, literal("~")).label("parent_path"),
+                "parent_line_number": func.coalesce(
+                    parent_function.c.line_number, literal(0)).label("parent_line_number"),
+                "parent_function_name": func.coalesce(
+                    parent_function.c.function_name, table.c.sample_id).label("parent_function_name"),
+            }
+        )
+        joined_tables = table.join(samples, table.c.sample_id == samples.c.sample_id).join(
+            child_function, table.c.child_function_id == child_function.c.id).outerjoin(
+            parent_function, table.c.parent_function_id == parent_function.c.id)
+        return joined_tables, columns
+
+    def _select_call_stack_rows(self):
+        """
+
+        :return: A select of every column of a call stack row and a dictionary with the selected columns.
+        """
+        joined_tables, joined_columns = self._performance_statistics_with_samples()
+        return select(list(joined_columns.values())).select_from(joined_tables), joined_columns
+
+    @staticmethod
+    def _call_stack_row(row):
+        """
+
+        :param row: A row of the performance statistics joined with its sample.
+        :return: The row as a dictionary.
+        """
+        return {
+            "id": row.id,
+            "test_id": row.test_id,
+            "test_case_name": row.test_case_name,
+            "sample_id": row.sample_id,
+            "name_of_method_under_test": row.name_of_method_under_test,
+            "epoch_timestamp": int(row.epoch_timestamp),
+            "human_timestamp": row.human_timestamp,
+            "child_path": row.child_path,
+            "child_line_number": row.child_line_number,
+            "child_function_name": row.child_function_name,
+            "parent_path": row.parent_path,
+            "parent_line_number": row.parent_line_number,
+            "parent_function_name": row.parent_function_name,
+            "number_of_calls": row.number_of_calls,
+            "total_time": float(row.total_time),
+            "cumulative_time": float(row.cumulative_time),
+            "total_response_time": float(row.total_response_time)
+        }
+
+    def select_performance_statistics_aggregate(self, database, test_id):
+        """
+        The aggregated performance statistics of a test id with the path, line number and name of both functions.
+        The method under test has no parent function, it is shown as called by its test id.
+
+        :param database:
+        :param test_id:
+        :return: A list with one dictionary per call edge, ordered by the summed cumulative time.
+        """
+        table = ContextManager.performance_statistics_aggregate_schema()
+        functions = ContextManager.functions_schema()
+        child_function = functions.alias("child_function")
+        parent_function = functions.alias("parent_function")
+        query = select(
+            list(table.c) + [
+                child_function.c.path.label("child_path"),
+                child_function.c.line_number.label("child_line_number"),
+                child_function.c.function_name.label("child_function_name"),
+                func.coalesce(parent_function.c.path, literal("~")).label("parent_path"),
+                func.coalesce(parent_function.c.line_number, literal(0)).label("parent_line_number"),
+                func.coalesce(parent_function.c.function_name, table.c.test_id).label("parent_function_name"),
+            ]
+        ).select_from(
+            table.join(child_function, table.c.child_function_id == child_function.c.id).outerjoin(
+                parent_function, table.c.parent_function_id == parent_function.c.id)
+        ).where(table.c.test_id == str(test_id)).order_by(table.c.cumulative_time_sum.desc())
+
+        engine, connection = self.spawn_connection(database)
+        results = [dict(row) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return results
 
@@ -269,13 +606,70 @@ class Read(ContextManager):
         :param test_id:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        table = ContextManager.samples_schema()
         engine, connection = self.spawn_connection(database)
-        query = select([table.c.sample_id]).where(table.c.test_id == test_id).distinct()
+        query = select([table.c.sample_id]).where(table.c.test_id == test_id).order_by(table.c.id)
         results = [str(row.sample_id) for row in self.execute_query(connection, query)]
         self.close_connection(engine, connection)
         return results
 
+    def select_system_resource_statistics(self, database, test_id):
+        """
+
+        :param database:
+        :param test_id:
+        :return:
+        """
+        table = ContextManager.system_resource_statistics_schema()
+        engine, connection = self.spawn_connection(database)
+        query = table.select().where(table.c.test_id == str(test_id))
+        results = [dict(row) for row in self.execute_query(connection, query)]
+        self.close_connection(engine, connection)
+        return results
+
+    def select_memory_allocation_statistics(self, database, test_id):
+        """
+
+        :param database:
+        :param test_id:
+        :return:
+        """
+        table = ContextManager.memory_allocation_statistics_schema()
+        engine, connection = self.spawn_connection(database)
+        query = table.select().where(table.c.test_id == str(test_id))
+        results = [dict(row) for row in self.execute_query(connection, query)]
+        self.close_connection(engine, connection)
+        return results
+
+    def select_memory_allocation_sites(self, database, sample_id):
+        """
+
+        :param database:
+        :param sample_id:
+        :return:
+        """
+        table = ContextManager.memory_allocation_sites_schema()
+        engine, connection = self.spawn_connection(database)
+        query = table.select().where(table.c.sample_id == str(sample_id)).order_by(table.c.size.desc())
+        results = [dict(row) for row in self.execute_query(connection, query)]
+        self.close_connection(engine, connection)
+        return results
+
+    def select_test_summary(self, database, test_id, metric="total_response_time"):
+        """
+
+        :param database:
+        :param test_id:
+        :param metric: The per sample measurement that is summarized, for example "total_cpu_time".
+        :return: The summary as a dictionary or None when the test id has not been summarized.
+        """
+        table = ContextManager.test_summary_schema()
+        query = table.select().where(table.c.test_id == str(test_id)).where(table.c.metric == metric)
+        engine, connection = self.spawn_connection(database)
+        row = self.execute_query(connection, query).first()
+        self.close_connection(engine, connection)
+        return None if row is None else dict(row)
+
     def select_test_id_description(self, database, test_id):
         """
 
@@ -283,11 +677,11 @@ class Read(ContextManager):
         :param test_id:
         :return:
         """
-        table = ContextManager.performance_statistics_schema()
+        table = ContextManager.samples_schema()
         query = select([table.c.sample_id,
                         table.c.name_of_method_under_test,
                         table.c.human_timestamp,
-                        table.c.total_response_time]).distinct().where(table.c.test_id == test_id)
+                        table.c.total_response_time]).where(table.c.test_id == test_id).order_by(table.c.id)
         engine, connection = self.spawn_connection(database)
 
         results = []
@@ -334,10 +728,16 @@ class Delete(ContextManager):
         :param database:
         :param test_id:
         """
-        table = ContextManager.performance_statistics_schema()
-        query = table.delete().where(table.c.test_id == str(test_id))
         engine, connection = self.spawn_connection(database)
-        self.execute_query(connection, query)
+        for table in [ContextManager.samples_schema(),
+                      ContextManager.performance_statistics_schema(),
+                      ContextManager.performance_statistics_aggregate_schema(),
+                      ContextManager.system_resource_statistics_schema(),
+                      ContextManager.memory_allocation_statistics_schema(),
+                      ContextManager.memory_allocation_sites_schema(),
+                      ContextManager.test_summary_schema()]:
+            query = table.delete().where(table.c.test_id == str(test_id))
+            self.execute_query(connection, query)
         self.close_connection(engine, connection)
 
     def delete_result_database(self, database_name):
@@ -1,13 +1,13 @@
-from sqlalchemy import MetaData, Table, Column, Integer, Float, String, Boolean
+from sqlalchemy import MetaData, Table, Column, Index, Integer, BigInteger, Float, String, Text, Boolean
 
 
 class RawStatisticsSchemas(object):
 
     @staticmethod
-    def performance_statistics_schema():
+    def samples_schema():
         meta = MetaData()
         table = Table(
-            "performance_statistics", meta,
+            "samples", meta,
             Column('id', Integer, primary_key=True),
             Column('test_id', String(99)),
             Column("test_case_name", String(999)),
@@ -15,16 +15,128 @@ class RawStatisticsSchemas(object):
             Column("name_of_method_under_test", String(999)),
             Column("epoch_timestamp", Integer),
             Column("human_timestamp", String(99)),
-            Column("child_path", String(999)),
-            Column("child_line_number", Integer),
-            Column("child_function_name", String(999)),
-            Column("parent_path", String(999)),
-            Column("parent_line_number", Integer),
-            Column("parent_function_name", String(999)),
+            Column("total_response_time", Float),
+            Column("total_cpu_time", Float),
+            Column("total_thread_time", Float),
+            Column("gc_pause_time", Float),
+            Column("gc_collections", Integer),
+            Index("ix_samples_sample_id", "sample_id", unique=True),
+            Index("ix_samples_test_id_sample_id", "test_id", "sample_id"),
+        )
+        return table
+
+    @staticmethod
+    def functions_schema():
+        meta = MetaData()
+        table = Table(
+            "functions", meta,
+            Column('id', Integer, primary_key=True),
+            Column("path", String(999)),
+            Column("line_number", Integer),
+            Column("function_name", String(999)),
+            # The columns themselves are too long for the key of a unique index in MySQL
+            Column("function_hash", String(64)),
+            Index("ix_functions_function_hash", "function_hash", unique=True),
+        )
+        return table
+
+    @staticmethod
+    def performance_statistics_schema():
+        meta = MetaData()
+        table = Table(
+            "performance_statistics", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column('sample_id', String(99)),
+            Column("child_function_id", Integer),
+            Column("parent_function_id", Integer),
             Column("number_of_calls", String(99)),
             Column("total_time", Float),
             Column("cumulative_time", Float),
-            Column("total_response_time", Float),
+            Index("ix_performance_statistics_test_id_sample_id", "test_id", "sample_id"),
+            Index("ix_performance_statistics_test_id_cumulative_time", "test_id", "cumulative_time"),
+            Index("ix_performance_statistics_sample_id_cumulative_time", "sample_id", "cumulative_time"),
+        )
+        return table
+
+    @staticmethod
+    def performance_statistics_aggregate_schema():
+        meta = MetaData()
+        table = Table(
+            "performance_statistics_aggregate", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column("child_function_id", Integer),
+            Column("parent_function_id", Integer),
+            Column("number_of_samples", Integer),
+            Column("number_of_calls", BigInteger),
+            Column("total_time_sum", Float),
+            Column("cumulative_time_sum", Float),
+            Column("cumulative_time_sum_of_squares", Float),
+            Column("cumulative_time_minimum", Float),
+            Column("cumulative_time_maximum", Float),
+            Column("cumulative_time_histogram", Text),
+            Index("ix_performance_statistics_aggregate_test_id", "test_id"),
+        )
+        return table
+
+    @staticmethod
+    def system_resource_statistics_schema():
+        meta = MetaData()
+        table = Table(
+            "system_resource_statistics", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column("test_case_name", String(999)),
+            Column('sample_id', String(99)),
+            Column("epoch_timestamp", Integer),
+            Column("resident_memory_delta", BigInteger),
+            Column("peak_resident_memory", BigInteger),
+            Column("peak_resident_memory_delta", BigInteger),
+            Column("voluntary_context_switches", Integer),
+            Column("involuntary_context_switches", Integer),
+            Column("minor_page_faults", Integer),
+            Column("major_page_faults", Integer),
+            Column("read_bytes", BigInteger),
+            Column("write_bytes", BigInteger),
+            Index("ix_system_resource_statistics_test_id_sample_id", "test_id", "sample_id"),
+        )
+        return table
+
+
+class MemoryAllocationSchemas(object):
+
+    @staticmethod
+    def memory_allocation_statistics_schema():
+        meta = MetaData()
+        table = Table(
+            "memory_allocation_statistics", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column("test_case_name", String(999)),
+            Column('sample_id', String(99)),
+            Column("epoch_timestamp", Integer),
+            Column("allocated_memory", BigInteger),
+            Column("peak_traced_memory", BigInteger),
+            Column("net_memory", BigInteger),
+            Index("ix_memory_allocation_statistics_test_id_sample_id", "test_id", "sample_id"),
+        )
+        return table
+
+    @staticmethod
+    def memory_allocation_sites_schema():
+        meta = MetaData()
+        table = Table(
+            "memory_allocation_sites", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column('sample_id', String(99)),
+            Column("path", String(999)),
+            Column("line_number", Integer),
+            Column("size", BigInteger),
+            Column("count", Integer),
+            Index("ix_memory_allocation_sites_test_id", "test_id"),
+            Index("ix_memory_allocation_sites_sample_id_size", "sample_id", "size"),
         )
         return table
 
@@ -44,6 +156,8 @@ class UnitPerformanceTestResultSchemas(object):
             Column("status", Boolean),
             Column("boundaries_breached", Boolean),
             Column("regression_found", Boolean),
+            Index("ix_test_report_test_id", "test_id"),
+            Index("ix_test_report_status_id", "status", "id"),
         )
         return table
 
@@ -60,7 +174,8 @@ class UnitPerformanceTestResultSchemas(object):
             Column("verification_name", String(999)),
             Column("status", Boolean),
             Column("value", Float),
-            Column("boundary", Float)
+            Column("boundary", Float),
+            Index("ix_boundaries_test_evidence_test_id", "test_id"),
         )
         return table
 
@@ -77,6 +192,47 @@ class UnitPerformanceTestResultSchemas(object):
             Column("verification_name", String(999)),
             Column("status", Boolean),
             Column("value", Float),
-            Column("critical_value", Float)
+            Column("critical_value", Float),
+            Index("ix_regression_test_evidence_test_id", "test_id"),
+        )
+        return table
+
+    @staticmethod
+    def test_summary_schema():
+        meta = MetaData()
+        table = Table(
+            "test_summary", meta,
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column("test_case_name", String(999)),
+            Column("metric", String(99)),
+            Column("epoch_timestamp", Integer),
+            Column("human_timestamp", String(99)),
+            Column("number_of_samples", Integer),
+            Column("mean", Float),
+            Column("variance", Float),
+            Column("minimum", Float),
+            Column("maximum", Float),
+            Column("percentile_5th", Float),
+            Column("percentile_10th", Float),
+            Column("percentile_15th", Float),
+            Column("percentile_20th", Float),
+            Column("percentile_25th", Float),
+            Column("percentile_30th", Float),
+            Column("percentile_35th", Float),
+            Column("percentile_40th", Float),
+            Column("percentile_45th", Float),
+            Column("percentile_50th", Float),
+            Column("percentile_55th", Float),
+            Column("percentile_60th", Float),
+            Column("percentile_65th", Float),
+            Column("percentile_70th", Float),
+            Column("percentile_75th", Float),
+            Column("percentile_80th", Float),
+            Column("percentile_85th", Float),
+            Column("percentile_90th", Float),
+            Column("percentile_95th", Float),
+            Column("histogram", Text),
+            Index("ix_test_summary_test_id_metric", "test_id", "metric", unique=True),
         )
         return table
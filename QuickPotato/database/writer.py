@@ -0,0 +1,182 @@
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+from QuickPotato.utilities.exceptions import PayloadDropPolicyNotSupported, PayloadDeliveryFailed
+from queue import Queue, Empty, Full
+from threading import Thread, Lock
+from time import monotonic
+import atexit
+import os
+
+
+class PayloadWriter(Crud):
+
+    SUPPORTED_DROP_POLICIES = ("block", "drop")
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, queue_size=None, batch_size=None, flush_interval=None, drop_policy=None):
+        """
+        A single long-lived background thread that coalesces the payload of many samples
+        into one bulk insert per database, so profiled methods never wait on the database.
+        Settings that are not defined fall back to their global counterpart in the options.
+
+        :param queue_size: The maximum number of samples waiting to be written.
+        :param batch_size: The maximum number of samples that are written in one bulk insert.
+        :param flush_interval: The maximum number of seconds a sample waits before it is written.
+        :param drop_policy: "block" makes the profiled method wait when the queue is full,
+                            "drop" discards the sample and counts it in dropped_samples.
+        """
+        super(PayloadWriter, self).__init__()
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._drop_policy = drop_policy
+
+        self.dropped_samples = 0
+        self.failed_batches = 0
+        self.last_exception = None
+        self._unreported_failures = 0
+
+        self._lock = Lock()
+        self._counters_lock = Lock()
+        self._pending_flushes = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def queue_size(self):
+        return options.payload_delivery_queue_size if self._queue_size is None else self._queue_size
+
+    @property
+    def batch_size(self):
+        return options.payload_delivery_batch_size if self._batch_size is None else self._batch_size
+
+    @property
+    def flush_interval(self):
+        return options.payload_delivery_flush_interval if self._flush_interval is None else self._flush_interval
+
+    @property
+    def drop_policy(self):
+        return options.payload_delivery_drop_policy if self._drop_policy is None else self._drop_policy
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def deliver(self, database_name, payload):
+        """
+        Hands the payload of one sample over to the background writer.
+
+        :param database_name: The database the payload belongs in.
+        :param payload: A dictionary with the table name as key and a list of rows as value.
+        :return: True when the payload was queued, False when it was dropped.
+        """
+        if self.drop_policy not in self.SUPPORTED_DROP_POLICIES:
+            raise PayloadDropPolicyNotSupported()
+
+        self._start()
+        if self.drop_policy == "block":
+            self._queue.put((database_name, payload))
+            return True
+
+        try:
+            self._queue.put_nowait((database_name, payload))
+            return True
+
+        except Full:
+            with self._counters_lock:
+                self.dropped_samples += 1
+            return False
+
+    def flush(self):
+        """
+        Blocks until every queued sample has been written to the database.
+        Every caller registers its own flush request, so concurrent flushes do not cancel each other.
+
+        Raises
+        -------
+            PayloadDeliveryFailed when a batch failed to be written since the previous flush.
+        """
+        if self.running is False:
+            return True
+
+        with self._counters_lock:
+            self._pending_flushes += 1
+
+        try:
+            self._queue.join()
+
+        finally:
+            with self._counters_lock:
+                self._pending_flushes -= 1
+                unreported_failures, self._unreported_failures = self._unreported_failures, 0
+
+        if unreported_failures > 0:
+            raise PayloadDeliveryFailed() from self.last_exception
+        return True
+
+    def _start(self):
+        """
+        Starts the writer thread on first use and again in a forked child process,
+        which does not inherit the threads of its parent.
+        """
+        if self.running:
+            return
+
+        with self._lock:
+            if self.running:
+                return
+
+            self._queue = Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._thread = Thread(target=self._write_batches, name="QuickPotatoPayloadWriter", daemon=True)
+            self._thread.start()
+
+    def _write_batches(self):
+        """
+        Collects samples until the batch is full, the flush interval has passed
+        or a flush is requested and writes them in bulk.
+        """
+        while True:
+            batch = [self._queue.get()]
+            deadline = monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                try:
+                    # Waiting in short slices so a flush request does not wait out the whole interval
+                    batch.append(self._queue.get(timeout=min(max(deadline - monotonic(), 0), self.POLL_INTERVAL)))
+
+                except Empty:
+                    if self._pending_flushes > 0 or monotonic() >= deadline:
+                        break
+
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch):
+        """
+        Merges the payloads per database and inserts them with one transaction per database.
+
+        :param batch: A list of (database name, payload) tuples.
+        """
+        payloads = {}
+        for database_name, payload in batch:
+            merged_payload = payloads.setdefault(database_name, {})
+            for table_name, rows in payload.items():
+                merged_payload.setdefault(table_name, []).extend(rows)
+
+        for database_name, payload in payloads.items():
+            try:
+                self.insert_payload_in_bulk(database=database_name, payload=payload)
+
+            except Exception as exception:
+                # The writer thread has to survive a failing database, the failure is raised by the next flush
+                with self._counters_lock:
+                    self.failed_batches += 1
+                    self._unreported_failures += 1
+                    self.last_exception = exception
+
+
+payload_writer = PayloadWriter()
+atexit.register(payload_writer.flush)
@@ -1,4 +1,5 @@
-from QuickPotato.statistical.data import RawData
+from QuickPotato.statistical.data import RawData, TestSummary, AllocationData
+from functools import partial
 
 
 class Metrics(object):
@@ -27,8 +28,47 @@ class Metrics(object):
         self.metric_percentile_85th = None
         self.metric_percentile_90th = None
         self.metric_percentile_95th = None
+        self.metric_peak_memory = None
+        self.metric_allocated_memory = None
 
-    def _collect_measurements(self, test_id, database_name):
+    def _collect_measurements(self, summary):
+        """
+
+        Parameters
+        ----------
+        summary
+            The test summary the metrics are read from.
+
+        Returns
+        -------
+
+        """
+
+        self.metric_average = summary.average_response_time
+        self.metric_allowed_max_outlier = summary.maximum_outlier_in_response_times
+        self.metric_allowed_min_outlier = summary.minimum_outlier_in_response_times
+        self.metric_percentile_5th = partial(summary.percentile, 5)
+        self.metric_percentile_10th = partial(summary.percentile, 10)
+        self.metric_percentile_15th = partial(summary.percentile, 15)
+        self.metric_percentile_20th = partial(summary.percentile, 20)
+        self.metric_percentile_25th = partial(summary.percentile, 25)
+        self.metric_percentile_30th = partial(summary.percentile, 30)
+        self.metric_percentile_35th = partial(summary.percentile, 35)
+        self.metric_percentile_40th = partial(summary.percentile, 40)
+        self.metric_percentile_45th = partial(summary.percentile, 45)
+        self.metric_percentile_50th = partial(summary.percentile, 50)
+        self.metric_percentile_55th = partial(summary.percentile, 55)
+        self.metric_percentile_60th = partial(summary.percentile, 60)
+        self.metric_percentile_65th = partial(summary.percentile, 65)
+        self.metric_percentile_70th = partial(summary.percentile, 70)
+        self.metric_percentile_75th = partial(summary.percentile, 75)
+        self.metric_percentile_80th = partial(summary.percentile, 80)
+        self.metric_percentile_85th = partial(summary.percentile, 85)
+        self.metric_percentile_90th = partial(summary.percentile, 90)
+        self.metric_percentile_95th = partial(summary.percentile, 95)
+        return True
+
+    def _collect_memory_measurements(self, test_id, database_name):
         """
 
         Parameters
@@ -40,29 +80,9 @@ class Metrics(object):
         -------
 
         """
-        raw_data = RawData(test_id, database_name)
-        self.metric_average = raw_data.average_response_time
-        self.metric_allowed_max_outlier = raw_data.maximum_outlier_in_response_times
-        self.metric_allowed_min_outlier = raw_data.minimum_outlier_in_response_times
-        self.metric_percentile_5th = raw_data.percentile_5th
-        self.metric_percentile_10th = raw_data.percentile_10th
-        self.metric_percentile_15th = raw_data.percentile_15th
-        self.metric_percentile_20th = raw_data.percentile_20th
-        self.metric_percentile_25th = raw_data.percentile_25th
-        self.metric_percentile_30th = raw_data.percentile_30th
-        self.metric_percentile_35th = raw_data.percentile_35th
-        self.metric_percentile_40th = raw_data.percentile_40th
-        self.metric_percentile_45th = raw_data.percentile_45th
-        self.metric_percentile_50th = raw_data.percentile_50th
-        self.metric_percentile_55th = raw_data.percentile_55th
-        self.metric_percentile_60th = raw_data.percentile_60th
-        self.metric_percentile_65th = raw_data.percentile_65th
-        self.metric_percentile_70th = raw_data.percentile_70th
-        self.metric_percentile_75th = raw_data.percentile_75th
-        self.metric_percentile_80th = raw_data.percentile_80th
-        self.metric_percentile_85th = raw_data.percentile_85th
-        self.metric_percentile_90th = raw_data.percentile_90th
-        self.metric_percentile_95th = raw_data.percentile_95th
+        allocation_data = AllocationData(test_id, database_name)
+        self.metric_peak_memory = allocation_data.maximum_peak_memory
+        self.metric_allocated_memory = allocation_data.average_allocated_memory
         return True
 
     @property
@@ -92,3 +112,10 @@ class Metrics(object):
             "metric_percentile_95th": self.metric_percentile_95th,
 
         }
+
+    @property
+    def memory_measurements(self):
+        return {
+            "metric_peak_memory": self.metric_peak_memory,
+            "metric_allocated_memory": self.metric_allocated_memory,
+        }
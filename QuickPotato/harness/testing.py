@@ -6,11 +6,15 @@ from QuickPotato.statistical.hypothesis_tests import TTest
 from QuickPotato.harness.measurements import Metrics
 from QuickPotato.database.queries import Crud
 from QuickPotato.harness.results import TestReport
-from QuickPotato.harness.measurements import RawData
+from QuickPotato.harness.measurements import RawData, TestSummary
 from QuickPotato.profiling.instrumentation import Profiler
 from QuickPotato.profiling.interpreters import StatisticsInterpreter
+from QuickPotato.database.writer import payload_writer
+from QuickPotato.database.aggregator import statistics_aggregator
 from datetime import datetime
-from multiprocessing import Process
+from functools import partial
+from multiprocessing import Pool
+import numpy as np
 import string
 import random
 import time
@@ -18,6 +22,8 @@ import time
 
 class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
 
+    WIND_UP_WINDOW = 10
+
     def __init__(self):
 
         Crud.__init__(self)
@@ -31,6 +37,7 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
 
         self._test_case_name = default_test_case_name
         self._no_test_case_mode = True
+        self._benchmark_summaries = {}
         self.enable_untested_or_failed_test_selection = False
 
     @property
@@ -42,6 +49,7 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         -------
             A raw data object that contains all benchmark measurements.
         """
+        payload_writer.flush()
         return RawData(test_id=self.current_test_id, database_name=self._test_case_name)
 
     @property
@@ -53,6 +61,7 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         -------
             A raw data object that contains all baseline measurements.
         """
+        payload_writer.flush()
         return RawData(test_id=self.previous_test_id, database_name=self._test_case_name)
 
     @property
@@ -99,11 +108,15 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         self._test_case_name = value
 
     def verify_benchmark_against_set_boundaries(self):
+        payload_writer.flush()
+        statistics_aggregator.flush(database_name=self._test_case_name, test_id=self.current_test_id)
         results = self._check_breach_benchmark_defined_boundaries()
         self._save_results_to_test_report(boundaries_breached=results)
         return results
 
     def verify_benchmark_against_previous_baseline(self):
+        payload_writer.flush()
+        statistics_aggregator.flush(database_name=self._test_case_name, test_id=self.current_test_id)
         results = self._check_difference_between_baseline_benchmark()
         self._save_results_to_test_report(regression_found=results)
         return results
@@ -122,13 +135,50 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
             StatisticsInterpreter(
                 performance_statistics=pf.performance_statistics,
                 total_response_time=pf.total_response_time,
+                measurements=pf.measurements,
+                system_resources=pf.system_resources,
+                allocations=pf.allocations,
+                allocation_sites=pf.allocation_sites,
                 database_name=self.test_case_name,
                 test_id=self.current_test_id,
-                method_name=method.__name__,
+                method_name=Profiler.function_key(method)[2],
                 sample_id=sample_id
             )
 
-    def measure_method_performance(self, method, arguments=None, iteration=1, pacing=0, processes=0, wind_up=0):
+    @classmethod
+    def _wind_up_code_under_test(cls, method, arguments=None, wind_up=0, automatic_wind_up=False,
+                                 wind_up_variation=0.05, maximum_wind_up=100):
+        """
+        Executes the method under test without recording its measurements, so cold caches,
+        import costs and lazy initialisation do not end up in the performance statistics.
+
+        :param method: The method under test
+        :param arguments: The arguments of the method under test
+        :param wind_up: The fixed number of unrecorded iterations.
+        :param automatic_wind_up: Keep on winding up until the coefficient of variation of the
+                                  last WIND_UP_WINDOW response times drops below wind_up_variation.
+        :param wind_up_variation: The coefficient of variation at which the response times are settled.
+        :param maximum_wind_up: The maximum number of automatic wind up iterations.
+        :return: The number of executed wind up iterations.
+        """
+        arguments = [] if arguments is None else arguments
+        response_times = []
+        number_of_iterations = 0
+        while number_of_iterations < wind_up or (automatic_wind_up and number_of_iterations < wind_up + maximum_wind_up):
+            pf = Profiler(mode="timing")
+            pf.profile_method_under_test(method, *arguments)
+            response_times.append(pf.total_response_time)
+            number_of_iterations += 1
+
+            if number_of_iterations >= wind_up and automatic_wind_up and len(response_times) >= cls.WIND_UP_WINDOW:
+                window = np.array(response_times[-cls.WIND_UP_WINDOW:])
+                if np.mean(window) > 0 and np.std(window) / np.mean(window) <= wind_up_variation:
+                    break
+
+        return number_of_iterations
+
+    def measure_method_performance(self, method, arguments=None, iteration=1, pacing=0, processes=0, wind_up=0,
+                                   automatic_wind_up=False, wind_up_variation=0.05, maximum_wind_up=100):
         """
 
         :param method:
@@ -136,30 +186,80 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         :param iteration:
         :param pacing:
         :param processes:
-        :param wind_up:
+        :param wind_up: The number of unrecorded iterations that are executed before the measurements start.
+        :param automatic_wind_up: Keep on winding up until the response times have settled.
+        :param wind_up_variation: The coefficient of variation at which the response times have settled.
+        :param maximum_wind_up: The maximum number of automatic wind up iterations.
         :return:
         """
-        if __name__ == "__main__" and processes > 0:
-            for _ in range(0, processes):
-                Process(
-                    name=f"worker-{_}",
-                    target=self._execute_code_under_test,
-                    kwargs={
-                        "method": method,
-                        "arguments": arguments,
-                        "iteration": iteration,
-                        "pacing": pacing
-                    }
-                ).start()
+        arguments = [] if arguments is None else arguments
+        wind_up_settings = {
+            "wind_up": wind_up,
+            "automatic_wind_up": automatic_wind_up,
+            "wind_up_variation": wind_up_variation,
+            "maximum_wind_up": maximum_wind_up
+        }
+
+        if processes > 0:
+            self._execute_code_under_test_in_processes(method, arguments, iteration, pacing, processes,
+                                                       wind_up_settings)
 
         else:
+            self._wind_up_code_under_test(method, arguments, **wind_up_settings)
             self._execute_code_under_test(
-                method,
-                arguments,
-                iteration,
-                pacing,
+                method=method,
+                arguments=arguments,
+                iteration=iteration,
+                pacing=pacing
             )
 
+    def _execute_code_under_test_in_processes(self, method, arguments, iteration, pacing, processes,
+                                              wind_up_settings=None):
+        """
+        Spreads the iterations over a pool of worker processes and blocks until all of them are done.
+        The workers wind up and profile, the samples of every worker are inserted in bulk by this process
+        as soon as that worker is done.
+        The method under test and its arguments need to be picklable (e.g. a module level function).
+
+        :param method: The method under test
+        :param arguments: The arguments of the method under test
+        :param iteration: The total number of iterations
+        :param pacing: The seconds every worker waits before each iteration
+        :param processes: The number of worker processes
+        :param wind_up_settings: The wind up parameters every worker winds up with.
+        """
+        iterations_per_worker, remainder = divmod(iteration, processes)
+        workload = [
+            iterations_per_worker + (1 if worker < remainder else 0)
+            for worker in range(0, processes)
+        ]
+        # Calibrate once before the workers start, otherwise every worker calibrates and rewrites the options
+        profiler = Profiler()
+        overhead = profiler.overhead if profiler.mode == "deterministic" and \
+            options.enable_profiler_overhead_correction else None
+
+        worker = partial(_profile_code_under_test, method, arguments, pacing=pacing,
+                         wind_up_settings=wind_up_settings, overhead=overhead)
+
+        with Pool(processes=processes) as pool:
+            for samples in pool.imap_unordered(worker, [work for work in workload if work > 0]):
+                payload = {}
+                for sample in samples:
+                    interpreter = StatisticsInterpreter(
+                        database_name=self.test_case_name,
+                        test_id=self.current_test_id,
+                        method_name=Profiler.function_key(method)[2],
+                        deliver_payload=False,
+                        **sample
+                    )
+                    for table_name, rows in interpreter.payload.items():
+                        payload.setdefault(table_name, []).extend(rows)
+
+                self.insert_payload_in_bulk(database=self.test_case_name, payload=payload)
+
+            pool.close()
+            pool.join()
+
     @staticmethod
     def _generate_random_test_id():
         return ''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
@@ -175,9 +275,12 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         """
         self.spawn_result_database(database_name)
         self.spawn_performance_statistics_schema(database_name)
+        self.spawn_system_resource_statistics_schema(database_name)
+        self.spawn_memory_allocation_schemas(database_name)
         self.spawn_test_report_schema(database_name)
         self.spawn_boundaries_test_evidence_schema(database_name)
         self.spawn_regression_test_evidence_schema(database_name)
+        self.spawn_test_summary_schema(database_name)
         self.enforce_test_result_retention_policy(database_name)
 
     def _reset_performance_test(self, database_name):
@@ -189,12 +292,44 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
         database_name
             The name of the database also known as the test case name
         """
+        if self.current_test_id is not None:
+            # The aggregate of the test that has ended is complete
+            statistics_aggregator.flush(database_name=self._test_case_name, test_id=self.current_test_id)
+
         if self.enable_untested_or_failed_test_selection is False:
             self.previous_test_id = str(self.select_previous_passed_test_id(database_name))
         else:
             self.previous_test_id = str(self.select_previous_test_id(database_name))
 
         self.current_test_id = self._generate_random_test_id()
+        self._benchmark_summaries = {}
+
+    def _collect_benchmark_summary(self, metric):
+        """
+        Summarizes the benchmark once, the boundary check and the regression check of the same test id
+        share the summary for as long as no samples have been added to the benchmark.
+
+        Parameters
+        ----------
+        metric
+            The per sample measurement that is summarized.
+
+        Returns
+        -------
+            The test summary of the current test id.
+        """
+        summary = self._benchmark_summaries.get(metric)
+        if summary is None or summary.number_of_samples != self.select_number_of_samples(
+                self._test_case_name, self.current_test_id, metric):
+            summary = TestSummary.collect(
+                test_id=self.current_test_id,
+                database_name=self._test_case_name,
+                metric=metric,
+                refresh=True
+            )
+            self._benchmark_summaries[metric] = summary
+
+        return summary
 
     def _inspect_benchmark_and_baseline(self):
         """
@@ -273,7 +408,7 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
             True if the test passes and False if it False
         """
         results = []
-        self._collect_measurements(test_id=self.current_test_id, database_name=self._test_case_name)
+        self._collect_measurements(summary=self._collect_benchmark_summary(self.boundary_metric))
         for boundary_key, measurements_key in zip(self.boundary_policy, self.threshold_measurements):
             if self.boundary_policy[boundary_key]["max"] is not None:
                 results.append(
@@ -293,8 +428,49 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
                         boundary=self.boundary_policy[boundary_key]["min"],
                         value=self.threshold_measurements[measurements_key]())
                 )
+        results += self._check_breach_benchmark_defined_memory_boundaries()
         return self._inspect_test_results(results)
 
+    def _check_breach_benchmark_defined_memory_boundaries(self):
+        """
+        Validates the memory allocations of the benchmark against the memory boundaries.
+        The allocations are only collected when at least one memory boundary has been set.
+
+        Returns
+        -------
+            A list with the outcome of every performed check.
+        """
+        results = []
+        if all(boundary["max"] is None and boundary["min"] is None for boundary in self.memory_boundary_policy.values()):
+            return results
+
+        self._collect_memory_measurements(test_id=self.current_test_id, database_name=self._test_case_name)
+        if self.memory_measurements["metric_peak_memory"]() is None:
+            if self.silence_warning_messages is False:
+                print("Warning no allocations have been traced so no memory boundaries are tested")
+            return results
+
+        for boundary_key, measurements_key in zip(self.memory_boundary_policy, self.memory_measurements):
+            if self.memory_boundary_policy[boundary_key]["max"] is not None:
+                results.append(
+                    check_max_boundary_of_measurement(
+                        test_id=self.current_test_id,
+                        test_case_name=self._test_case_name,
+                        validation_name="validate_max_boundary_for_" + measurements_key,
+                        boundary=self.memory_boundary_policy[boundary_key]["max"],
+                        value=self.memory_measurements[measurements_key]())
+                )
+            if self.memory_boundary_policy[boundary_key]["min"] is not None:
+                results.append(
+                    check_min_boundary_of_measurement(
+                        test_id=self.current_test_id,
+                        test_case_name=self._test_case_name,
+                        validation_name="validate_min_boundary_for_" + measurements_key,
+                        boundary=self.memory_boundary_policy[boundary_key]["min"],
+                        value=self.memory_measurements[measurements_key]())
+                )
+        return results
+
     def _check_difference_between_baseline_benchmark(self):
         """
         Will test the benchmark against the baseline.
@@ -316,8 +492,12 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
                 t_test = TTest(
                     test_id=self.current_test_id,
                     test_case_name=self._test_case_name,
-                    baseline_measurements=self.baseline_measurements.response_times(),
-                    benchmark_measurements=self.benchmark_measurements.response_times()
+                    baseline_measurements=TestSummary.collect(
+                        test_id=self.previous_test_id,
+                        database_name=self._test_case_name,
+                        metric=self.regression_metric
+                    ),
+                    benchmark_measurements=self._collect_benchmark_summary(self.regression_metric)
                 )
                 results.append(t_test.results)
 
@@ -327,3 +507,36 @@ class PerformanceTest(Crud, Boundaries, Metrics, RegressionSettings):
             if self.silence_warning_messages is False:
                 print("Warning no baseline found so no regression test performed")
             return True
+
+
+def _profile_code_under_test(method, arguments, iteration, pacing, wind_up_settings=None, overhead=None):
+    """
+    Profiles the method under test inside a worker process without touching the database.
+    Every worker winds up first, the caches of the parent process are not shared with it.
+
+    :param method: The method under test
+    :param arguments: The arguments of the method under test
+    :param iteration: The number of iterations this worker executes
+    :param pacing: The seconds to wait before each iteration
+    :param wind_up_settings: The keyword arguments of PerformanceTest._wind_up_code_under_test.
+    :param overhead: The profiler overhead that has been calibrated by the parent process.
+    :return: A list with the profiled samples
+    """
+    PerformanceTest._wind_up_code_under_test(method, arguments, **(wind_up_settings or {}))
+
+    samples = []
+    for _ in range(0, iteration):
+        time.sleep(pacing)
+        pf = Profiler(overhead=overhead)
+        pf.profile_method_under_test(method, *arguments)
+        samples.append({
+            "sample_id": ''.join(random.choices(string.ascii_uppercase + string.digits, k=8)),
+            "performance_statistics": pf.performance_statistics,
+            "total_response_time": pf.total_response_time,
+            "measurements": pf.measurements,
+            "system_resources": pf.system_resources,
+            "allocations": pf.allocations,
+            "allocation_sites": pf.allocation_sites
+        })
+
+    return samples
@@ -0,0 +1,121 @@
+from QuickPotato.configuration.management import options
+from time import perf_counter
+import cProfile
+import pstats
+
+
+def _calibration_target():
+    pass
+
+
+def _calibration_loop(iterations):
+    for _ in range(iterations):
+        _calibration_target()
+
+
+def _empty_loop(iterations):
+    for _ in range(iterations):
+        pass
+
+
+def _measure(function, iterations):
+    start_time = perf_counter()
+    function(iterations)
+    return perf_counter() - start_time
+
+
+def calibrate_profiler_overhead(iterations=100000, rounds=3):
+    """
+    Measures how much time cProfile adds to the statistics of every profiled call
+    on the current machine, in the spirit of `profile.Profile.calibrate`.
+
+    cProfile charges part of the overhead of a call to the caller's own time and the
+    rest to the callee's own time, so both parts are measured separately.
+    The result is cached in the options, so the calibration only runs once per machine.
+
+    :param iterations: The number of calls that are profiled in one calibration round.
+    :param rounds: The number of calibration rounds, the lowest overhead is kept.
+    :return: A dictionary with the overhead in seconds per call charged to the "caller" and the "callee".
+    """
+    caller_overheads = []
+    callee_overheads = []
+    for _ in range(rounds):
+        loop_time = _measure(_empty_loop, iterations)
+        call_time = _measure(_calibration_loop, iterations) - loop_time
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _calibration_loop(iterations)
+        profiler.disable()
+
+        total_times = {name: tt for (_, _, name), (_, _, tt, _, _) in pstats.Stats(profiler).stats.items()}
+        caller_overheads.append(max(total_times[_calibration_loop.__name__] - loop_time, 0) / iterations)
+        callee_overheads.append(max(total_times[_calibration_target.__name__] - call_time, 0) / iterations)
+
+    overhead = {"caller": min(caller_overheads), "callee": min(callee_overheads)}
+    options.profiler_overhead_per_call = overhead
+    return overhead
+
+
+def correct_profiler_overhead(performance_statistics, overhead):
+    """
+    Subtracts the profiler overhead from the total and cumulative time of every function.
+    The total time loses the callee overhead of the function's own calls and the caller overhead
+    of the calls it made. The cumulative time loses the callee overhead of the function's own calls
+    and the full overhead of all calls that happened underneath it.
+
+    :param performance_statistics: A dictionary with the layout {function: (cc, nc, tt, ct, callers)}
+    :param overhead: A dictionary with the overhead in seconds per call charged to the "caller" and the "callee".
+    :return: The performance statistics with overhead-corrected times.
+    """
+    caller_overhead = overhead["caller"]
+    callee_overhead = overhead["callee"]
+
+    callees = {}
+    for function, (_, _, _, _, callers) in performance_statistics.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[0]))
+
+    nested_calls = {}
+
+    def count_nested_calls(function, in_progress):
+        """
+        Estimates the number of calls underneath a function. A callee that is called from
+        several places contributes its nested calls in proportion to the calls made by this function.
+        """
+        if function in nested_calls:
+            return nested_calls[function]
+
+        if function in in_progress:
+            # Recursive code, the calls of this cycle are already being counted
+            return 0
+
+        in_progress.add(function)
+        number_of_calls = 0
+        for callee, edge_calls in callees.get(function, []):
+            callee_calls = performance_statistics[callee][1]
+            share = edge_calls / callee_calls if callee_calls > 0 else 0
+            number_of_calls += edge_calls + count_nested_calls(callee, in_progress) * share
+
+        in_progress.discard(function)
+        nested_calls[function] = number_of_calls
+        return number_of_calls
+
+    corrected_statistics = {}
+    for function, (cc, nc, tt, ct, callers) in performance_statistics.items():
+        calls_made = sum(edge_calls for _, edge_calls in callees.get(function, []))
+        corrected_total_time = max(tt - callee_overhead * nc - caller_overhead * calls_made, 0.0)
+        corrected_cumulative_time = max(
+            ct - callee_overhead * nc - (caller_overhead + callee_overhead) * count_nested_calls(function, set()),
+            corrected_total_time
+        )
+        # The call edges keep the same share of the corrected times as they had of the measured times
+        corrected_callers = {
+            caller: (edge_nc, edge_cc,
+                     edge_tt * corrected_total_time / tt if tt > 0 else 0.0,
+                     edge_ct * corrected_cumulative_time / ct if ct > 0 else 0.0)
+            for caller, (edge_nc, edge_cc, edge_tt, edge_ct) in callers.items()
+        }
+        corrected_statistics[function] = (cc, nc, corrected_total_time, corrected_cumulative_time, corrected_callers)
+
+    return corrected_statistics
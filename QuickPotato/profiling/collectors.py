@@ -0,0 +1,196 @@
+from time import perf_counter_ns
+import tracemalloc
+import gc
+import os
+import sys
+
+try:
+    import resource
+except ImportError:
+    # The resource module is only available on Unix platforms
+    resource = None
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+QUICK_POTATO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class GarbageCollectionMonitor(object):
+
+    def __init__(self):
+        """
+        Measures how long the garbage collector paused the interpreter and how
+        many collections it ran while the monitor was active.
+        The garbage collector is process wide, so collections triggered by other
+        threads are counted as well.
+        """
+        self.pause_time = 0.0
+        self.collections = 0
+        self._collection_started = None
+
+    def start(self):
+        gc.callbacks.append(self._on_garbage_collection)
+
+    def stop(self):
+        gc.callbacks.remove(self._on_garbage_collection)
+
+    def _on_garbage_collection(self, phase, info):
+        """
+        Called by the garbage collector at the start and end of every collection.
+
+        :param phase: "start" or "stop"
+        :param info: A dictionary with the generation and collected objects.
+        """
+        if phase == "start":
+            self._collection_started = perf_counter_ns()
+
+        elif self._collection_started is not None:
+            self.pause_time += (perf_counter_ns() - self._collection_started) / 1e9
+            self.collections += 1
+            self._collection_started = None
+
+
+class SystemResourceCollector(object):
+
+    PROC_STATM = "/proc/self/statm"
+    PROC_IO = "/proc/self/io"
+
+    def __init__(self):
+        """
+        Snapshots the memory, context switch, page fault and I/O counters of the current
+        process before and after the method under test and stores the differences.
+        Counters that are not available on the current platform are stored as None.
+        """
+        self.measurements = None
+        self._snapshot = None
+
+    def start(self):
+        self._snapshot = self._take_snapshot()
+
+    def stop(self):
+        before, after = self._snapshot, self._take_snapshot()
+        self.measurements = {
+            "resident_memory_delta": self._difference(before, after, "resident_memory"),
+            "peak_resident_memory": after["peak_resident_memory"],
+            "peak_resident_memory_delta": self._difference(before, after, "peak_resident_memory"),
+            "voluntary_context_switches": self._difference(before, after, "voluntary_context_switches"),
+            "involuntary_context_switches": self._difference(before, after, "involuntary_context_switches"),
+            "minor_page_faults": self._difference(before, after, "minor_page_faults"),
+            "major_page_faults": self._difference(before, after, "major_page_faults"),
+            "read_bytes": self._difference(before, after, "read_bytes"),
+            "write_bytes": self._difference(before, after, "write_bytes"),
+        }
+
+    @staticmethod
+    def _difference(before, after, counter):
+        if before[counter] is None or after[counter] is None:
+            return None
+
+        return after[counter] - before[counter]
+
+    def _take_snapshot(self):
+        """
+        :return: A dictionary with the current value of every counter.
+        """
+        snapshot = dict.fromkeys(
+            [
+                "resident_memory", "peak_resident_memory", "voluntary_context_switches",
+                "involuntary_context_switches", "minor_page_faults", "major_page_faults",
+                "read_bytes", "write_bytes"
+            ]
+        )
+
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            # Linux reports the peak resident memory in kilobytes, macOS in bytes
+            snapshot["peak_resident_memory"] = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+            snapshot["voluntary_context_switches"] = usage.ru_nvcsw
+            snapshot["involuntary_context_switches"] = usage.ru_nivcsw
+            snapshot["minor_page_faults"] = usage.ru_minflt
+            snapshot["major_page_faults"] = usage.ru_majflt
+
+        if os.path.isfile(self.PROC_STATM):
+            with open(self.PROC_STATM) as file:
+                snapshot["resident_memory"] = int(file.read().split()[1]) * PAGE_SIZE
+
+        if os.path.isfile(self.PROC_IO):
+            try:
+                with open(self.PROC_IO) as file:
+                    counters = dict(line.split(": ") for line in file.read().splitlines())
+                # Characters passed to read and write system calls, including those served from the page cache
+                snapshot["read_bytes"] = int(counters["rchar"])
+                snapshot["write_bytes"] = int(counters["wchar"])
+
+            except (OSError, KeyError, ValueError):
+                pass
+
+        return snapshot
+
+
+class AllocationTracer(object):
+
+    def __init__(self, number_of_allocation_sites=10):
+        """
+        Traces the memory allocations of the method under test with tracemalloc.
+        Only allocations that are still alive when the method returns can be attributed
+        to an allocation site, the peak also covers memory that was freed in between.
+
+        tracemalloc does not count the bytes that are allocated and freed again, so the allocated memory
+        is the lower bound both measurements give: the growth up to the peak or the surviving allocations.
+
+        :param number_of_allocation_sites: The number of largest allocation sites that are kept.
+        """
+        self.number_of_allocation_sites = number_of_allocation_sites
+        self.measurements = None
+        self.allocation_sites = None
+
+        self._started_tracing = False
+        self._snapshot = None
+        self._traced_memory = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        self._snapshot = self._take_snapshot()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._traced_memory = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        differences = [
+            statistic for statistic in snapshot.compare_to(self._snapshot, "lineno") if statistic.size_diff > 0
+        ]
+        peak_traced_memory = max(peak - self._traced_memory, 0)
+        self.measurements = {
+            "allocated_memory": max(sum(statistic.size_diff for statistic in differences), peak_traced_memory),
+            "peak_traced_memory": peak_traced_memory,
+            "net_memory": current - self._traced_memory,
+        }
+        self.allocation_sites = [
+            {
+                "path": statistic.traceback[0].filename,
+                "line_number": statistic.traceback[0].lineno,
+                "size": statistic.size_diff,
+                "count": statistic.count_diff,
+            }
+            for statistic in differences[:self.number_of_allocation_sites]
+        ]
+        self._snapshot = None
+
+    @staticmethod
+    def _take_snapshot():
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+                # The allocations of the profiler itself are not part of the method under test
+                tracemalloc.Filter(False, os.path.join(QUICK_POTATO_PATH, "*")),
+            ]
+        )
@@ -1,33 +1,282 @@
-from time import time
+from QuickPotato.configuration.management import options
+from QuickPotato.profiling.sampling import stack_sampler
+from QuickPotato.profiling.calibration import calibrate_profiler_overhead, correct_profiler_overhead
+from QuickPotato.profiling.collectors import GarbageCollectionMonitor, SystemResourceCollector, AllocationTracer
+from QuickPotato.utilities.exceptions import ProfilingModeNotSupported
+from threading import get_ident
+from time import perf_counter_ns, process_time_ns, thread_time_ns
 import cProfile
+import inspect
 import pstats
+import sys
 
 
 class Profiler(object):
 
-    def __init__(self):
+    SUPPORTED_MODES = ("deterministic", "sampling", "timing")
+
+    def __init__(self, mode=None, sampling_interval=None, collect_system_resources=None, trace_allocations=None,
+                 overhead=None):
+        """
+        :param mode: "deterministic" traces every call with cProfile, "sampling" periodically
+                     captures the stack of the profiled thread and "timing" only measures the
+                     wall clock and CPU time of the method. Defaults to options.profiling_mode.
+        :param sampling_interval: The seconds between two stack captures when sampling.
+                                  Defaults to options.sampling_profiler_interval.
+        :param collect_system_resources: Snapshot memory, context switches, page faults and I/O around the call.
+                                         Defaults to options.enable_system_resource_collection.
+        :param trace_allocations: Trace the memory allocations of the call with tracemalloc.
+                                  Defaults to options.enable_allocation_profiling.
+        :param overhead: The cProfile overhead per call that is subtracted when overhead correction is enabled.
+                         Defaults to options.profiler_overhead_per_call, which is calibrated on first use.
+        """
+        self.mode = options.profiling_mode if mode is None else mode
+        self.sampling_interval = options.sampling_profiler_interval if sampling_interval is None \
+            else sampling_interval
+
+        self.collect_system_resources = options.enable_system_resource_collection \
+            if collect_system_resources is None else collect_system_resources
+
+        self.trace_allocations = options.enable_allocation_profiling if trace_allocations is None \
+            else trace_allocations
+
+        if self.mode not in self.SUPPORTED_MODES:
+            raise ProfilingModeNotSupported()
 
         self.functional_output = None
         self.total_response_time = None
+        self.total_cpu_time = None
+        self.total_thread_time = None
+        self.gc_pause_time = None
+        self.gc_collections = None
+        self.system_resources = None
+        self.allocations = None
+        self.allocation_sites = None
         self.performance_statistics = None
 
-    def profile_method_under_test(self, method, *args, **kwargs):
+        self._overhead = overhead
+        self._clocks = None
+        self._gc_monitor = None
+        self._resource_collector = None
+        self._allocation_tracer = None
+
+    @property
+    def measurements(self):
         """
+        The per sample measurements that are stored next to the performance statistics.
 
         Returns
         -------
+            A dictionary with the measurement names as keys.
+        """
+        return {
+            "total_cpu_time": self.total_cpu_time,
+            "total_thread_time": self.total_thread_time,
+            "gc_pause_time": self.gc_pause_time,
+            "gc_collections": self.gc_collections
+        }
 
+    def profile_method_under_test(self, method, *args, **kwargs):
+        """
+        Executes the method under test with the selected profiler and stores
+        its output, response time and performance statistics on this object.
+
+        Parameters
+        ----------
+        method
+            The method that needs to be profiled
+        args
+            The arguments of the method under test
+        kwargs
+            The key word arguments of the method under test
+        """
+        if self.mode == "sampling":
+            self._profile_with_stack_sampler(method, *args, **kwargs)
+
+        elif self.mode == "timing":
+            self._profile_with_timer(method, *args, **kwargs)
+
+        else:
+            self._profile_with_cprofile(method, *args, **kwargs)
+
+    def _profile_with_cprofile(self, method, *args, **kwargs):
+        """
+        Traces every function call of the method under test with cProfile.
         """
         # Initializing the Profiler, ProfileResults and creating the results
         profiler = cProfile.Profile()
 
         # Start Profiling the method
-        start_time = time()
+        self._start_clocks()
         profiler.enable()
-        self.functional_output = method(*args, **kwargs)
-        profiler.disable()
-        end_time = time()
-        self.total_response_time = end_time - start_time
+        try:
+            self.functional_output = method(*args, **kwargs)
+        finally:
+            profiler.disable()
+            self._stop_clocks()
 
         # Dump performance statistical
-        self.performance_statistics = pstats.Stats(profiler).stats
+        self.performance_statistics = self._remove_profiler_functions(pstats.Stats(profiler).stats, method)
+
+        if options.enable_profiler_overhead_correction:
+            self.performance_statistics = correct_profiler_overhead(self.performance_statistics, self.overhead)
+
+    def _remove_profiler_functions(self, performance_statistics, method):
+        """
+        The profilers also see the garbage collection callback and the decorators around the method under test,
+        which are not part of the method under test. Removes them and the functions that were only called by them
+        from the statistics, so the unwrapped method under test is the root of the call graph.
+        """
+        root = self.function_key(method)
+        removed_functions = {self.function_key(GarbageCollectionMonitor._on_garbage_collection)}
+
+        wrapper = method
+        while hasattr(wrapper, "__wrapped__"):
+            code = getattr(wrapper, "__code__", None)
+            if code is not None:
+                removed_functions.add((code.co_filename, code.co_firstlineno, code.co_name))
+            wrapper = wrapper.__wrapped__
+
+        removed_functions.discard(root)
+        if removed_functions.isdisjoint(performance_statistics):
+            return performance_statistics
+
+        cleaned_statistics = {}
+        for function, (cc, nc, tt, ct, callers) in performance_statistics.items():
+            if function in removed_functions:
+                continue
+
+            elif removed_functions.isdisjoint(callers) is False:
+                callers = {caller: edge for caller, edge in callers.items() if caller not in removed_functions}
+                if len(callers) == 0 and function != root:
+                    continue
+
+            cleaned_statistics[function] = (cc, nc, tt, ct, callers)
+
+        return cleaned_statistics
+
+    @property
+    def overhead(self):
+        """
+        The overhead cProfile adds per call on this machine, calibrated on first use.
+
+        Returns
+        -------
+            A dictionary with the overhead in seconds per call charged to the "caller" and the "callee".
+        """
+        if self._overhead is not None:
+            return self._overhead
+
+        elif options.profiler_overhead_per_call is None:
+            return calibrate_profiler_overhead()
+
+        return options.profiler_overhead_per_call
+
+    def _profile_with_stack_sampler(self, method, *args, **kwargs):
+        """
+        Periodically captures the stack of the current thread from the background sampler thread
+        while the method under test is running.
+        """
+        # Start Profiling the method
+        self._start_clocks()
+        session = stack_sampler.start_session(
+            thread_id=get_ident(), anchor=sys._getframe(), interval=self.sampling_interval
+        )
+        try:
+            self.functional_output = method(*args, **kwargs)
+        finally:
+            stack_sampler.stop_session(session)
+            self._stop_clocks()
+
+        # Dump performance statistical
+        self.performance_statistics = self._remove_profiler_functions(
+            session.statistics(root=self.function_key(method), total_response_time=self.total_response_time), method
+        )
+
+    def _profile_with_timer(self, method, *args, **kwargs):
+        """
+        Only measures the wall clock and CPU time of the method under test.
+        The performance statistics contain a single entry for the method itself,
+        which results in one compact row per sample.
+        """
+        self._start_clocks()
+        try:
+            self.functional_output = method(*args, **kwargs)
+        finally:
+            self._stop_clocks()
+        self.discard_call_graph(method)
+
+    def discard_call_graph(self, method):
+        """
+        Replaces the collected performance statistics with a single entry for the method under test.
+        The statistics interpreter turns this into one compact row that still holds the response time.
+
+        Parameters
+        ----------
+        method
+            The method that has been profiled
+        """
+        self.performance_statistics = {
+            self.function_key(method): (1, 1, self.total_response_time, self.total_response_time, {})
+        }
+
+    def _start_clocks(self):
+        """
+        Starts the garbage collection monitor and reads the wall clock, process and thread CPU clocks.
+        """
+        if self.collect_system_resources:
+            self._resource_collector = SystemResourceCollector()
+            self._resource_collector.start()
+
+        if self.trace_allocations:
+            self._allocation_tracer = AllocationTracer(options.number_of_allocation_sites)
+            self._allocation_tracer.start()
+
+        self._gc_monitor = GarbageCollectionMonitor()
+        self._gc_monitor.start()
+        self._clocks = perf_counter_ns(), process_time_ns(), thread_time_ns()
+
+    def _stop_clocks(self):
+        """
+        Reads the clocks again and converts the elapsed nanoseconds into seconds.
+        """
+        end_time, end_cpu_time, end_thread_time = perf_counter_ns(), process_time_ns(), thread_time_ns()
+        self._gc_monitor.stop()
+
+        start_time, start_cpu_time, start_thread_time = self._clocks
+        self.total_response_time = (end_time - start_time) / 1e9
+        self.total_cpu_time = (end_cpu_time - start_cpu_time) / 1e9
+        self.total_thread_time = (end_thread_time - start_thread_time) / 1e9
+        self.gc_pause_time = self._gc_monitor.pause_time
+        self.gc_collections = self._gc_monitor.collections
+
+        if self._allocation_tracer is not None:
+            self._allocation_tracer.stop()
+            self.allocations = self._allocation_tracer.measurements
+            self.allocation_sites = self._allocation_tracer.allocation_sites
+
+        if self._resource_collector is not None:
+            self._resource_collector.stop()
+            self.system_resources = self._resource_collector.measurements
+
+    @staticmethod
+    def function_key(method):
+        """
+        Creates the same (path, line number, function name) key cProfile uses for a function.
+        Decorated methods are unwrapped first, so the key belongs to the decorated function itself.
+
+        Parameters
+        ----------
+        method
+            A function or method
+
+        Returns
+        -------
+            A tuple that identifies the function in the performance statistics.
+        """
+        method = inspect.unwrap(method)
+        code = getattr(method, "__code__", None)
+        if code is None:
+            return "~", 0, method.__name__
+
+        return code.co_filename, code.co_firstlineno, code.co_name
@@ -1,16 +1,34 @@
 from QuickPotato.database.queries import Crud
 from QuickPotato.configuration.management import options
+from QuickPotato.database.writer import payload_writer
+from QuickPotato.database.aggregator import statistics_aggregator
+from QuickPotato.utilities.exceptions import StorageModeNotSupported
+from sqlalchemy.exc import IntegrityError
+from threading import Lock
+from weakref import WeakKeyDictionary
 from datetime import datetime
-import asyncio
 
 
 class StatisticsInterpreter(Crud):
 
-    def __init__(self, database_name, performance_statistics, total_response_time, method_name, sample_id, test_id):
+    SUPPORTED_STORAGE_MODES = ("samples", "aggregate")
+    FUNCTION_INTERNING_ATTEMPTS = 5
+
+    # The function ids that this process has interned per engine, a deleted or forked database gets a new engine
+    _function_ids = WeakKeyDictionary()
+    _function_ids_lock = Lock()
+
+    def __init__(self, database_name, performance_statistics, total_response_time, method_name, sample_id, test_id,
+                 measurements=None, system_resources=None, allocations=None, allocation_sites=None,
+                 deliver_payload=True):
         super(StatisticsInterpreter, self).__init__()
 
         self.performance_statistics = performance_statistics
         self.total_response_time = total_response_time
+        self.measurements = {} if measurements is None else measurements
+        self.system_resources = system_resources
+        self.allocations = allocations
+        self.allocation_sites = allocation_sites
         self.using_server_less_database = bool(self._validate_connection_url(database_name)[0:6] == "sqlite")
 
         self.database_name = database_name
@@ -20,8 +38,20 @@ class StatisticsInterpreter(Crud):
 
         self.epoch_timestamp = datetime.now().timestamp()
         self.human_timestamp = datetime.now()
+        self.storage_mode = options.storage_mode
+
+        if self.storage_mode not in self.SUPPORTED_STORAGE_MODES:
+            raise StorageModeNotSupported()
+
+        elif self.storage_mode == "aggregate":
+            # Only the sample itself is stored, its call graph is merged into the aggregate of the test
+            statistics_aggregator.merge(self.database_name, self.test_id, self.iterate_through_profiled_stack())
 
-        if options.enable_asynchronous_payload_delivery:
+        if deliver_payload is False:
+            # The caller collects the payload of many samples and inserts them in bulk
+            pass
+
+        elif options.enable_asynchronous_payload_delivery:
             self.upload_payload_to_database_async()
 
         else:
@@ -29,13 +59,14 @@ class StatisticsInterpreter(Crud):
 
     def upload_payload_to_database_async(self):
         """
+        Hands the payload over to the background writer, which inserts it
+        in bulk together with the payload of other samples.
+
         Returns
         -------
 
         """
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(executor=None, func=self.send_payload_to_database)
+        payload_writer.deliver(database_name=self.database_name, payload=self.payload)
 
     def upload_payload_to_database_sync(self):
         """
@@ -49,69 +80,129 @@ class StatisticsInterpreter(Crud):
         """
         :return:
         """
-        payload = []
-        for row in self.iterate_through_profiled_stack():
-            # Dividing payload into multiple inserts to work around server-less variable restrictions
-            if self.using_server_less_database is True and len(payload) == 999:
-                # Sending and nuking payload variable when exceeding SQLite's max amount of variables.
-                self.insert_performance_statistics(payload=payload, database=self.database_name)
-                payload = []
-            payload.append(row)
-
-        # Inserting full payload into server-based database or sending left-overs to sever-less database
-        self.insert_performance_statistics(payload=payload, database=self.database_name)
+        self.insert_payload_in_bulk(database=self.database_name, payload=self.payload)
+
+    @property
+    def payload(self):
+        """
+        All rows of this sample grouped by the table they belong in.
+
+        Returns
+        -------
+            A dictionary with the table name as key and a list of rows as value.
+        """
+        payload = {
+            "samples": [{
+                "test_id": self.test_id,
+                "test_case_name": self.database_name,
+                "sample_id": self.sample_id,
+                "name_of_method_under_test": self.method_name,
+                "epoch_timestamp": self.epoch_timestamp,
+                "human_timestamp": self.human_timestamp,
+                "total_response_time": self.total_response_time,
+                **self.measurements
+            }],
+            "performance_statistics": [],
+            "system_resource_statistics": [],
+            "memory_allocation_statistics": [],
+            "memory_allocation_sites": []
+        }
+
+        if self.storage_mode == "samples":
+            payload["performance_statistics"].extend(self.iterate_through_profiled_stack())
+
+        if self.system_resources is not None:
+            payload["system_resource_statistics"].append({
+                "test_id": self.test_id,
+                "test_case_name": self.database_name,
+                "sample_id": self.sample_id,
+                "epoch_timestamp": self.epoch_timestamp,
+                **self.system_resources
+            })
+
+        if self.allocations is not None:
+            payload["memory_allocation_statistics"].append({
+                "test_id": self.test_id,
+                "test_case_name": self.database_name,
+                "sample_id": self.sample_id,
+                "epoch_timestamp": self.epoch_timestamp,
+                **self.allocations
+            })
+            payload["memory_allocation_sites"].extend(
+                {"test_id": self.test_id, "sample_id": self.sample_id, **site} for site in self.allocation_sites
+            )
+
+        return payload
+
+    def intern_functions(self):
+        """
+        Resolves the id of every function in the profiled stack. Functions this process has seen before
+        are resolved from memory, only a new function costs a round trip to the database.
+        This happens on the thread of the profiled method, also when the payload is delivered
+        asynchronously, so the first call that profiles a new function waits on the database.
+
+        :return: A dictionary with a (path, line number, function name) tuple as key and the function id as value.
+        :raises IntegrityError: When the functions still conflict after FUNCTION_INTERNING_ATTEMPTS inserts.
+        """
+        functions = set()
+        for function, (_, _, _, _, callers) in self.performance_statistics.items():
+            functions.add(tuple(function))
+            functions.update(tuple(caller) for caller in callers)
+
+        engine = self.spawn_engine(self.database_name)
+        with self._function_ids_lock:
+            function_ids = self._function_ids.setdefault(engine, {})
+            if functions.issubset(function_ids):
+                return function_ids
+
+            function_ids.update(self.select_function_ids(self.database_name))
+            missing_functions = [function for function in functions if function not in function_ids]
+            failed_attempts = 0
+            while len(missing_functions) > 0:
+                try:
+                    self.insert_functions(self.database_name, missing_functions)
+
+                except IntegrityError:
+                    # Another process interned some of these functions first, the others are inserted again
+                    failed_attempts += 1
+                    if failed_attempts >= self.FUNCTION_INTERNING_ATTEMPTS:
+                        raise
+
+                function_ids.update(self.select_function_ids(self.database_name))
+                missing_functions = [function for function in missing_functions if function not in function_ids]
+            return function_ids
 
     def iterate_through_profiled_stack(self):
         """
 
         :return:
         """
+        function_ids = self.intern_functions()
         for function, (cc, nc, tt, ct, callers) in self.performance_statistics.items():
 
-            child_path = function[0]
-            child_line_number = function[1]
-            child_function_name = function[2]
-
             if len(callers) == 0 and str(function[2]) == self.method_name:
                 yield {
                     "test_id": self.test_id,
                     "sample_id": self.sample_id,
-                    "test_case_name": self.database_name,
-                    "name_of_method_under_test": self.method_name,
-                    "epoch_timestamp": self.epoch_timestamp,
-                    "human_timestamp": self.human_timestamp,
-                    "child_path": child_path,
-                    "child_line_number": child_line_number,
-                    "child_function_name": child_function_name,
-                    "parent_path": "~",
-                    "parent_line_number": 0,
-                    "parent_function_name": self.sample_id,
+                    "child_function_id": function_ids[tuple(function)],
+                    "parent_function_id": None,
                     "number_of_calls": nc,
                     "total_time": tt,
-                    "cumulative_time": ct,
-                    "total_response_time": self.total_response_time
+                    "cumulative_time": ct
                 }
 
             elif len(callers) == 0:
                 continue
 
             else:
-                for row in callers:
+                # Every call edge carries its own share of the calls and time of the function
+                for row, (edge_nc, edge_cc, edge_tt, edge_ct) in callers.items():
                     yield {
                         "test_id": self.test_id,
                         "sample_id": self.sample_id,
-                        "test_case_name": self.database_name,
-                        "name_of_method_under_test": self.method_name,
-                        "epoch_timestamp": self.epoch_timestamp,
-                        "human_timestamp": self.human_timestamp,
-                        "child_path": child_path,
-                        "child_line_number": child_line_number,
-                        "child_function_name": child_function_name,
-                        "parent_path": row[0],
-                        "parent_line_number": row[1],
-                        "parent_function_name": row[2],
-                        "number_of_calls": nc,
-                        "total_time": tt,
-                        "cumulative_time": ct,
-                        "total_response_time": self.total_response_time
+                        "child_function_id": function_ids[tuple(function)],
+                        "parent_function_id": function_ids[tuple(row)],
+                        "number_of_calls": edge_nc,
+                        "total_time": edge_tt,
+                        "cumulative_time": edge_ct
                     }
@@ -5,19 +5,40 @@ from QuickPotato import performance_test
 from QuickPotato.configuration.management import options
 from QuickPotato.profiling.instrumentation import Profiler
 from QuickPotato.profiling.interpreters import StatisticsInterpreter
+from QuickPotato.profiling.policies import SamplingPolicy, TailCaptureTrigger
 from QuickPotato.utilities.exceptions import CouchPotatoCannotFindMethod
 
 
-def performance_breakpoint(method=None, enabled=True):
+def performance_breakpoint(method=None, enabled=True, mode=None, sample_one_in=None, max_profiles_per_second=None,
+                           max_profiles_per_test_id=None, capture_threshold=None, capture_percentile=None,
+                           trace_allocations=None):
     """
     This decorator can be used to gather performance statistical
     on a method.
     :param method: The method that is being profiled
     :param enabled: If True will profile the method under test
+    :param mode: "deterministic", "sampling" or "timing", when not defined options.profiling_mode is used.
+                 The sampling mode has a much lower overhead and can stay enabled on live traffic.
+                 The timing mode only records the response time and CPU time of each call.
+    :param sample_one_in: Profile on average one in N calls, defaults to options.sample_one_in.
+    :param max_profiles_per_second: Maximum number of profiles per second,
+                                    defaults to options.maximum_profiles_per_second.
+    :param max_profiles_per_test_id: Maximum number of profiles per test id,
+                                     defaults to options.maximum_profiles_per_test_id.
+    :param capture_threshold: When defined, the full call graph is only stored for calls
+                              that take longer than this number of seconds.
+    :param capture_percentile: When defined, the full call graph is only stored for calls
+                               above this rolling percentile (for example 99) of the previous calls.
+                               Other calls only store their response time.
+    :param trace_allocations: Trace the memory allocations of each call with tracemalloc,
+                              defaults to options.enable_allocation_profiling.
     :return: The method output
     """
     # ---------------------------------------------------------------------
 
+    policy = SamplingPolicy(sample_one_in, max_profiles_per_second, max_profiles_per_test_id)
+    trigger = TailCaptureTrigger(capture_threshold, capture_percentile)
+
     @wraps(method)
     def method_execution(*args, **kwargs):
         """
@@ -28,18 +49,26 @@ def performance_breakpoint(method=None, enabled=True):
         :param kwargs: The key word arguments of the method under test
         :return: the methods results
         """
-        if enabled and options.enable_intrusive_profiling:
+        if enabled and options.enable_intrusive_profiling and \
+                policy.should_profile(performance_test.current_test_id):
 
             sample_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            pf = Profiler()
+            pf = Profiler(mode=mode, trace_allocations=trace_allocations)
             pf.profile_method_under_test(method, *args, **kwargs)
 
+            if trigger.enabled and trigger.is_slow(pf.total_response_time) is False:
+                pf.discard_call_graph(method)
+
             StatisticsInterpreter(
                 performance_statistics=pf.performance_statistics,
                 total_response_time=pf.total_response_time,
+                measurements=pf.measurements,
+                system_resources=pf.system_resources,
+                allocations=pf.allocations,
+                allocation_sites=pf.allocation_sites,
                 database_name=performance_test.test_case_name,
                 test_id=performance_test.current_test_id,
-                method_name=method.__name__,
+                method_name=Profiler.function_key(method)[2],
                 sample_id=sample_id
             )
 
@@ -51,7 +80,17 @@ def performance_breakpoint(method=None, enabled=True):
     # ---------------------------------------------------------------------
 
     if method is None:
-        return partial(performance_breakpoint, enabled=enabled)
+        return partial(
+            performance_breakpoint,
+            enabled=enabled,
+            mode=mode,
+            sample_one_in=sample_one_in,
+            max_profiles_per_second=max_profiles_per_second,
+            max_profiles_per_test_id=max_profiles_per_test_id,
+            capture_threshold=capture_threshold,
+            capture_percentile=capture_percentile,
+            trace_allocations=trace_allocations
+        )
 
     elif callable(method) is not True:
         raise CouchPotatoCannotFindMethod()
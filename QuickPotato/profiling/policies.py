@@ -0,0 +1,152 @@
+from QuickPotato.configuration.management import options
+from bisect import bisect_left, insort
+from collections import deque, OrderedDict
+from threading import Lock
+from time import monotonic
+import random
+import math
+
+
+class SamplingPolicy(object):
+
+    def __init__(self, sample_one_in=None, max_profiles_per_second=None, max_profiles_per_test_id=None,
+                 window=100):
+        """
+        Decides which calls of a decorated method are profiled.
+        Settings that are not defined fall back to their global counterpart in the options.
+
+        :param sample_one_in: Profile on average one in N calls, 1 profiles every call.
+        :param max_profiles_per_second: The maximum number of profiles per second (token bucket).
+        :param max_profiles_per_test_id: The maximum number of profiles collected for one test id.
+        :param window: The number of most recently used test ids the profiles are counted for.
+                       A long running process creates a new test id for every test, so older ones are forgotten.
+        """
+        self._sample_one_in = sample_one_in
+        self._max_profiles_per_second = max_profiles_per_second
+        self._max_profiles_per_test_id = max_profiles_per_test_id
+        self.window = window
+
+        self._lock = Lock()
+        self._tokens = None
+        self._last_refill = monotonic()
+        self._profiles_per_test_id = OrderedDict()
+
+    @property
+    def sample_one_in(self):
+        return options.sample_one_in if self._sample_one_in is None else self._sample_one_in
+
+    @property
+    def max_profiles_per_second(self):
+        return options.maximum_profiles_per_second if self._max_profiles_per_second is None \
+            else self._max_profiles_per_second
+
+    @property
+    def max_profiles_per_test_id(self):
+        return options.maximum_profiles_per_test_id if self._max_profiles_per_test_id is None \
+            else self._max_profiles_per_test_id
+
+    def should_profile(self, test_id):
+        """
+        Verifies if the current call needs to be profiled.
+
+        :param test_id: The test id the profile would be stored under.
+        :return: True when the call needs to be profiled, False if it can pass through.
+        """
+        sample_one_in = self.sample_one_in
+        if sample_one_in is not None and sample_one_in > 1 and random.random() * sample_one_in >= 1:
+            return False
+
+        max_profiles_per_second = self.max_profiles_per_second
+        max_profiles_per_test_id = self.max_profiles_per_test_id
+        if max_profiles_per_second is None and max_profiles_per_test_id is None:
+            return True
+
+        with self._lock:
+            profiles_for_test_id = self._profiles_per_test_id.setdefault(test_id, 0)
+            self._profiles_per_test_id.move_to_end(test_id)
+            if len(self._profiles_per_test_id) > self.window:
+                self._profiles_per_test_id.popitem(last=False)
+
+            if max_profiles_per_test_id is not None and profiles_for_test_id >= max_profiles_per_test_id:
+                return False
+
+            if max_profiles_per_second is not None and self._take_token(max_profiles_per_second) is False:
+                return False
+
+            self._profiles_per_test_id[test_id] = profiles_for_test_id + 1
+            return True
+
+    def _take_token(self, rate):
+        """
+        Refills the token bucket based on the elapsed time and takes a token when one is available.
+        The bucket holds at most one second worth of tokens.
+
+        :param rate: The number of tokens that are added per second.
+        :return: True when a token was taken.
+        """
+        now = monotonic()
+        if self._tokens is None:
+            self._tokens = float(rate)
+
+        self._tokens = min(float(rate), self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+
+        return False
+
+
+class TailCaptureTrigger(object):
+
+    def __init__(self, threshold=None, percentile=None, window=1000):
+        """
+        Decides if the call graph of a profiled call is slow enough to be stored.
+        A call is slow when its response time exceeds the fixed threshold or
+        when it is above the rolling percentile of the previous calls.
+
+        :param threshold: A response time in seconds.
+        :param percentile: A percentile between 0 and 100, for example 99.
+        :param window: The number of previous response times the rolling percentile is based on.
+        """
+        self.threshold = threshold
+        self.percentile = percentile
+        self.window = window
+
+        self._lock = Lock()
+        self._history = deque()
+        self._sorted_history = []
+
+    @property
+    def enabled(self):
+        return self.threshold is not None or self.percentile is not None
+
+    def is_slow(self, response_time):
+        """
+        Verifies if the response time belongs to a slow outlier and adds it to the rolling window.
+
+        :param response_time: The response time of the call in seconds.
+        :return: True when the full call graph of the call needs to be stored.
+        """
+        slow = self.threshold is not None and response_time > self.threshold
+        if self.percentile is None:
+            return slow
+
+        with self._lock:
+            if len(self._sorted_history) == 0:
+                # Without history there is nothing to compare with, so the first call is always kept.
+                slow = True
+
+            else:
+                rank = max(int(math.ceil(self.percentile / 100 * len(self._sorted_history))) - 1, 0)
+                # A strict comparison, otherwise every call is slow when the response times are tied
+                slow = slow or response_time > self._sorted_history[rank]
+
+            self._history.append(response_time)
+            insort(self._sorted_history, response_time)
+            if len(self._history) > self.window:
+                oldest = self._history.popleft()
+                del self._sorted_history[bisect_left(self._sorted_history, oldest)]
+
+        return slow
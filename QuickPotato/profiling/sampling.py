@@ -0,0 +1,207 @@
+from threading import Thread, Condition
+from collections import Counter
+from time import monotonic
+import random
+import atexit
+import sys
+import os
+
+
+class SamplingSession(object):
+
+    def __init__(self, thread_id, anchor, interval):
+        """
+        The stacks that have been captured of one profiled call.
+        Only the frames above the anchor frame are recorded, so the profiler's own
+        frames never end up in the collected statistics.
+
+        The first capture happens at a random moment within the first interval, so a call that
+        is shorter than the interval is still captured with a chance of its duration divided by
+        the interval. Summed over many calls its estimated time is then still correct.
+
+        :param thread_id: The identifier of the thread that executes the method under test.
+        :param anchor: The frame that calls the method under test.
+        :param interval: The number of seconds between two stack captures.
+        """
+        self.thread_id = thread_id
+        self.anchor = anchor
+        self.interval = interval
+        self.stacks = Counter()
+        self.next_capture = monotonic() + random.uniform(0, interval)
+
+    def capture_stack(self, frame):
+        """
+        Walks from the currently executing frame of the profiled thread up to the anchor.
+
+        :param frame: The currently executing frame of the profiled thread.
+        """
+        stack = []
+        while frame is not None and frame is not self.anchor:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+
+        if frame is None or len(stack) == 0:
+            # The method under test is not on the stack
+            return
+
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+
+    def statistics(self, root, total_response_time):
+        """
+        Converts the captured stacks into the same structure as `pstats.Stats.stats`,
+        so the statistics interpreter can process sampled and deterministic profiles alike.
+
+        Because a sampler cannot count calls, the number of calls of a function is
+        the number of captures it was observed in. Times are estimated by multiplying
+        the number of captures with the sampling interval.
+
+        :param root: The function key of the method under test.
+        :param total_response_time: The measured wall clock time of the method under test.
+        :return: A dictionary with the layout {function: (cc, nc, tt, ct, callers)}
+        """
+        hits = Counter()
+        own_hits = Counter()
+        own_edge_hits = Counter()
+        edges = {}
+
+        for stack, count in self.stacks.items():
+            for function in set(stack):
+                hits[function] += count
+
+            own_hits[stack[-1]] += count
+            if len(stack) > 1:
+                own_edge_hits[stack[-2], stack[-1]] += count
+
+            for caller, callee in set(zip(stack, stack[1:])):
+                edges.setdefault(callee, Counter())[caller] += count
+
+        statistics = {}
+        for function, count in hits.items():
+            callers = {
+                caller: (edge_count, edge_count, own_edge_hits[caller, function] * self.interval,
+                         edge_count * self.interval)
+                for caller, edge_count in edges.get(function, {}).items()
+            }
+            statistics[function] = (
+                count,
+                count,
+                own_hits[function] * self.interval,
+                count * self.interval,
+                callers
+            )
+
+        # The method under test is always present and its cumulative time is measured, not estimated.
+        cc, nc, tt, _, callers = statistics.get(root, (1, 1, 0.0, 0.0, {}))
+        statistics[root] = (cc, nc, tt, total_response_time, callers)
+        return statistics
+
+
+class StackSampler(object):
+
+    def __init__(self):
+        """
+        A single long-lived daemon thread that periodically captures the stacks of every thread
+        that is executing a profiled call. A profiled call only registers and unregisters its
+        session, so it never pays for starting and joining a thread of its own.
+        """
+        self._condition = Condition()
+        self._sessions = set()
+        self._thread = None
+        self._pid = None
+        self._stopped = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def start_session(self, thread_id, anchor, interval):
+        """
+        Starts capturing the stack of a thread.
+
+        :param thread_id: The identifier of the thread that executes the method under test.
+        :param anchor: The frame that calls the method under test.
+        :param interval: The number of seconds between two stack captures.
+        :return: The sampling session that collects the captured stacks.
+        """
+        session = SamplingSession(thread_id, anchor, interval)
+        with self._condition:
+            self._start()
+            self._sessions.add(session)
+            self._condition.notify()
+        return session
+
+    def stop_session(self, session):
+        """
+        Stops capturing the stack of a thread. A capture never runs while the session is removed,
+        so no stack is added to the session after this method returns.
+
+        :param session: The sampling session that was returned by start_session.
+        """
+        with self._condition:
+            self._sessions.discard(session)
+        session.anchor = None
+
+    def stop(self):
+        """
+        Stops the sampler thread, it is started again by the next session.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self.running:
+            self._thread.join()
+
+    def _start(self):
+        """
+        Starts the sampler thread on first use and again in a forked child process,
+        which does not inherit the threads of its parent. Is called while holding the condition.
+        """
+        if self.running:
+            return
+
+        self._stopped = False
+        self._pid = os.getpid()
+        self._thread = Thread(target=self._sample, name="QuickPotato-StackSampler", daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        """
+        Captures the stack of every session that is due and sleeps until the next session is due.
+        """
+        with self._condition:
+            while not self._stopped:
+                if len(self._sessions) == 0:
+                    self._condition.wait()
+                    continue
+
+                now = monotonic()
+                due_sessions = [session for session in self._sessions if session.next_capture <= now]
+                if len(due_sessions) > 0:
+                    frames = sys._current_frames()
+                    for session in due_sessions:
+                        session.capture_stack(frames.get(session.thread_id))
+                        session.next_capture += session.interval
+                        if session.next_capture <= now:
+                            # A capture that is late does not make up for the missed ones
+                            session.next_capture = now + session.interval
+                    del frames
+
+                self._condition.wait(max(min(session.next_capture for session in self._sessions) - monotonic(), 0))
+
+    def _abandon_sessions_after_fork(self):
+        """
+        A forked child does not inherit the sampler thread and the sessions of its parent.
+        The condition may have been held during the fork.
+        """
+        self._condition = Condition()
+        self._sessions = set()
+        self._thread = None
+
+
+stack_sampler = StackSampler()
+atexit.register(stack_sampler.stop)
+# Windows can not fork so it has no fork hooks
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=stack_sampler._abandon_sessions_after_fork)
@@ -1,24 +1,33 @@
 from QuickPotato.database.queries import Crud
+from datetime import datetime
 import numpy as np
+import json
 
 
 class RawData(Crud):
 
-    def __init__(self, test_id, database_name):
+    def __init__(self, test_id, database_name, metric="total_response_time"):
+        """
+        :param test_id: The test id of which the measurements are collected.
+        :param database_name: The name of the database (This is equal to the test case)
+        :param metric: The per sample measurement, one of: "total_response_time", "total_cpu_time",
+                       "total_thread_time", "gc_pause_time" or "gc_collections".
+        """
         super(RawData, self).__init__()
 
         self.test_id = test_id
         self.database_name = database_name
-        self._response_times = self.select_response_times(self.database_name, self.test_id)
+        self.metric = metric
+        self._response_times = self.select_response_times_as_array(self.database_name, self.test_id, self.metric)
 
     def response_times(self):
         """
 
         Returns
         -------
-
+            A list with the response times, the array behind it stays internal.
         """
-        return self._response_times
+        return self._response_times.tolist()
 
     def normalized_response_times(self):
         """
@@ -27,7 +36,7 @@ class RawData(Crud):
         -------
 
         """
-        measurements = np.array(self._response_times)
+        measurements = self._response_times
         return measurements[abs(measurements - np.mean(measurements)) < 2 * np.std(measurements)]
 
     def average_response_time(self):
@@ -37,7 +46,7 @@ class RawData(Crud):
         -------
 
         """
-        return sum(self._response_times) / len(self._response_times)
+        return np.mean(self._response_times)
 
     def maximum_outlier_in_response_times(self):
         """
@@ -46,7 +55,7 @@ class RawData(Crud):
         -------
 
         """
-        return max(self._response_times)
+        return np.max(self._response_times)
 
     def minimum_outlier_in_response_times(self):
         """
@@ -55,7 +64,7 @@ class RawData(Crud):
         -------
 
         """
-        return min(self._response_times)
+        return np.min(self._response_times)
 
     def percentile_5th(self):
         """
@@ -64,7 +73,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 5)
+        return np.percentile(self._response_times, 5)
 
     def percentile_10th(self):
         """
@@ -73,7 +82,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 10)
+        return np.percentile(self._response_times, 10)
 
     def percentile_15th(self):
         """
@@ -82,7 +91,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 15)
+        return np.percentile(self._response_times, 15)
 
     def percentile_20th(self):
         """
@@ -91,7 +100,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 20)
+        return np.percentile(self._response_times, 20)
 
     def percentile_25th(self):
         """
@@ -100,7 +109,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 25)
+        return np.percentile(self._response_times, 25)
 
     def percentile_30th(self):
         """
@@ -109,7 +118,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 30)
+        return np.percentile(self._response_times, 30)
 
     def percentile_35th(self):
         """
@@ -118,7 +127,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 35)
+        return np.percentile(self._response_times, 35)
 
     def percentile_40th(self):
         """
@@ -127,7 +136,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 40)
+        return np.percentile(self._response_times, 40)
 
     def percentile_45th(self):
         """
@@ -136,7 +145,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 45)
+        return np.percentile(self._response_times, 45)
 
     def percentile_50th(self):
         """
@@ -145,7 +154,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 50)
+        return np.percentile(self._response_times, 50)
 
     def percentile_55th(self):
         """
@@ -154,7 +163,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 55)
+        return np.percentile(self._response_times, 55)
 
     def percentile_60th(self):
         """
@@ -163,7 +172,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 60)
+        return np.percentile(self._response_times, 60)
 
     def percentile_65th(self):
         """
@@ -172,7 +181,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 65)
+        return np.percentile(self._response_times, 65)
 
     def percentile_70th(self):
         """
@@ -181,7 +190,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 70)
+        return np.percentile(self._response_times, 70)
 
     def percentile_75th(self):
         """
@@ -190,7 +199,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 75)
+        return np.percentile(self._response_times, 75)
 
     def percentile_80th(self):
         """
@@ -199,7 +208,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 80)
+        return np.percentile(self._response_times, 80)
 
     def percentile_85th(self):
         """
@@ -208,7 +217,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 85)
+        return np.percentile(self._response_times, 85)
 
     def percentile_90th(self):
         """
@@ -217,7 +226,7 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 90)
+        return np.percentile(self._response_times, 90)
 
     def percentile_95th(self):
         """
@@ -226,7 +235,190 @@ class RawData(Crud):
         -------
 
         """
-        return np.percentile(np.array(self._response_times), 95)
+        return np.percentile(self._response_times, 95)
+
+
+class TestSummary(Crud):
+
+    # Not a test class, even though its name starts with Test
+    __test__ = False
+
+    PERCENTILES = (5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 85, 90, 95)
+    HISTOGRAM_BINS = 20
+
+    def __init__(self, test_id, database_name, metric="total_response_time", refresh=False):
+        """
+        The descriptive statistics of one test id, read from the test summary table when the test id
+        has already been summarized and otherwise computed once from its raw measurements.
+
+        :param test_id: The test id of which the measurements are summarized.
+        :param database_name: The name of the database (This is equal to the test case)
+        :param metric: The per sample measurement that is summarized.
+        :param refresh: Ignores a stored summary and recomputes it, for a test id that is still collecting samples.
+        """
+        super(TestSummary, self).__init__()
+
+        self.test_id = test_id
+        self.database_name = database_name
+        self.metric = metric
+
+        summary = None if refresh else self.select_test_summary(self.database_name, self.test_id, self.metric)
+        self.stored = summary is not None
+        self._summary = summary if self.stored else self._summarize(
+            self.select_response_times_as_array(self.database_name, self.test_id, self.metric)
+        )
+
+    @classmethod
+    def collect(cls, test_id, database_name, metric="total_response_time", refresh=False):
+        """
+        Reads the stored summary of a test id, a test id without a stored summary is summarized once
+        from its raw measurements after which the summary is saved for the next verification.
+
+        :param test_id: The test id of which the measurements are summarized.
+        :param database_name: The name of the database (This is equal to the test case)
+        :param metric: The per sample measurement that is summarized.
+        :param refresh: Recomputes the summary of a test id that is still collecting samples.
+        :return: A test summary object.
+        """
+        summary = cls(test_id, database_name, metric, refresh=refresh)
+        if summary.stored is False:
+            summary.save()
+        return summary
+
+    @classmethod
+    def _summarize(cls, measurements):
+        """
+        Computes every statistic of the summary in one pass over the measurements.
+
+        :param measurements: A NumPy array with the measurements of every sample.
+        :return: A dictionary with the column name as key and the statistic as value.
+        """
+        summary = {"number_of_samples": int(measurements.size)}
+        if measurements.size == 0:
+            # Nothing was measured, every statistic is undefined
+            summary.update({key: float("nan") for key in ("mean", "variance", "minimum", "maximum")})
+            summary.update({f"percentile_{percentile}th": float("nan") for percentile in cls.PERCENTILES})
+            summary["histogram"] = json.dumps({"edges": [], "counts": []})
+            return summary
+
+        percentiles = np.percentile(measurements, cls.PERCENTILES)
+        counts, edges = np.histogram(measurements, bins=min(cls.HISTOGRAM_BINS, measurements.size))
+        summary.update(
+            {
+                "mean": float(np.mean(measurements)),
+                "variance": float(np.var(measurements)),
+                "minimum": float(np.min(measurements)),
+                "maximum": float(np.max(measurements)),
+                "histogram": json.dumps({"edges": edges.tolist(), "counts": counts.tolist()})
+            }
+        )
+        for percentile, value in zip(cls.PERCENTILES, percentiles):
+            summary[f"percentile_{percentile}th"] = float(value)
+        return summary
+
+    def save(self):
+        """
+        Will insert the summary into the database, replacing an earlier summary of the same test id and metric.
+
+        Returns
+        -------
+        Will return True on success
+        """
+        if self.number_of_samples == 0:
+            return False
+
+        payload = {
+            "test_id": self.test_id,
+            "test_case_name": self.database_name,
+            "metric": self.metric,
+            "epoch_timestamp": datetime.now().timestamp(),
+            "human_timestamp": datetime.now(),
+        }
+        payload.update({key: self._summary[key] for key in self._summary if key not in payload and key != "id"})
+        self.insert_test_summary(self.database_name, payload)
+        self.stored = True
+        return True
+
+    @property
+    def number_of_samples(self):
+        return self._summary["number_of_samples"]
+
+    @property
+    def histogram(self):
+        """
+        The bin edges and the number of measurements in every bin.
+
+        Returns
+        -------
+            A dictionary with the keys "edges" and "counts".
+        """
+        return json.loads(self._summary["histogram"])
+
+    def average_response_time(self):
+        return self._summary["mean"]
+
+    def variance_of_response_times(self):
+        return self._summary["variance"]
+
+    def maximum_outlier_in_response_times(self):
+        return self._summary["maximum"]
+
+    def minimum_outlier_in_response_times(self):
+        return self._summary["minimum"]
+
+    def percentile(self, percentile):
+        """
+
+        :param percentile: One of the summarized percentiles, 5 up to 95 in steps of 5.
+        :return: The value of the percentile.
+        """
+        return self._summary[f"percentile_{percentile}th"]
+
+
+class AllocationData(Crud):
+
+    def __init__(self, test_id, database_name):
+        super(AllocationData, self).__init__()
+
+        self.test_id = test_id
+        self.database_name = database_name
+        self._allocations = self.select_memory_allocation_statistics(self.database_name, self.test_id)
+
+    def peak_memory(self):
+        """
+
+        Returns
+        -------
+            The peak traced memory in bytes of every sample.
+        """
+        return [float(row["peak_traced_memory"]) for row in self._allocations]
+
+    def allocated_memory(self):
+        """
+
+        Returns
+        -------
+            The allocated memory in bytes of every sample.
+        """
+        return [float(row["allocated_memory"]) for row in self._allocations]
+
+    def maximum_peak_memory(self):
+        """
+
+        Returns
+        -------
+            None when no allocations have been traced.
+        """
+        return max(self.peak_memory()) if len(self._allocations) > 0 else None
+
+    def average_allocated_memory(self):
+        """
+
+        Returns
+        -------
+            None when no allocations have been traced.
+        """
+        return sum(self.allocated_memory()) / len(self._allocations) if len(self._allocations) > 0 else None
 
 
 class CodePaths(Crud):
@@ -234,8 +426,6 @@ class CodePaths(Crud):
     def __init__(self):
         super().__init__()
 
-        self._matched_code_path = None
-
     def _map_out_hierarchical_stack_relationships(self, test_case_name, sample_id):
         """
         Will map out the parent child relationships for each function to form hierarchical data structure.
@@ -246,76 +436,132 @@ class CodePaths(Crud):
 
         :return: An hierarchical data structure in JSON format.
         """
-        stack = {}
-        collected_stack = self.select_call_stack_by_sample_id(test_case_name, sample_id)
-        for line in collected_stack:
-
-            if line["parent_function_name"] == collected_stack[0]['parent_function_name']:
-                stack["name"] = line["parent_function_name"]
-                stack["children"] = [
-                    {
-                        "name": line["child_function_name"],
-                        "children": []
-                    }
-                ]
-
-            else:
-                self._recursively_update_number_of_parent_child_relationship(
-                    stack=stack,
-                    parent=line['parent_function_name'],
-                    child=line['child_function_name']
-                )
-        return stack
-
-    def _recursively_update_number_of_parent_child_relationship(self, stack, parent, child):
-        """
-        Helps map out the call stack by extending or updating the
-        hierarchical stack with new members.
+        return self._build_hierarchical_stack(self.select_call_stack_by_sample_id(test_case_name, sample_id))
 
-        (Function is recursive until there are no more objects in the stack.)
-
-        :param stack: The hierarchical JSON call stack.
-        :param parent: The name of the parent function.
-        :param child: The name of the child function.
+    @staticmethod
+    def _build_hierarchical_stack(collected_stack):
         """
-        if stack['name'] == parent:
-            stack['children'].append(
-                {
-                    "name": child,
-                    "children": []
-                }
-            )
+        Maps out the parent child relationships of an already collected call stack.
 
-        else:
-            for item in stack['children']:
-                self._recursively_update_number_of_parent_child_relationship(item, parent, child)
+        The rows are indexed by parent in one pass, after which the tree is expanded from the root
+        with an explicit stack, so the cost grows with the size of the tree instead of rows x nodes.
+        A function that calls itself is shown once as a child of itself but is not expanded again.
 
-    def _recursively_search_hierarchical_stack(self, hierarchical_stack, parent, child, history):
-        """
+        Every row holds the calls and times of one call edge, so a member carries the time of the edge
+        from its parent. The statistics do not know which path led to the parent, so the members below it
+        get the share of their edge times that the parent path holds of the cumulative time of the parent.
 
-        :param hierarchical_stack:
-        :param parent:
-        :return:
+        :param collected_stack: The rows of one sample.
+        :return: An hierarchical data structure in JSON format.
         """
-        if len(hierarchical_stack["children"]) != 0 and hierarchical_stack["name"] not in history:
-            history.append(hierarchical_stack["name"])
-        if hierarchical_stack["name"] == parent:
-            matched_code_path = history
-            matched_code_path.append(child)
-            return matched_code_path
+        if len(collected_stack) == 0:
+            return {}
 
-        else:
-            for current_point_in_stack in hierarchical_stack["children"]:
-                match = self._recursively_search_hierarchical_stack(
-                    current_point_in_stack,
-                    parent,
-                    child,
-                    history
+        root_name = collected_stack[0]["parent_function_name"]
+        children = {}
+        cumulative_times = {}
+        for line in collected_stack:
+            if line["parent_function_name"] == line["sample_id"]:
+                root_name = line["parent_function_name"]
+            children.setdefault(line["parent_function_name"], []).append(line)
+            if line["parent_function_name"] != line["child_function_name"]:
+                # A recursive call is already part of the cumulative time of its outermost call
+                cumulative_times[line["child_function_name"]] = \
+                    cumulative_times.get(line["child_function_name"], 0.0) + float(line["cumulative_time"])
+
+        stack = {"name": root_name, "children": [], "total_time": 0.0, "cumulative_time": 0.0}
+        pending = [(stack, 1.0)]
+        current_path = set()
+        while len(pending) > 0:
+            entry = pending.pop()
+            if isinstance(entry, str):
+                # All members below this function have been mapped out
+                current_path.discard(entry)
+                continue
+
+            node, share = entry
+            if node["name"] in current_path:
+                continue
+
+            current_path.add(node["name"])
+            pending.append(node["name"])
+            shares = []
+            for line in children.get(node["name"], []):
+                cumulative_time = float(line["cumulative_time"]) * share
+                function_time = cumulative_times.get(line["child_function_name"], 0.0)
+                node["children"].append(
+                    {
+                        "name": line["child_function_name"],
+                        "children": [],
+                        "total_time": float(line["total_time"]) * share,
+                        "cumulative_time": cumulative_time
+                    }
                 )
-                if match is not None:
-                    return match
+                shares.append(min(cumulative_time / function_time, 1.0) if function_time > 0 else 0.0)
+            pending.extend(reversed(list(zip(node["children"], shares))))
 
-                else:
-                    continue
+        # The root is the profiler itself, which spends all of its time in the method under test
+        stack["cumulative_time"] = sum(child["cumulative_time"] for child in stack["children"])
+        return stack
 
+    @staticmethod
+    def _merge_hierarchical_stacks(stacks, name):
+        """
+        Merges the hierarchical stacks of several samples into one stack.
+        Members with the same name at the same place in the tree are combined and their times summed.
 
+        :param stacks: A list of hierarchical stacks.
+        :param name: The name of the merged root.
+        :return: An hierarchical data structure in JSON format.
+        """
+        stacks = [stack for stack in stacks if len(stack) > 0]
+        merged_stack = {"name": name, "children": []}
+        pending = [(merged_stack, stacks)]
+        while len(pending) > 0:
+            merged_member, members = pending.pop()
+            for key in ("total_time", "cumulative_time", "value"):
+                if all(key in member for member in members):
+                    merged_member[key] = sum(member[key] for member in members)
+
+            children = {}
+            for member in members:
+                for child in member["children"]:
+                    children.setdefault(child["name"], []).append(child)
+
+            for child_name, grouped_children in children.items():
+                merged_child = {"name": child_name, "children": []}
+                merged_member["children"].append(merged_child)
+                pending.append((merged_child, grouped_children))
+
+        return merged_stack
+
+    @staticmethod
+    def _map_out_code_paths(hierarchical_stack):
+        """
+        Finds the code path to every function in one pre-order traversal of the hierarchical stack.
+        The code path of a function is the chain of callers from the root down to its first occurrence.
+
+        :param hierarchical_stack: The discovered hierarchical JSON call stack.
+        :return: A dictionary with the function name as key and its code path (a list of names) as value.
+        """
+        code_paths = {}
+        if len(hierarchical_stack) == 0:
+            return code_paths
+
+        current_path = []
+        pending = [hierarchical_stack]
+        while len(pending) > 0:
+            member = pending.pop()
+            if member is None:
+                # All members below the last function on the path have been visited
+                current_path.pop()
+                continue
+
+            current_path.append(member["name"])
+            if member["name"] not in code_paths:
+                code_paths[member["name"]] = list(current_path)
+
+            pending.append(None)
+            pending.extend(reversed(member["children"]))
+
+        return code_paths
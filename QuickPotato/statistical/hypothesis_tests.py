@@ -1,4 +1,5 @@
 from QuickPotato.harness.results import RegressionTestEvidence
+from QuickPotato.statistical.data import TestSummary
 from datetime import datetime
 import numpy as np
 from decimal import Decimal
@@ -14,16 +15,14 @@ class TTest(RegressionTestEvidence):
         super(TTest, self).__init__()
 
         # Baseline calculations
-        self.baseline_measurements = np.array(baseline_measurements)
-        self.baseline_mean = np.mean(self.baseline_measurements)
-        self.baseline_variance = np.var(self.baseline_measurements)
-        self.baseline_number_of_samples = self.baseline_measurements.size
+        self.baseline_measurements = baseline_measurements
+        self.baseline_mean, self.baseline_variance, self.baseline_number_of_samples = \
+            self._describe_measurements(baseline_measurements)
 
         # Benchmark calculations
-        self.benchmark_measurements = np.array(benchmark_measurements)
-        self.benchmark_mean = np.mean(self.benchmark_measurements)
-        self.benchmark_variance = np.var(self.benchmark_measurements)
-        self.benchmark_number_of_samples = self.benchmark_measurements.size
+        self.benchmark_measurements = benchmark_measurements
+        self.benchmark_mean, self.benchmark_variance, self.benchmark_number_of_samples = \
+            self._describe_measurements(benchmark_measurements)
 
         # Information for test evidence report
         self.test_id = test_id
@@ -36,6 +35,25 @@ class TTest(RegressionTestEvidence):
         self.critical_value = float(self.critical_t_value)
         self.save_test_evidence()
 
+    @staticmethod
+    def _describe_measurements(measurements):
+        """
+        The T-test only needs the mean, variance and size of both samples,
+        a stored test summary provides these without reading the raw measurements.
+
+        :param measurements: A test summary or a list of measurements.
+        :return: A tuple with the mean, variance and number of samples.
+        """
+        if isinstance(measurements, TestSummary):
+            return (
+                measurements.average_response_time(),
+                measurements.variance_of_response_times(),
+                measurements.number_of_samples
+            )
+
+        measurements = np.array(measurements)
+        return np.mean(measurements), np.var(measurements), measurements.size
+
     @property
     def results(self):
         """
@@ -85,7 +103,7 @@ class TTest(RegressionTestEvidence):
         -------
 
         """
-        if sum(self.baseline_measurements) == 0 and sum(self.benchmark_measurements) == 0:
+        if self.baseline_mean == 0 and self.benchmark_mean == 0:
             # There is no change both sums are equal to each other.
             return False
 
@@ -3,22 +3,26 @@ from QuickPotato.statistical.data import CodePaths
 from QuickPotato.utilities.html_templates import flame_graph_template, heatmap_template
 from QuickPotato.utilities.defaults import default_test_case_name
 from QuickPotato.utilities.exceptions import UnableToGenerateVisualizations, \
-    UnableToExportVisualization, UnAcceptableTestIdFound
+    UnableToExportVisualization, UnAcceptableTestIdFound, ExportFormatNotSupported
 from datetime import datetime
 from jinja2 import Template
 import plotly.graph_objects as go
 import pandas as pd
 import numpy
 import json
+import gzip
 import os
 
 
 class FlameGraph(CodePaths):
 
-    def __init__(self, test_case_name=default_test_case_name, test_id=None):
+    DIFFERENTIAL = False
+
+    def __init__(self, test_case_name=default_test_case_name, test_id=None, aggregate=False):
         """
         When initialized it will generate a hieratical json stack for each sample
         in the test id attached to the specified test case and make it possible to render D3-flame-graphs.
+        The width of every frame is the time spent in the function.
         For more info about D3-flame-graphs visit:
 
         https://github.com/spiermar/d3-flame-graph
@@ -28,6 +32,7 @@ class FlameGraph(CodePaths):
                                database/test case name.
         :param test_id: The generated test id, if it is not defined and the test case is rolled to
                         default the latest available test id wil be used.
+        :param aggregate: When True all samples of the test id are merged into one flame graph.
         """
         super(FlameGraph, self).__init__()
 
@@ -37,14 +42,17 @@ class FlameGraph(CodePaths):
         elif test_id is None:
             raise UnableToGenerateVisualizations()
 
-        self.list_of_samples = self.select_all_sample_ids(test_case_name, test_id)
-        self._current_number_of_children = 0
+        self.list_of_samples = []
         self.test_case_name = test_case_name
 
-        self.json = [
-            self._count_code_path_length(self._map_out_hierarchical_stack_relationships(test_case_name, sample))
-            for sample in self.list_of_samples
-        ]
+        self.json = []
+        for sample_id, stack in self._collect_time_weighted_stacks(test_case_name, test_id):
+            self.list_of_samples.append(sample_id)
+            self.json.append(stack)
+
+        if aggregate:
+            self.list_of_samples = [test_id]
+            self.json = [self._merge_hierarchical_stacks(self.json, test_id)]
         self.html = self._render_html()
 
     def export(self, path):
@@ -69,43 +77,182 @@ class FlameGraph(CodePaths):
         return template.render(
             list_of_samples=self.list_of_samples,
             payload=self.json,
+            differential=self.DIFFERENTIAL
         )
 
-    def _recursively_count_samples(self, stack, function_name):
+    def _collect_time_weighted_stacks(self, test_case_name, test_id):
+        """
+        :param test_case_name: The name of the test case.
+        :param test_id: The test id of which the samples are collected.
+        :return: A generator that yields the sample id and time-weighted hierarchical stack of every sample.
         """
-        Will count how many children/samples the given function name has.
+        for _, sample_id, collected_stack in self.select_call_stacks_by_test_ids(test_case_name, test_id):
+            yield sample_id, self._weigh_frames_by_time(self._build_hierarchical_stack(collected_stack))
 
-        (Function is recursive and will travel through the hierarchical
-        JSON stack until no more member can be found.)
+    @staticmethod
+    def _weigh_frames_by_time(stack):
+        """
+        Sets the value (the width of a frame) of every member to its cumulative time in seconds.
+        Walking down from the root, children that together exceed the time of their parent are scaled down
+        proportionally, so every sample is normalised to fit within its measured response time.
 
-        :param stack: The discovered hierarchical JSON call stack without the amount of samples.
-        :param function_name: The name of the member function
+        :param stack: The discovered hierarchical JSON call stack.
+        :return: The discovered hierarchical JSON call stack with a time-weighted value per member.
         """
-        self._current_number_of_children += 1 if len(stack['children']) == 0 else len(stack['children'])
-        for relationship in stack["children"]:
-            self._recursively_count_samples(relationship, function_name)
+        if len(stack) == 0:
+            return stack
+
+        stack["value"] = stack["cumulative_time"]
+        members = [stack]
+        for member in members:
+            time_spent_in_children = sum(child["cumulative_time"] for child in member["children"])
+            scale = 1.0
+            if time_spent_in_children > member["value"]:
+                scale = member["value"] / time_spent_in_children
+
+            for child in member["children"]:
+                child["value"] = child["cumulative_time"] * scale
+            members.extend(member["children"])
+
+        return stack
+
 
-    def _count_code_path_length(self, stack):
+class DifferentialFlameGraph(FlameGraph):
+
+    DIFFERENTIAL = True
+
+    def __init__(self, test_case_name=default_test_case_name, baseline_test_id=None, benchmark_test_id=None,
+                 colour_by="self_time"):
         """
-        Will travel down the discovered hierarchical stack and add the amount of samples per member.
+        Compares the average call tree of a baseline and a benchmark test id in one flame graph.
+        The width of a frame is its time in the benchmark, the colour shows how much it changed
+        compared to the baseline: red frames got slower, blue frames got faster.
+
+        :param test_case_name: The name of the test case (This is also always the database name).
+        :param baseline_test_id: The test id that is compared against, for example the previous test id.
+                                 When both test ids are not defined and the test case is rolled to default,
+                                 the last two available test ids will be used.
+        :param benchmark_test_id: The test id that is verified, for example the current test id.
+        :param colour_by: "self_time" colours a frame by the change of the time spent in the function itself,
+                          "cumulative_time" by the change including the functions it called.
+        """
+        CodePaths.__init__(self)
+
+        if baseline_test_id is None and benchmark_test_id is None and test_case_name == default_test_case_name:
+            test_ids = self.select_test_ids_with_performance_statistics(database=test_case_name)
+            if len(test_ids) < 2:
+                raise UnableToGenerateVisualizations()
+            baseline_test_id, benchmark_test_id = test_ids[-2:]
+
+        if baseline_test_id is None or benchmark_test_id is None or colour_by not in ("self_time",
+                                                                                      "cumulative_time"):
+            raise UnableToGenerateVisualizations()
+
+        self.test_case_name = test_case_name
+        self.baseline_test_id = baseline_test_id
+        self.benchmark_test_id = benchmark_test_id
+        self.colour_by = colour_by
 
-        (Function is recursive and will travel through the hierarchical
-        JSON stack until no more member can be found.)
+        name = f"{baseline_test_id} vs {benchmark_test_id}"
+        self.list_of_samples = [name]
+        self.json = [
+            self._compare_hierarchical_stacks(
+                baseline=self._average_hierarchical_stack(test_case_name, baseline_test_id),
+                benchmark=self._average_hierarchical_stack(test_case_name, benchmark_test_id),
+                name=name
+            )
+        ]
+        self.html = self._render_html()
 
-        :param stack: The discovered hierarchical JSON call stack without the amount of samples.
-        :return: The discovered hierarchical JSON call with the amount of samples per member.
+    def _average_hierarchical_stack(self, test_case_name, test_id):
         """
-        self._recursively_count_samples(stack, stack["name"])
-        stack['value'] = self._current_number_of_children
-        self._current_number_of_children = 0
-        for relationship in stack["children"]:
-            self._count_code_path_length(relationship)
-        return stack
+        Merges all samples of a test id and divides the times by the number of samples,
+        so test ids with a different number of samples can be compared.
+
+        :param test_case_name: The name of the test case.
+        :param test_id: The test id of which the average call tree is created.
+        :return: An hierarchical data structure in JSON format.
+        """
+        stacks = [stack for _, stack in self._collect_time_weighted_stacks(test_case_name, test_id)]
+        if len(stacks) == 0:
+            raise UnableToGenerateVisualizations()
+
+        average_stack = self._merge_hierarchical_stacks(stacks, test_id)
+        members = [average_stack]
+        for member in members:
+            for key in ("total_time", "cumulative_time", "value"):
+                if key in member:
+                    member[key] = member[key] / len(stacks)
+            members.extend(member["children"])
+
+        return average_stack
+
+    def _compare_hierarchical_stacks(self, baseline, benchmark, name):
+        """
+        Walks through both call trees at the same time and creates one tree with the benchmark values,
+        the change in self time and cumulative time of every frame and the delta d3-flame-graph colours by.
+        Frames that only exist in the baseline are kept with a value of zero.
+
+        :param baseline: The average hierarchical stack of the baseline.
+        :param benchmark: The average hierarchical stack of the benchmark.
+        :param name: The name of the root of the differential stack.
+        :return: An hierarchical data structure in JSON format.
+        """
+        def self_time(member):
+            if member is None:
+                return 0.0
+            return member["value"] - sum(child["value"] for child in member["children"])
+
+        differential_stack = {"name": name, "children": []}
+        pending = [(differential_stack, baseline, benchmark)]
+        while len(pending) > 0:
+            member, baseline_member, benchmark_member = pending.pop()
+
+            member["value"] = 0.0 if benchmark_member is None else benchmark_member["value"]
+            member["baseline_value"] = 0.0 if baseline_member is None else baseline_member["value"]
+            member["cumulative_time_delta"] = member["value"] - member["baseline_value"]
+            member["self_time_delta"] = self_time(benchmark_member) - self_time(baseline_member)
+            member["delta"] = member[f"{self.colour_by}_delta"]
+
+            baseline_children = {} if baseline_member is None else \
+                {child["name"]: child for child in baseline_member["children"]}
+            benchmark_children = {} if benchmark_member is None else \
+                {child["name"]: child for child in benchmark_member["children"]}
+
+            for child_name in list(benchmark_children) + [key for key in baseline_children
+                                                          if key not in benchmark_children]:
+                child = {"name": child_name, "children": []}
+                member["children"].append(child)
+                pending.append((child, baseline_children.get(child_name), benchmark_children.get(child_name)))
+
+        return differential_stack
 
 
 class CsvFile(Crud):
 
-    def __init__(self, test_case_name=default_test_case_name, test_id=None, delimiter=","):
+    # The exported columns and their Arrow type, the strings that repeat on every row are dictionary-encoded
+    EXPORTED_COLUMNS = {
+        "id": "int64",
+        "test_id": "dictionary",
+        "test_case_name": "dictionary",
+        "sample_id": "dictionary",
+        "name_of_method_under_test": "dictionary",
+        "epoch_timestamp": "int64",
+        "human_timestamp": "string",
+        "child_path": "dictionary",
+        "child_line_number": "int64",
+        "child_function_name": "dictionary",
+        "parent_path": "dictionary",
+        "parent_line_number": "int64",
+        "parent_function_name": "dictionary",
+        "number_of_calls": "string",
+        "total_time": "float64",
+        "cumulative_time": "float64",
+        "total_response_time": "float64"
+    }
+    SUPPORTED_FILE_FORMATS = ("csv", "parquet", "feather")
+
+    def __init__(self, test_case_name=default_test_case_name, test_id=None, delimiter=",", chunk_size=10000):
         """
         Will build up the object, when no test id is given and when test case name is default.
         It will take the last known test id.
@@ -113,11 +260,13 @@ class CsvFile(Crud):
         :param test_case_name: The name of the test case
         :param delimiter: The delimiter of the csv file
         :param test_id: The test id within the test case
+        :param chunk_size: The number of rows that are read from the database and written at once.
         """
         super(CsvFile, self).__init__()
         self.test_case_name = test_case_name
         self.delimiter = delimiter
         self.test_id = test_id
+        self.chunk_size = chunk_size
 
         if self.test_id is None and test_case_name == default_test_case_name:
             self.test_id = self.select_test_ids_with_performance_statistics(database=test_case_name)[-1]
@@ -125,30 +274,98 @@ class CsvFile(Crud):
         elif self.test_id is None:
             raise UnableToGenerateVisualizations()
 
-        self.list_of_samples = self.select_all_sample_ids(test_case_name, self.test_id)
-
-    def export(self, path):
+    def export(self, path, file_format="csv", compression=None):
         """
-        Will export the csv file to a directory on the disk.
+        Will export the raw performance statistics to a directory on the disk.
+        The rows are streamed from the database in chunks, so memory use does not grow with the test.
+
         :param path: The path on disk where the file needs to be written.
                      Example: C:\\temp\\
+        :param file_format: "csv", or the columnar "parquet" and "feather" formats which need pyarrow.
+                            The columnar formats store function names and paths dictionary-encoded.
+        :param compression: "gzip" for csv, the codec of the columnar formats (e.g. "snappy", "zstd" or "lz4").
+        :return: The path of the exported file.
         """
-        if os.path.isdir(path):
-            content = []
-            for sample_id in self.list_of_samples:
-                stack = self.select_call_stack_by_sample_id(self.test_case_name, sample_id)
-                for line in stack:
-                    content.append(line)
-
-            pd.DataFrame(content).to_csv(
-                path_or_buf=f"{path}raw_export_of_{self.test_id}_{str(datetime.now().timestamp())}.csv",
-                sep=self.delimiter,
-                index=False
-            )
+        if file_format not in self.SUPPORTED_FILE_FORMATS:
+            raise ExportFormatNotSupported()
 
-        else:
+        elif os.path.isdir(path) is False:
             raise UnableToExportVisualization()
 
+        name = f"{path}raw_export_of_{self.test_id}_{str(datetime.now().timestamp())}"
+        if file_format == "csv":
+            return self._export_csv(name, compression)
+
+        return self._export_columnar(name, file_format, compression)
+
+    def _chunks(self):
+        """
+        :return: A generator that yields the exported rows as DataFrames of at most chunk_size rows.
+        """
+        for chunk in self.iterate_performance_statistics_in_chunks(
+                self.test_case_name, self.test_id, list(self.EXPORTED_COLUMNS), self.chunk_size):
+            chunk["epoch_timestamp"] = chunk["epoch_timestamp"].astype("int64")
+            yield chunk
+
+    def _export_csv(self, name, compression):
+        """
+        Appends every chunk to the csv file, only the first chunk writes the header.
+        """
+        if compression == "gzip":
+            file_name = f"{name}.csv.gz"
+            file = gzip.open(file_name, "wt", newline="")
+
+        else:
+            file_name = f"{name}.csv"
+            file = open(file_name, "w", newline="")
+
+        with file:
+            header = True
+            for chunk in self._chunks():
+                chunk.to_csv(file, sep=self.delimiter, index=False, header=header)
+                header = False
+
+            if header:
+                pd.DataFrame(columns=list(self.EXPORTED_COLUMNS)).to_csv(file, sep=self.delimiter, index=False)
+
+        return file_name
+
+    def _export_columnar(self, name, file_format, compression):
+        """
+        Converts every chunk into an Arrow table with dictionary-encoded strings.
+        Parquet writes each chunk as a row group, Feather needs one table so the (compact) chunks
+        are combined with unified dictionaries before writing.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            import pyarrow.feather as feather
+
+        except ImportError:
+            raise ExportFormatNotSupported()
+
+        schema = pa.schema([
+            pa.field(column, pa.dictionary(pa.int32(), pa.string()) if arrow_type == "dictionary"
+                     else pa.type_for_alias(arrow_type))
+            for column, arrow_type in self.EXPORTED_COLUMNS.items()
+        ])
+
+        def to_table(chunk):
+            chunk = chunk.astype({"human_timestamp": str, "number_of_calls": str})
+            return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+        file_name = f"{name}.{file_format}"
+        if file_format == "parquet":
+            with pq.ParquetWriter(file_name, schema, compression=compression or "snappy") as writer:
+                for chunk in self._chunks():
+                    writer.write_table(to_table(chunk))
+            return file_name
+
+        tables = [to_table(chunk) for chunk in self._chunks()]
+        table = pa.concat_tables(tables).unify_dictionaries() if len(tables) > 0 else schema.empty_table()
+        feather.write_feather(table.combine_chunks(), file_name, compression=compression)
+        return file_name
+
 
 class HeatMap(CodePaths):
 
@@ -172,17 +389,32 @@ class HeatMap(CodePaths):
         self._order_by = order_by
         self.test_case_name = test_case_name
         self._all_recorded_method_response_times = []
+        self._frame_index = {}
 
-        self.statistics = {}
-        self.sample_list = {}
-        for tid in test_ids:
-            self.sample_list[tid] = self.select_all_sample_ids(test_case_name, tid)
-            self.statistics[tid] = {}
-            for sample in self.sample_list[tid]:
-                self.statistics[tid][sample] = self.select_call_stack_by_sample_id(test_case_name, sample)
+        self.statistics = {tid: {} for tid in self.list_of_test_ids}
+        self.sample_list = {tid: [] for tid in self.list_of_test_ids}
+        for tid, sample, collected_stack in self.select_call_stacks_by_test_ids(test_case_name, self.list_of_test_ids):
+            self.sample_list[tid].append(sample)
+            self.statistics[tid][sample] = collected_stack
 
         self.json = self.generate_json_payload(detect_code_paths)
 
+    def _index_frames(self, sample_id, test_id):
+        """
+        Indexes the frames of a sample by their parent and child function, the first frame of a pair wins.
+
+        :param sample_id:
+        :param test_id:
+        :return: A dictionary with a (parent function name, child function name) tuple as key and the frame as value.
+        """
+        if (test_id, sample_id) not in self._frame_index:
+            index = {}
+            for frame in self.statistics[test_id][sample_id]:
+                index.setdefault((frame["parent_function_name"], frame["child_function_name"]), frame)
+            self._frame_index[(test_id, sample_id)] = index
+
+        return self._frame_index[(test_id, sample_id)]
+
     def look_up_method_latency(self, parent_function_name, child_function_name, sample_id, test_id):
         """
 
@@ -192,14 +424,9 @@ class HeatMap(CodePaths):
         :param test_id:
         :return:
         """
-        for frame in self.statistics[test_id][sample_id]:
-            if frame["sample_id"] == sample_id and child_function_name == frame["child_function_name"] \
-                    and parent_function_name == frame["parent_function_name"]:
-                time = float(format(frame["cumulative_time"], f".{self._decimals}f").lstrip().rstrip('0'))
-                return time
-
-            else:
-                continue
+        frame = self._index_frames(sample_id, test_id).get((parent_function_name, child_function_name))
+        if frame is not None:
+            return float(format(frame["cumulative_time"], f".{self._decimals}f").lstrip().rstrip('0'))
 
     def look_up_method_meta_data(self, parent_function_name, child_function_name, sample_id, test_id):
         """
@@ -210,19 +437,15 @@ class HeatMap(CodePaths):
         :param test_id:
         :return:
         """
-        for frame in self.statistics[test_id][sample_id]:
-            if frame["sample_id"] == sample_id and child_function_name == frame["child_function_name"] \
-                    and parent_function_name == frame["parent_function_name"]:
-                return {
-                    "parent_path": frame["parent_path"],
-                    "parent_line_number": frame["parent_line_number"],
-                    "child_path": frame["child_path"],
-                    "child_line_number": frame["child_line_number"],
-                    "number_of_calls": frame["number_of_calls"],
-                }
-
-            else:
-                continue
+        frame = self._index_frames(sample_id, test_id).get((parent_function_name, child_function_name))
+        if frame is not None:
+            return {
+                "parent_path": frame["parent_path"],
+                "parent_line_number": frame["parent_line_number"],
+                "child_path": frame["child_path"],
+                "child_line_number": frame["child_line_number"],
+                "number_of_calls": frame["number_of_calls"],
+            }
 
     @staticmethod
     def generate_y_axis_identifier(parent, child, sample_id):
@@ -256,23 +479,21 @@ class HeatMap(CodePaths):
             for sample_id in self.sample_list[test_id]:
 
                 if detect_code_paths:
-                    hierarchical_stack = self._map_out_hierarchical_stack_relationships(self.test_case_name, sample_id)
+                    code_paths = self._map_out_code_paths(
+                        self._build_hierarchical_stack(self.statistics[test_id][sample_id])
+                    )
 
                 else:
-                    hierarchical_stack = None
+                    code_paths = None
 
                 for frame in self.statistics[test_id][sample_id]:
 
                     parent_function = frame['parent_function_name']
                     child_function = frame['child_function_name']
 
-                    if hierarchical_stack is not None:
-                        predicted_code_path = self._recursively_search_hierarchical_stack(
-                            hierarchical_stack,
-                            frame['parent_function_name'],
-                            frame['child_function_name'],
-                            history=[]
-                        )
+                    if code_paths is not None:
+                        predicted_code_path = code_paths[parent_function] + [child_function] \
+                            if parent_function in code_paths else None
                     else:
                         predicted_code_path = "Code path could not be predicted."
 
@@ -333,65 +554,80 @@ class HeatMap(CodePaths):
 
 class BarChart(Crud):
 
-    def __init__(self, test_case_name=default_test_case_name, test_ids=None, order_by="latency"):
+    def __init__(self, test_case_name=default_test_case_name, test_ids=None, order_by="latency", top_n=None):
         """
+        Shows per test id how the average time of a sample is spread over the called methods.
 
         :param test_case_name:
         :param test_ids:
         :param order_by:
+        :param top_n: When defined only the top N method signatures with the most time are shown,
+                      the time of all other method signatures is combined into "other".
         """
         super(BarChart, self).__init__()
 
         # Sorting out the test-id's
         self.test_case_name = test_case_name
         self._order_by = order_by
-        if test_ids is None or type(test_ids) is not list:
-            raise UnableToGenerateVisualizations()
-
-        elif test_ids is None and test_case_name == default_test_case_name:
+        if test_ids is None and test_case_name == default_test_case_name:
             self.list_of_test_ids = [self.select_test_ids_with_performance_statistics(database=test_case_name)[-1]]
 
+        elif test_ids is None or type(test_ids) is not list:
+            raise UnableToGenerateVisualizations()
+
         else:
             self.list_of_test_ids = test_ids
 
         # Gathering relevant performance metrics
-        self.statistics = {}
-        for tid in self.list_of_test_ids:
-            self.statistics[tid] = self.select_call_stack_by_test_id(test_case_name, tid)
-
+        self.statistics = self.select_performance_statistics_as_data_frame(
+            test_case_name,
+            self.list_of_test_ids,
+            columns=["test_id", "sample_id", "parent_function_name", "child_function_name", "cumulative_time"]
+        )
+        self.data_frame = self.aggregate_statistics(top_n)
         self.json = self.generate_json()
 
-    def generate_json(self):
+    def aggregate_statistics(self, top_n=None):
         """
+        Sums the time of every method signature per test id with a single group by
+        and divides it by the number of samples of the test id.
 
-        :return:
+        :param top_n: The number of method signatures that are kept, the rest is folded into "other".
+        :return: A DataFrame with the columns test_id, method_signature and latency.
         """
-        payload = []
-        for tid in self.list_of_test_ids:
-            for row in self.statistics[tid]:
+        statistics = self.statistics
+        method_signatures = numpy.where(
+            statistics["parent_function_name"] == statistics["sample_id"],
+            statistics["child_function_name"],
+            statistics["parent_function_name"] + "/" + statistics["child_function_name"]
+        )
+        statistics = statistics.assign(method_signature=method_signatures)
 
-                if row['parent_function_name'] == row['sample_id']:
-                    method_signature = row['child_function_name']
+        aggregated = statistics.groupby(["test_id", "method_signature"], sort=False)["cumulative_time"].sum()
+        number_of_samples = statistics.groupby("test_id")["sample_id"].nunique()
+        aggregated = (aggregated / number_of_samples.reindex(aggregated.index.get_level_values("test_id")).values)
+        aggregated = aggregated.rename("latency").reset_index()
 
-                else:
-                    method_signature = f"{row['parent_function_name']}/{row['child_function_name']}"
-
-                payload.append(
-                    {
-                        "sample_id": row['sample_id'],
-                        "test_id": tid,
-                        "method_signature": method_signature,
-                        "latency": row['cumulative_time']
-                    }
-                )
-        return sorted(payload, key=lambda k: k[self._order_by], reverse=True)
+        if top_n is not None and aggregated["method_signature"].nunique() > top_n:
+            kept = aggregated.groupby("method_signature")["latency"].sum().nlargest(top_n).index
+            aggregated.loc[~aggregated["method_signature"].isin(kept), "method_signature"] = "other"
+            aggregated = aggregated.groupby(["test_id", "method_signature"], sort=False)["latency"].sum().reset_index()
+
+        return aggregated
+
+    def generate_json(self):
+        """
+
+        :return:
+        """
+        return self.data_frame.sort_values(self._order_by, ascending=False).to_dict("records")
 
     def render_html(self):
         """
 
         :return:
         """
-        df = pd.DataFrame(self.json)
+        df = self.data_frame.sort_values(self._order_by, ascending=False)
         fig = go.Figure()
         fig.update_layout(
             title="<span style='font-size: 22px;'>QuickPotato Method Performance Bar Chart</span>",
@@ -404,19 +640,17 @@ class BarChart(Crud):
             )
         )
 
-        for method_signature in df.method_signature.unique():
-            plot_df = df[df.method_signature == method_signature]
+        for method_signature, plot_df in df.groupby("method_signature", sort=False):
             fig.add_trace(
                 go.Bar(
-                    x=[plot_df.test_id, plot_df.sample_id],
+                    x=plot_df.test_id,
                     y=plot_df.latency,
                     name=method_signature,
                     meta=[method_signature],
                     hovertemplate=
-                    '<br>Test-ID: %{x[0]}</b>'
-                    '<br>Sample-ID: %{x[1]}</b>'
+                    '<br>Test-ID: %{x}</b>'
                     '<br>method name: %{meta[0]}</b>' +
-                    '<br>Time Spent %{y}</b>' +
+                    '<br>Average time spent per sample %{y}</b>' +
                     '<extra></extra>'
                 ),
             )
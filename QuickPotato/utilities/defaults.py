@@ -27,10 +27,24 @@ template_for_service_level_agreement_threshold_policy = {
 default_quick_potato_configuration = {
 
     "enable_intrusive_profiling": True,
+    "profiling_mode": "deterministic",
+    "sampling_profiler_interval": 0.005,
+    "sample_one_in": 1,
+    "maximum_profiles_per_second": None,
+    "maximum_profiles_per_test_id": None,
+    "enable_profiler_overhead_correction": False,
+    "profiler_overhead_per_call": None,
     "enable_system_resource_collection": False,
+    "enable_allocation_profiling": False,
+    "number_of_allocation_sites": 10,
     "connection_url": None,
     "enable_database_echo": False,
     "enable_asynchronous_payload_delivery": False,
+    "payload_delivery_queue_size": 10000,
+    "payload_delivery_batch_size": 500,
+    "payload_delivery_flush_interval": 1.0,
+    "payload_delivery_drop_policy": "block",
+    "storage_mode": "samples",
     "enable_the_selection_of_untested_or_failed_test_ids": True,
     "enable_auto_clean_up_old_test_results": True,
     "maximum_number_saved_test_results": 100,
@@ -67,3 +67,54 @@ class UnableToExportVisualization(Exception):
     """
     def __str__(self):
         return self.__doc__
+
+
+class ExportFormatNotSupported(Exception):
+    """
+    QuickPotato is unable to export to the selected file format.
+    Please pick one of the supported formats: "csv", "parquet" or "feather".
+    The parquet and feather formats require the optional pyarrow package to be installed.
+    For more help, please consult the QuickPotato Documentation.
+    """
+    def __str__(self):
+        return self.__doc__
+
+
+class ProfilingModeNotSupported(Exception):
+    """
+    QuickPotato does not recognize the selected profiling mode.
+    Please pick one of the supported modes: "deterministic", "sampling" or "timing".
+    For more help, please consult the QuickPotato Documentation.
+    """
+    def __str__(self):
+        return self.__doc__
+
+
+class PayloadDropPolicyNotSupported(Exception):
+    """
+    QuickPotato does not recognize the selected payload drop policy.
+    Please pick one of the supported policies: "block" or "drop".
+    For more help, please consult the QuickPotato Documentation.
+    """
+    def __str__(self):
+        return self.__doc__
+
+
+class StorageModeNotSupported(Exception):
+    """
+    QuickPotato does not recognize the selected storage mode.
+    Please pick one of the supported modes: "samples" or "aggregate".
+    For more help, please consult the QuickPotato Documentation.
+    """
+    def __str__(self):
+        return self.__doc__
+
+
+class PayloadDeliveryFailed(Exception):
+    """
+    QuickPotato was unable to write one or more batches of profiled samples to the database.
+    The samples of these batches are lost, the cause is attached to this exception.
+    For more help, please consult the QuickPotato Documentation.
+    """
+    def __str__(self):
+        return self.__doc__
@@ -137,7 +137,7 @@ flame_graph_template = """
       .sort(true)
       .title("")
       .onClick(onClick)
-      .differential(false)
+      .differential({{ "true" if differential else "false" }})
       .selfValue(false);
 
       var details = document.getElementById("details");
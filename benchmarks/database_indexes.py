@@ -0,0 +1,115 @@
+"""
+Measures the effect of the performance_statistics and samples indexes on the most common reads.
+
+The benchmark fills a table without indexes with a synthetic test case, times the reads,
+upgrades the schema (which creates the missing indexes like it would for an existing database)
+and times the same reads again.
+
+Usage: python benchmarks/database_indexes.py [test ids] [samples per test id] [rows per sample]
+"""
+from QuickPotato.database.queries import Crud
+from time import perf_counter
+import random
+import sys
+
+DATABASE_NAME = "quick_potato_benchmark_indexes"
+
+
+def populate(database_manager, number_of_test_ids, number_of_samples, number_of_rows):
+    tables = [database_manager.samples_schema(), database_manager.performance_statistics_schema()]
+    engine = database_manager.spawn_engine(DATABASE_NAME)
+    for table in tables:
+        table.create(engine)
+        for index in table.indexes:
+            # Mimics a database that was created before the indexes existed
+            index.drop(engine)
+
+    functions = database_manager.functions_schema()
+    functions.create(engine)
+    database_manager.insert_functions(
+        DATABASE_NAME, [("benchmark.py", row_number, f"function_{row_number}") for row_number in range(0, number_of_rows)]
+    )
+    function_ids = {name: function_id for (_, _, name), function_id in
+                    database_manager.select_function_ids(DATABASE_NAME).items()}
+
+    with engine.begin() as connection:
+        for test_number in range(0, number_of_test_ids):
+            samples = []
+            rows = []
+            for sample_number in range(0, number_of_samples):
+                sample_id = f"S{test_number:05d}{sample_number:05d}"
+                samples.append({
+                    "test_id": f"TEST{test_number:05d}",
+                    "test_case_name": DATABASE_NAME,
+                    "sample_id": sample_id,
+                    "name_of_method_under_test": "benchmark",
+                    "epoch_timestamp": 0,
+                    "human_timestamp": "",
+                    "total_response_time": random.random(),
+                })
+                for row_number in range(0, number_of_rows):
+                    rows.append({
+                        "test_id": f"TEST{test_number:05d}",
+                        "sample_id": sample_id,
+                        "child_function_id": function_ids[f"function_{row_number}"],
+                        "parent_function_id": function_ids.get(f"function_{row_number - 1}"),
+                        "number_of_calls": 1,
+                        "total_time": random.random(),
+                        "cumulative_time": random.random(),
+                    })
+            connection.execute(tables[0].insert(), samples)
+            connection.execute(tables[1].insert(), rows)
+
+
+def time_reads(database_manager, number_of_test_ids, number_of_samples, repetitions=20):
+    test_ids = [f"TEST{random.randrange(number_of_test_ids):05d}" for _ in range(0, repetitions)]
+    sample_ids = [f"S{random.randrange(number_of_test_ids):05d}{random.randrange(number_of_samples):05d}"
+                  for _ in range(0, repetitions)]
+
+    reads = {
+        "select_call_stack_by_sample_id": lambda: [
+            database_manager.select_call_stack_by_sample_id(DATABASE_NAME, sample_id) for sample_id in sample_ids],
+        "select_response_times": lambda: [
+            database_manager.select_response_times(DATABASE_NAME, test_id) for test_id in test_ids],
+        "select_all_sample_ids": lambda: [
+            database_manager.select_all_sample_ids(DATABASE_NAME, test_id) for test_id in test_ids],
+        "select_call_stack_by_test_id": lambda: [
+            database_manager.select_call_stack_by_test_id(DATABASE_NAME, test_id) for test_id in test_ids[0:5]],
+    }
+
+    timings = {}
+    for name, read in reads.items():
+        start_time = perf_counter()
+        read()
+        timings[name] = (perf_counter() - start_time) / (5 if name == "select_call_stack_by_test_id" else repetitions)
+    return timings
+
+
+def main(number_of_test_ids=100, number_of_samples=50, number_of_rows=100):
+    random.seed(0)
+    database_manager = Crud()
+    database_manager.delete_result_database(DATABASE_NAME)
+    database_manager.spawn_result_database(DATABASE_NAME)
+
+    populate(database_manager, number_of_test_ids, number_of_samples, number_of_rows)
+    print(f"{number_of_test_ids * number_of_samples * number_of_rows} rows, "
+          f"{number_of_test_ids} test ids, {number_of_samples} samples per test id")
+
+    without_indexes = time_reads(database_manager, number_of_test_ids, number_of_samples)
+
+    start_time = perf_counter()
+    database_manager.spawn_performance_statistics_schema(DATABASE_NAME)
+    print(f"Upgrading the schema took {perf_counter() - start_time:.2f}s")
+
+    with_indexes = time_reads(database_manager, number_of_test_ids, number_of_samples)
+
+    print(f"{'read':<32}{'without (ms)':>14}{'with (ms)':>12}{'speedup':>10}")
+    for name in without_indexes:
+        print(f"{name:<32}{without_indexes[name] * 1000:>14.2f}{with_indexes[name] * 1000:>12.2f}"
+              f"{without_indexes[name] / with_indexes[name]:>9.1f}x")
+
+    database_manager.delete_result_database(DATABASE_NAME)
+
+
+if __name__ == "__main__":
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""
+Measures how the construction of a flame graph scales with the size of the call stack.
+
+A synthetic sample is generated for every stack size, each function gets a unique name and is called
+by either a recent function (deep stacks) or a random earlier function (wide stacks).
+The timings cover building the hierarchical stack and weighing every frame by its time.
+
+Usage: python benchmarks/flame_graph_construction.py [stack size] [stack size] ...
+"""
+from QuickPotato.statistical.data import CodePaths
+from QuickPotato.statistical.visualizations import FlameGraph
+from time import perf_counter
+import random
+import sys
+
+
+def generate_collected_stack(number_of_rows):
+    random.seed(0)
+    collected_stack = [{"sample_id": "SAMPLE", "parent_function_name": "SAMPLE", "child_function_name": "f0",
+                        "total_time": 0.0, "cumulative_time": 1.0}]
+    for number in range(1, number_of_rows):
+        if number % 2 == 1:
+            parent = random.randrange(max(0, number - 5), number)
+        else:
+            parent = random.randrange(0, number)
+        collected_stack.append(
+            {"sample_id": "SAMPLE", "parent_function_name": f"f{parent}", "child_function_name": f"f{number}",
+             "total_time": random.random() / number_of_rows, "cumulative_time": random.random() / 10}
+        )
+    return collected_stack
+
+
+def main(stack_sizes=(100, 1000, 2500, 5000, 10000, 100000)):
+    print(f"{'rows':>8}{'seconds':>12}")
+    for number_of_rows in stack_sizes:
+        collected_stack = generate_collected_stack(number_of_rows)
+        start_time = perf_counter()
+        FlameGraph._weigh_frames_by_time(CodePaths._build_hierarchical_stack(collected_stack))
+        print(f"{number_of_rows:>8}{perf_counter() - start_time:>12.4f}")
+
+
+if __name__ == "__main__":
+    main([int(argument) for argument in sys.argv[1:]] or (100, 1000, 2500, 5000, 10000, 100000))
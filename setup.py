@@ -22,6 +22,9 @@ setup(
         'PyYAML',
         'Jinja2'
     ],
+    extras_require={
+        'columnar': ['pyarrow']
+    },
     url='https://github.com/JoeyHendricks/QuickPotato',
     license='MIT',
     author='Joey Hendricks',
@@ -1,13 +1,22 @@
 from QuickPotato.profiling.intrusive import performance_test as pt
 from QuickPotato.database.queries import Crud
 from QuickPotato.configuration.management import options
+from QuickPotato.profiling.intrusive import performance_breakpoint
+from QuickPotato.statistical.data import TestSummary
 from examples.example_code import *
+import numpy as np
 import unittest
 
 SAMPLE_SIZE = 10
 UNIT_TEST_DATABASE_NAME = "unit_test"
 
 
+@performance_breakpoint(mode="timing", trace_allocations=True)
+def memory_hungry_method():
+    data = [str(number) for number in range(0, 100000)]
+    return len(data)
+
+
 class TestPerformanceBoundaries(unittest.TestCase):
 
     def setUp(self):
@@ -103,3 +112,98 @@ class TestPerformanceBoundaries(unittest.TestCase):
         results = pt.verify_benchmark_against_set_boundaries()
 
         self.assertTrue(results)
+
+    def test_output_with_boundary_on_cpu_time(self):
+        """
+
+        """
+        # Define Test Case
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.boundary_metric = "total_cpu_time"
+        pt.max_and_min_boundary_for_average = {"max": 1, "min": 0.001}
+
+        # Execute method under test
+        for _ in range(0, SAMPLE_SIZE):
+            slow_method()
+
+        # Analyse profiled results
+        results = pt.verify_benchmark_against_set_boundaries()
+        pt.boundary_metric = "total_response_time"
+
+        self.assertTrue(results)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+    def test_output_with_breached_memory_boundary(self):
+        """
+
+        """
+        # Define Test Case
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.max_and_min_boundary_for_peak_memory = {"max": 1024, "min": None}
+
+        # Execute method under test
+        for _ in range(0, SAMPLE_SIZE):
+            memory_hungry_method()
+
+        # Analyse profiled results
+        results = pt.verify_benchmark_against_set_boundaries()
+        pt.max_and_min_boundary_for_peak_memory = {"max": None, "min": None}
+
+        self.assertFalse(results)
+        allocations = pt.select_memory_allocation_statistics(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(len(allocations), SAMPLE_SIZE)
+        self.assertGreater(allocations[0]["peak_traced_memory"], 1024)
+        self.assertGreater(len(pt.select_memory_allocation_sites(UNIT_TEST_DATABASE_NAME, allocations[0]["sample_id"])), 0)
+
+    def test_memory_boundary_without_traced_allocations(self):
+        """
+
+        """
+        # Define Test Case
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.max_and_min_boundary_for_peak_memory = {"max": 1024, "min": None}
+
+        # Execute method under test
+        for _ in range(0, SAMPLE_SIZE):
+            fast_method()
+
+        # Analyse profiled results
+        results = pt.verify_benchmark_against_set_boundaries()
+        pt.max_and_min_boundary_for_peak_memory = {"max": None, "min": None}
+
+        self.assertTrue(results)
+        self.assertIsNone(pt.metric_peak_memory())
+
+    def test_summary_is_saved_at_verification(self):
+        """
+
+        """
+        # Define Test Case
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.max_and_min_boundary_for_average = {"max": 1, "min": 0.0}
+
+        # Execute method under test
+        for _ in range(0, SAMPLE_SIZE):
+            fast_method()
+
+        # Analyse profiled results
+        self.assertTrue(pt.verify_benchmark_against_set_boundaries())
+
+        response_times = pt.benchmark_measurements.response_times()
+        summary = pt.select_test_summary(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(summary["number_of_samples"], SAMPLE_SIZE)
+        self.assertAlmostEqual(summary["mean"], float(np.mean(response_times)))
+        self.assertAlmostEqual(summary["percentile_50th"], float(np.median(response_times)))
+        self.assertAlmostEqual(summary["maximum"], max(response_times))
+
+        stored_summary = TestSummary(pt.current_test_id, UNIT_TEST_DATABASE_NAME)
+        self.assertTrue(stored_summary.stored)
+        self.assertEqual(sum(stored_summary.histogram["counts"]), SAMPLE_SIZE)
+        self.assertEqual(pt.metric_percentile_95th(), stored_summary.percentile(95))
+
+        # The summary is reused until a sample is added to the benchmark
+        summary = pt._collect_benchmark_summary(pt.boundary_metric)
+        self.assertIs(pt._collect_benchmark_summary(pt.boundary_metric), summary)
+        fast_method()
+        pt.verify_benchmark_against_set_boundaries()
+        self.assertEqual(pt._collect_benchmark_summary(pt.boundary_metric).number_of_samples, SAMPLE_SIZE + 1)
@@ -0,0 +1,244 @@
+from QuickPotato.profiling.intrusive import performance_test as pt
+from QuickPotato.database.queries import Crud
+from QuickPotato.database.operations import ContextManager
+from QuickPotato.profiling.interpreters import StatisticsInterpreter
+from sqlalchemy.exc import IntegrityError
+from multiprocessing import get_context
+from sqlalchemy import inspect, select, func, MetaData, Table, Column, Integer, Float, String
+import unittest
+
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_database"
+
+
+def busy_method():
+    return sum(number % 7 for number in range(0, 10000))
+
+
+def count_engines_in_child():
+    return len(ContextManager._engines)
+
+
+class TestDatabaseEngines(unittest.TestCase):
+
+    def tearDown(self):
+        """
+
+        """
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_engine_is_cached_per_database(self):
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.spawn_result_database(UNIT_TEST_DATABASE_NAME)
+        database_manager.spawn_performance_statistics_schema(UNIT_TEST_DATABASE_NAME)
+
+        engine = database_manager.spawn_engine(UNIT_TEST_DATABASE_NAME)
+        self.assertIs(engine, Crud().spawn_engine(UNIT_TEST_DATABASE_NAME))
+        self.assertEqual(database_manager.select_count_of_test_ids(UNIT_TEST_DATABASE_NAME), 0)
+        self.assertIs(engine, database_manager.spawn_engine(UNIT_TEST_DATABASE_NAME))
+
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+        self.assertNotIn(engine, ContextManager._engines.values())
+
+    def test_forked_child_starts_without_engines(self):
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.spawn_engine(UNIT_TEST_DATABASE_NAME)
+
+        with get_context("fork").Pool(processes=1) as pool:
+            self.assertEqual(pool.apply(count_engines_in_child), 0)
+        self.assertGreater(len(ContextManager._engines), 0)
+
+    def test_upgrade_schema_creates_missing_indexes(self):
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.spawn_result_database(UNIT_TEST_DATABASE_NAME)
+        engine = database_manager.spawn_engine(UNIT_TEST_DATABASE_NAME)
+
+        table = database_manager.performance_statistics_schema()
+        table.create(engine)
+        for index in table.indexes:
+            index.drop(engine)
+        self.assertEqual(len(inspect(engine).get_indexes(table.name)), 0)
+
+        database_manager.spawn_performance_statistics_schema(UNIT_TEST_DATABASE_NAME)
+        self.assertEqual(
+            sorted(index["name"] for index in inspect(engine).get_indexes(table.name)),
+            sorted(index.name for index in table.indexes)
+        )
+
+    def test_test_ids_are_ordered_by_creation(self):
+        """
+
+        """
+        database_manager = Crud()
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        test_ids = ["ZZZ", "AAA", "MMM"]
+        for number, test_id in enumerate(test_ids):
+            database_manager.insert_payload_in_bulk(UNIT_TEST_DATABASE_NAME, {
+                "samples": [{"test_id": test_id, "sample_id": f"{test_id}{number}", "total_response_time": 0.1}]
+            })
+            database_manager.insert_results_into_test_report(
+                UNIT_TEST_DATABASE_NAME, {"test_id": test_id, "test_case_name": UNIT_TEST_DATABASE_NAME, "status": True}
+            )
+
+        self.assertEqual(database_manager.select_test_ids_with_performance_statistics(UNIT_TEST_DATABASE_NAME), test_ids)
+        self.assertEqual(database_manager.select_validated_test_ids(UNIT_TEST_DATABASE_NAME), test_ids)
+        self.assertEqual(database_manager.select_previous_test_id(UNIT_TEST_DATABASE_NAME), "MMM")
+        self.assertEqual(
+            database_manager.select_test_ids_with_performance_statistics(UNIT_TEST_DATABASE_NAME, number=2),
+            ["ZZZ", "AAA"]
+        )
+
+    def test_columnar_reads(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, iteration=5)
+
+        stacks = list(pt.select_call_stacks_by_test_ids(UNIT_TEST_DATABASE_NAME, pt.current_test_id))
+        data_frame = pt.select_performance_statistics_as_data_frame(
+            UNIT_TEST_DATABASE_NAME, [pt.current_test_id], chunk_size=3
+        )
+        self.assertEqual(len(data_frame), sum(len(stack) for _, _, stack in stacks))
+        self.assertEqual(data_frame["sample_id"].nunique(), 5)
+
+        array = pt.select_performance_statistics_as_array(
+            UNIT_TEST_DATABASE_NAME, pt.current_test_id, columns=["sample_id", "cumulative_time"]
+        )
+        self.assertEqual(array.dtype.names, ("sample_id", "cumulative_time"))
+        self.assertEqual(len(array), len(data_frame))
+
+        response_times = pt.select_response_times_as_array(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(
+            sorted(response_times.tolist()),
+            sorted(pt.select_response_times(UNIT_TEST_DATABASE_NAME, pt.current_test_id))
+        )
+        self.assertEqual(len(pt.select_performance_statistics_as_data_frame(UNIT_TEST_DATABASE_NAME, "unknown")), 0)
+
+    def test_samples_are_stored_once_per_sample(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, iteration=5)
+
+        engine = pt.spawn_engine(UNIT_TEST_DATABASE_NAME)
+        samples = pt.samples_schema()
+        self.assertEqual(engine.execute(select([func.count()]).select_from(samples)).scalar(), 5)
+        self.assertNotIn(
+            "total_response_time",
+            [column["name"] for column in inspect(engine).get_columns("performance_statistics")]
+        )
+
+        stack = pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual({row["name_of_method_under_test"] for row in stack}, {"busy_method"})
+        self.assertEqual(len(pt.select_test_id_description(UNIT_TEST_DATABASE_NAME, pt.current_test_id)), 5)
+
+    def test_legacy_databases_are_migrated(self):
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.spawn_result_database(UNIT_TEST_DATABASE_NAME)
+        engine = database_manager.spawn_engine(UNIT_TEST_DATABASE_NAME)
+
+        # The layout of the performance statistics before the samples and functions tables existed
+        legacy_table = Table(
+            "performance_statistics", MetaData(),
+            Column('id', Integer, primary_key=True),
+            Column('test_id', String(99)),
+            Column("test_case_name", String(999)),
+            Column('sample_id', String(99)),
+            Column("name_of_method_under_test", String(999)),
+            Column("epoch_timestamp", Integer),
+            Column("human_timestamp", String(99)),
+            Column("child_path", String(999)),
+            Column("child_line_number", Integer),
+            Column("child_function_name", String(999)),
+            Column("parent_path", String(999)),
+            Column("parent_line_number", Integer),
+            Column("parent_function_name", String(999)),
+            Column("total_time", Float),
+            Column("cumulative_time", Float),
+            Column("total_response_time", Float),
+        )
+        legacy_table.create(engine)
+        engine.execute(legacy_table.insert(), [
+            {"test_id": "LEGACY", "test_case_name": UNIT_TEST_DATABASE_NAME, "sample_id": f"SAMPLE{sample}",
+             "name_of_method_under_test": "legacy_method", "epoch_timestamp": 0, "human_timestamp": "",
+             "child_path": "legacy.py", "child_line_number": row, "child_function_name": f"function_{row}",
+             "parent_path": "legacy.py" if row > 0 else "~", "parent_line_number": row - 1 if row > 0 else 0,
+             "parent_function_name": f"function_{row - 1}" if row > 0 else f"SAMPLE{sample}",
+             "total_time": 0.1, "cumulative_time": 0.3 - row * 0.1, "total_response_time": float(sample)}
+            for sample in range(1, 3) for row in range(0, 3)
+        ])
+
+        database_manager.spawn_performance_statistics_schema(UNIT_TEST_DATABASE_NAME)
+        self.assertEqual(database_manager.select_response_times(UNIT_TEST_DATABASE_NAME, "LEGACY"), [1.0, 2.0])
+        stack = database_manager.select_call_stack_by_sample_id(UNIT_TEST_DATABASE_NAME, "SAMPLE1")
+        self.assertEqual([row["child_function_name"] for row in stack], ["function_0", "function_1", "function_2"])
+        self.assertEqual([row["parent_function_name"] for row in stack], ["SAMPLE1", "function_0", "function_1"])
+        self.assertEqual((stack[0]["parent_path"], stack[0]["parent_line_number"]), ("~", 0))
+        self.assertEqual(len(database_manager.select_function_ids(UNIT_TEST_DATABASE_NAME)), 3)
+
+        # The migration only runs when the samples table is created
+        database_manager.spawn_performance_statistics_schema(UNIT_TEST_DATABASE_NAME)
+        self.assertEqual(len(database_manager.select_response_times(UNIT_TEST_DATABASE_NAME, "LEGACY")), 2)
+
+    def test_functions_are_interned(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, iteration=3)
+
+        function_ids = pt.select_function_ids(UNIT_TEST_DATABASE_NAME)
+        stacks = list(pt.select_call_stacks_by_test_ids(UNIT_TEST_DATABASE_NAME, pt.current_test_id))
+        self.assertEqual(len(stacks), 3)
+        for _, sample_id, stack in stacks:
+            root = [row for row in stack if row["parent_function_name"] == sample_id]
+            self.assertEqual([row["child_function_name"] for row in root], ["busy_method"])
+            for row in stack:
+                self.assertIn((row["child_path"], row["child_line_number"], row["child_function_name"]), function_ids)
+
+        # Profiling the same functions again does not intern them a second time
+        pt.measure_method_performance(method=busy_method, iteration=3)
+        self.assertEqual(pt.select_function_ids(UNIT_TEST_DATABASE_NAME), function_ids)
+
+    def test_function_interning_gives_up_on_conflicts(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        function = ("conflicting.py", 1, "conflicting_method")
+        interpreter = StatisticsInterpreter(
+            database_name=UNIT_TEST_DATABASE_NAME, performance_statistics={function: (1, 1, 0.1, 0.1, {})},
+            total_response_time=0.1, method_name="conflicting_method", sample_id="CONFLICT",
+            test_id=pt.current_test_id, deliver_payload=False
+        )
+        attempts = []
+
+        def conflicting_insert(database, functions):
+            attempts.append(functions)
+            raise IntegrityError("INSERT", {}, Exception())
+
+        interpreter.insert_functions = conflicting_insert
+        with self.assertRaises(IntegrityError):
+            interpreter.intern_functions()
+        self.assertEqual(len(attempts), StatisticsInterpreter.FUNCTION_INTERNING_ATTEMPTS)
@@ -0,0 +1,105 @@
+from QuickPotato.profiling.intrusive import performance_test as pt
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+from QuickPotato.profiling import instrumentation
+import unittest
+import os
+
+SAMPLE_SIZE = 5
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_harness"
+
+
+def busy_method(size=20000):
+    total = 0
+    for number in range(0, size):
+        total += number % 7
+    return total
+
+
+class TestPerformanceTestHarness(unittest.TestCase):
+
+    def setUp(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = True
+
+    def tearDown(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = False
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_wind_up_iterations_are_not_recorded(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, iteration=SAMPLE_SIZE, wind_up=3)
+
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+    def test_automatic_wind_up(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        iterations = pt._wind_up_code_under_test(
+            method=busy_method,
+            arguments=[],
+            wind_up=2,
+            automatic_wind_up=True,
+            wind_up_variation=1.0,
+            maximum_wind_up=50
+        )
+        self.assertEqual(iterations, pt.WIND_UP_WINDOW)
+
+        pt.measure_method_performance(method=busy_method, arguments=[1000], iteration=SAMPLE_SIZE,
+                                      automatic_wind_up=True, maximum_wind_up=20)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+    def test_measure_method_performance_in_processes(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, iteration=SAMPLE_SIZE, processes=2, wind_up=3)
+
+        sample_ids = pt.select_all_sample_ids(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+        self.assertEqual(len(set(sample_ids)), SAMPLE_SIZE)
+
+    def test_profiler_overhead_is_calibrated_once_for_all_processes(self):
+        """
+
+        """
+        parent = os.getpid()
+        calibrate_profiler_overhead = instrumentation.calibrate_profiler_overhead
+
+        def calibrate_in_parent_only():
+            if os.getpid() != parent:
+                raise AssertionError("A worker process calibrated the profiler overhead")
+            return calibrate_profiler_overhead(iterations=10000, rounds=1)
+
+        instrumentation.calibrate_profiler_overhead = calibrate_in_parent_only
+        options.enable_profiler_overhead_correction = True
+        options.profiler_overhead_per_call = None
+        try:
+            pt.test_case_name = UNIT_TEST_DATABASE_NAME
+            pt.measure_method_performance(method=busy_method, iteration=SAMPLE_SIZE, processes=2)
+            self.assertIsNotNone(options.profiler_overhead_per_call)
+            self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+        finally:
+            instrumentation.calibrate_profiler_overhead = calibrate_profiler_overhead
+            options.enable_profiler_overhead_correction = False
+            options.profiler_overhead_per_call = None
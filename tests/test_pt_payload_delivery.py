@@ -0,0 +1,121 @@
+from QuickPotato.profiling.intrusive import performance_test as pt, performance_breakpoint
+from QuickPotato.database.writer import PayloadWriter, payload_writer
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+from QuickPotato.utilities.exceptions import PayloadDropPolicyNotSupported, PayloadDeliveryFailed
+from threading import Thread
+import unittest
+
+SAMPLE_SIZE = 25
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_payload_delivery"
+
+
+@performance_breakpoint
+def busy_method():
+    total = 0
+    for number in range(0, 10000):
+        total += number % 7
+    return total
+
+
+class TestPayloadDelivery(unittest.TestCase):
+
+    def setUp(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = True
+        options.enable_asynchronous_payload_delivery = True
+
+    def tearDown(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = False
+        options.enable_asynchronous_payload_delivery = False
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        payload_writer.flush()
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_asynchronous_payload_delivery(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+
+        for _ in range(0, SAMPLE_SIZE):
+            busy_method()
+
+        self.assertTrue(payload_writer.running)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+        self.assertEqual(payload_writer.failed_batches, 0)
+
+    def test_payloads_are_coalesced_into_batches(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        writer = PayloadWriter(batch_size=10, flush_interval=5)
+
+        for number in range(0, SAMPLE_SIZE):
+            writer.deliver(
+                database_name=UNIT_TEST_DATABASE_NAME,
+                payload={"samples": [{"test_id": pt.current_test_id, "sample_id": str(number),
+                                      "total_response_time": 0.1}]}
+            )
+        writer.flush()
+
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+        self.assertEqual(writer.failed_batches, 0)
+
+    def test_unsupported_drop_policy(self):
+        """
+
+        """
+        writer = PayloadWriter(drop_policy="unknown")
+        with self.assertRaises(PayloadDropPolicyNotSupported):
+            writer.deliver(database_name=UNIT_TEST_DATABASE_NAME, payload={})
+
+    def test_concurrent_flushes(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        writer = PayloadWriter(batch_size=1000, flush_interval=60)
+
+        for number in range(0, SAMPLE_SIZE):
+            writer.deliver(
+                database_name=UNIT_TEST_DATABASE_NAME,
+                payload={"samples": [{"test_id": pt.current_test_id, "sample_id": str(number),
+                                      "total_response_time": 0.1}]}
+            )
+
+        # None of the flushes may wait out the flush interval
+        flushes = [Thread(target=writer.flush) for _ in range(0, 4)]
+        for flush in flushes:
+            flush.start()
+        for flush in flushes:
+            flush.join(timeout=10)
+
+        self.assertFalse(any(flush.is_alive() for flush in flushes))
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+    def test_failed_batch_is_raised_by_flush(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        writer = PayloadWriter()
+        writer.deliver(database_name=UNIT_TEST_DATABASE_NAME, payload={"unknown_table": [{"column": 1}]})
+
+        with self.assertRaises(PayloadDeliveryFailed):
+            writer.flush()
+        self.assertEqual(writer.failed_batches, 1)
+        self.assertTrue(writer.flush())
@@ -0,0 +1,291 @@
+from QuickPotato.profiling.intrusive import performance_test as pt, performance_breakpoint
+from QuickPotato.profiling.instrumentation import Profiler
+from QuickPotato.profiling.calibration import calibrate_profiler_overhead, correct_profiler_overhead
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+from QuickPotato.utilities.exceptions import ProfilingModeNotSupported
+from threading import Thread, active_count
+from functools import wraps
+import statistics
+import unittest
+import time
+import gc
+
+SAMPLE_SIZE = 5
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_profiling_modes"
+
+
+def busy_method():
+    total = 0
+    for number in range(0, 200000):
+        total += number % 7
+    return total
+
+
+def sleeping_leaf(seconds):
+    time.sleep(seconds)
+
+
+def slow_parent():
+    sleeping_leaf(0.05)
+
+
+def fast_parent():
+    sleeping_leaf(0.001)
+
+
+def empty_method():
+    return None
+
+
+def median_call_time(method, iterations=200):
+    response_times = []
+    for _ in range(0, iterations):
+        start_time = time.perf_counter()
+        method()
+        response_times.append(time.perf_counter() - start_time)
+    return statistics.median(response_times)
+
+
+def shared_leaf_method():
+    for _ in range(0, 3):
+        slow_parent()
+        fast_parent()
+
+
+def logged(method):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        return method(*args, **kwargs)
+    return wrapper
+
+
+@logged
+def decorated_busy_method():
+    return busy_method()
+
+
+@performance_breakpoint(mode="sampling")
+def sampled_busy_method():
+    return busy_method()
+
+
+@performance_breakpoint(mode="timing")
+def timed_busy_method():
+    return busy_method()
+
+
+class TestProfilingModes(unittest.TestCase):
+
+    def setUp(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = True
+
+    def tearDown(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = False
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_unsupported_mode(self):
+        """
+
+        """
+        with self.assertRaises(ProfilingModeNotSupported):
+            Profiler(mode="unknown")
+
+    def test_sampling_profiler_statistics_layout(self):
+        """
+
+        """
+        pf = Profiler(mode="sampling", sampling_interval=0.001)
+        pf.profile_method_under_test(busy_method)
+
+        root = Profiler.function_key(busy_method)
+        self.assertEqual(pf.functional_output, busy_method())
+        self.assertIn(root, pf.performance_statistics)
+
+        cc, nc, tt, ct, callers = pf.performance_statistics[root]
+        self.assertEqual(len(callers), 0)
+        self.assertEqual(ct, pf.total_response_time)
+        for function, (cc, nc, tt, ct, callers) in pf.performance_statistics.items():
+            self.assertLessEqual(tt, ct)
+
+    def test_sampling_mode_overhead(self):
+        """
+
+        """
+        def start_and_join_thread():
+            thread = Thread(target=empty_method)
+            thread.start()
+            thread.join()
+
+        Profiler(mode="sampling").profile_method_under_test(empty_method)
+        threads = active_count()
+
+        thread_overhead = median_call_time(start_and_join_thread)
+        timing_time = median_call_time(lambda: Profiler(mode="timing").profile_method_under_test(empty_method))
+        sampling_time = median_call_time(lambda: Profiler(mode="sampling").profile_method_under_test(empty_method))
+
+        # Every call shares the same sampler thread, so it never pays for starting one
+        self.assertEqual(active_count(), threads)
+        self.assertLess(sampling_time - timing_time, thread_overhead / 2)
+
+    def test_sampling_calls_shorter_than_the_interval(self):
+        """
+
+        """
+        leaf = Profiler.function_key(sleeping_leaf)
+        estimated_time = 0
+        measured_time = 0
+        for _ in range(0, 200):
+            pf = Profiler(mode="sampling", sampling_interval=0.005)
+            pf.profile_method_under_test(fast_parent)
+            measured_time += pf.total_response_time
+            if leaf in pf.performance_statistics:
+                estimated_time += pf.performance_statistics[leaf][3]
+
+        self.assertGreater(estimated_time, measured_time / 4)
+        self.assertLess(estimated_time, measured_time * 4)
+
+    def test_decorated_method_is_the_root(self):
+        """
+
+        """
+        root = Profiler.function_key(decorated_busy_method)
+        wrapper = decorated_busy_method.__code__
+        self.assertEqual(root[2], "decorated_busy_method")
+
+        for mode in Profiler.SUPPORTED_MODES:
+            pf = Profiler(mode=mode, sampling_interval=0.001)
+            pf.profile_method_under_test(decorated_busy_method)
+
+            self.assertEqual(len(pf.performance_statistics[root][4]), 0)
+            self.assertNotIn((wrapper.co_filename, wrapper.co_firstlineno, wrapper.co_name), pf.performance_statistics)
+
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=decorated_busy_method)
+
+        rows = pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        roots = [row for row in rows if row["parent_path"] == "~"]
+        self.assertEqual([row["child_function_name"] for row in roots], ["decorated_busy_method"])
+
+    def test_sampling_mode_response_times(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+
+        for _ in range(0, SAMPLE_SIZE):
+            sampled_busy_method()
+
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+
+    def test_timing_mode_stores_one_row_per_sample(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.max_and_min_boundary_for_average = {"max": 1, "min": None}
+
+        for _ in range(0, SAMPLE_SIZE):
+            timed_busy_method()
+
+        rows = pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(len(rows), SAMPLE_SIZE)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+        self.assertTrue(pt.verify_benchmark_against_set_boundaries())
+
+    def test_profiler_overhead_calibration(self):
+        """
+
+        """
+        overhead = calibrate_profiler_overhead(iterations=10000, rounds=1)
+        self.assertEqual(options.profiler_overhead_per_call, overhead)
+        self.assertGreaterEqual(overhead["caller"], 0)
+        self.assertGreaterEqual(overhead["callee"], 0)
+        options.profiler_overhead_per_call = None
+
+    def test_profiler_overhead_correction(self):
+        """
+
+        """
+        parent = ("example.py", 1, "parent")
+        child = ("example.py", 10, "child")
+        statistics = {
+            parent: (1, 1, 0.5, 1.5, {}),
+            child: (100, 100, 1.0, 1.0, {parent: (100, 100, 1.0, 1.0)})
+        }
+        corrected = correct_profiler_overhead(statistics, {"caller": 0.002, "callee": 0.001})
+
+        self.assertAlmostEqual(corrected[parent][2], 0.5 - 0.001 - 100 * 0.002)
+        self.assertAlmostEqual(corrected[parent][3], 1.5 - 0.001 - 100 * 0.003)
+        self.assertAlmostEqual(corrected[child][2], 1.0 - 100 * 0.001)
+        self.assertAlmostEqual(corrected[child][3], 1.0 - 100 * 0.001)
+        self.assertAlmostEqual(corrected[child][4][parent][2], 1.0 - 100 * 0.001)
+
+    def test_call_edges_of_a_shared_function(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=shared_leaf_method)
+
+        rows = pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        edges = {(row["parent_function_name"], row["child_function_name"]): row for row in rows}
+
+        slow_edge = edges[("slow_parent", "sleeping_leaf")]
+        fast_edge = edges[("fast_parent", "sleeping_leaf")]
+        self.assertEqual(int(slow_edge["number_of_calls"]), 3)
+        self.assertEqual(int(fast_edge["number_of_calls"]), 3)
+        self.assertGreaterEqual(slow_edge["cumulative_time"], 0.15)
+        self.assertGreaterEqual(fast_edge["cumulative_time"], 0.003)
+        self.assertLess(fast_edge["cumulative_time"], 0.05)
+
+    def test_garbage_collection_measurements(self):
+        """
+
+        """
+        def create_garbage():
+            garbage = [[number] for number in range(0, 100000)]
+            gc.collect()
+            return len(garbage)
+
+        for mode in Profiler.SUPPORTED_MODES:
+            pf = Profiler(mode=mode)
+            pf.profile_method_under_test(create_garbage)
+
+            self.assertGreaterEqual(pf.gc_collections, 1)
+            self.assertGreater(pf.gc_pause_time, 0)
+            self.assertLessEqual(pf.total_thread_time, pf.total_response_time)
+            self.assertNotIn("_on_garbage_collection", [function[2] for function in pf.performance_statistics])
+
+    def test_system_resource_collection(self):
+        """
+
+        """
+        options.enable_system_resource_collection = True
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+
+        for _ in range(0, SAMPLE_SIZE):
+            timed_busy_method()
+
+        options.enable_system_resource_collection = False
+        resources = pt.select_system_resource_statistics(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+
+        self.assertEqual(len(resources), SAMPLE_SIZE)
+        self.assertEqual(
+            sorted(row["sample_id"] for row in resources),
+            sorted(row["sample_id"] for row in pt.select_test_id_description(UNIT_TEST_DATABASE_NAME, pt.current_test_id))
+        )
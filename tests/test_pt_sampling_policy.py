@@ -0,0 +1,150 @@
+from QuickPotato.profiling.intrusive import performance_test as pt, performance_breakpoint
+from QuickPotato.profiling.policies import SamplingPolicy, TailCaptureTrigger
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+import unittest
+import time
+
+SAMPLE_SIZE = 20
+MAXIMUM_PROFILES = 5
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_sampling_policy"
+
+
+@performance_breakpoint(mode="timing", max_profiles_per_test_id=MAXIMUM_PROFILES)
+def capped_method():
+    return sum(range(0, 1000))
+
+
+@performance_breakpoint(capture_threshold=0.05)
+def tail_captured_method(sleep):
+    time.sleep(sleep)
+    return sleep
+
+
+class TestSamplingPolicy(unittest.TestCase):
+
+    def setUp(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = True
+
+    def tearDown(self):
+        """
+
+        """
+        options.enable_intrusive_profiling = False
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_profile_every_call_by_default(self):
+        """
+
+        """
+        policy = SamplingPolicy(sample_one_in=1)
+        self.assertTrue(all(policy.should_profile("TEST") for _ in range(0, SAMPLE_SIZE)))
+
+    def test_profile_one_in_n_calls(self):
+        """
+
+        """
+        policy = SamplingPolicy(sample_one_in=10)
+        decisions = [policy.should_profile("TEST") for _ in range(0, 10000)]
+        self.assertGreater(decisions.count(True), 500)
+        self.assertLess(decisions.count(True), 1500)
+
+    def test_profiles_per_second(self):
+        """
+
+        """
+        policy = SamplingPolicy(sample_one_in=1, max_profiles_per_second=MAXIMUM_PROFILES)
+        decisions = [policy.should_profile("TEST") for _ in range(0, SAMPLE_SIZE)]
+        self.assertEqual(decisions.count(True), MAXIMUM_PROFILES)
+
+    def test_profiles_per_test_id(self):
+        """
+
+        """
+        policy = SamplingPolicy(sample_one_in=1, max_profiles_per_test_id=MAXIMUM_PROFILES)
+        decisions = [policy.should_profile("TEST") for _ in range(0, SAMPLE_SIZE)]
+        self.assertEqual(decisions.count(True), MAXIMUM_PROFILES)
+
+        # A new test id starts with a fresh budget
+        self.assertTrue(policy.should_profile("OTHER_TEST"))
+
+        # Alternating between test ids does not reset the budget of either of them
+        self.assertFalse(policy.should_profile("TEST"))
+        decisions = [policy.should_profile("OTHER_TEST") for _ in range(0, SAMPLE_SIZE)]
+        self.assertEqual(decisions.count(True), MAXIMUM_PROFILES - 1)
+
+    def test_profiles_per_test_id_window(self):
+        """
+
+        """
+        policy = SamplingPolicy(sample_one_in=1, max_profiles_per_test_id=MAXIMUM_PROFILES, window=10)
+        for test_id in range(0, SAMPLE_SIZE):
+            policy.should_profile(test_id)
+
+        self.assertEqual(len(policy._profiles_per_test_id), 10)
+        self.assertEqual(list(policy._profiles_per_test_id), list(range(SAMPLE_SIZE - 10, SAMPLE_SIZE)))
+
+    def test_decorator_passes_through_calls_that_are_not_sampled(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+
+        outputs = [capped_method() for _ in range(0, SAMPLE_SIZE)]
+
+        self.assertEqual(outputs, [sum(range(0, 1000))] * SAMPLE_SIZE)
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), MAXIMUM_PROFILES)
+
+    def test_tail_capture_threshold(self):
+        """
+
+        """
+        trigger = TailCaptureTrigger(threshold=0.5)
+        self.assertFalse(trigger.is_slow(0.1))
+        self.assertTrue(trigger.is_slow(1.0))
+
+    def test_tail_capture_rolling_percentile(self):
+        """
+
+        """
+        trigger = TailCaptureTrigger(percentile=90, window=100)
+        decisions = [trigger.is_slow(response_time) for response_time in [0.01] * 50 + [0.001] * 50]
+        self.assertFalse(any(decisions[50:]))
+        self.assertTrue(trigger.is_slow(1.0))
+
+    def test_tail_capture_with_identical_response_times(self):
+        """
+
+        """
+        trigger = TailCaptureTrigger(percentile=90, window=100)
+        decisions = [trigger.is_slow(0.01) for _ in range(0, 100)]
+        self.assertEqual(decisions.count(True), 1)
+
+    def test_decorator_only_stores_call_graph_of_slow_calls(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+
+        tail_captured_method(0)
+        tail_captured_method(0.1)
+
+        rows = pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        rows_per_sample = {}
+        for row in rows:
+            rows_per_sample.setdefault(row["sample_id"], []).append(row)
+
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), 2)
+        self.assertEqual(sorted(len(sample) for sample in rows_per_sample.values())[0], 1)
+        self.assertGreater(sorted(len(sample) for sample in rows_per_sample.values())[1], 1)
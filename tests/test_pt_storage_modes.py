@@ -0,0 +1,136 @@
+from QuickPotato.profiling.intrusive import performance_test as pt
+from QuickPotato.database.aggregator import StatisticsAggregator, statistics_aggregator
+from QuickPotato.database.queries import Crud
+from QuickPotato.configuration.management import options
+from QuickPotato.utilities.exceptions import StorageModeNotSupported
+import unittest
+
+SAMPLE_SIZE = 10
+UNIT_TEST_DATABASE_NAME = "upt_unit_tests_storage_modes"
+
+
+def busy_method(size):
+    total = 0
+    for number in range(0, size):
+        total += number % 7
+    return total
+
+
+def calling_method(size):
+    return busy_method(size) + len(str(size))
+
+
+class TestStorageModes(unittest.TestCase):
+
+    def setUp(self):
+        """
+
+        """
+        options.storage_mode = "aggregate"
+
+    def tearDown(self):
+        """
+
+        """
+        options.storage_mode = "samples"
+        self.clean_up()
+
+    @staticmethod
+    def clean_up():
+        """
+
+        """
+        statistics_aggregator.flush()
+        database_manager = Crud()
+        database_manager.delete_result_database(UNIT_TEST_DATABASE_NAME)
+
+    def test_aggregate_storage_mode(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=calling_method, arguments=[10000], iteration=SAMPLE_SIZE)
+
+        # Only the samples themselves are stored per sample
+        self.assertEqual(len(pt.benchmark_measurements.response_times()), SAMPLE_SIZE)
+        self.assertEqual(len(pt.select_call_stack_by_test_id(UNIT_TEST_DATABASE_NAME, pt.current_test_id)), 0)
+        self.assertEqual(pt.select_performance_statistics_aggregate(UNIT_TEST_DATABASE_NAME, pt.current_test_id), [])
+
+        # The aggregate is flushed at the end of the test
+        pt.verify_benchmark_against_set_boundaries()
+        aggregate = pt.select_performance_statistics_aggregate(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+
+        root = aggregate[0]
+        self.assertEqual(root["child_function_name"], "calling_method")
+        self.assertEqual(root["parent_function_name"], pt.current_test_id)
+        self.assertEqual(root["number_of_samples"], SAMPLE_SIZE)
+
+        edges = {(edge["parent_function_name"], edge["child_function_name"]): edge for edge in aggregate}
+        edge = edges[("calling_method", "busy_method")]
+        self.assertEqual(edge["number_of_calls"], SAMPLE_SIZE)
+        self.assertLessEqual(edge["cumulative_time_minimum"], edge["cumulative_time_sum"] / SAMPLE_SIZE)
+        self.assertGreaterEqual(edge["cumulative_time_maximum"], edge["cumulative_time_sum"] / SAMPLE_SIZE)
+        self.assertGreaterEqual(edge["cumulative_time_sum_of_squares"] * SAMPLE_SIZE, edge["cumulative_time_sum"] ** 2)
+        self.assertEqual(
+            sum(StatisticsAggregator.load_histogram(edge["cumulative_time_histogram"]).values()), SAMPLE_SIZE
+        )
+
+    def test_aggregates_are_merged_across_flushes(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        pt.measure_method_performance(method=busy_method, arguments=[1000], iteration=SAMPLE_SIZE)
+        statistics_aggregator.flush(database_name=UNIT_TEST_DATABASE_NAME, test_id=pt.current_test_id)
+        pt.measure_method_performance(method=busy_method, arguments=[1000], iteration=SAMPLE_SIZE)
+        statistics_aggregator.flush(database_name=UNIT_TEST_DATABASE_NAME, test_id=pt.current_test_id)
+
+        aggregate = pt.select_performance_statistics_aggregate(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(len([edge for edge in aggregate if edge["child_function_name"] == "busy_method"]), 1)
+        self.assertEqual(aggregate[0]["number_of_samples"], 2 * SAMPLE_SIZE)
+
+    def test_failed_flush_keeps_the_aggregate(self):
+        """
+
+        """
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        aggregator = StatisticsAggregator()
+        function = ("example.py", 1, "busy_method")
+        aggregator.insert_functions(UNIT_TEST_DATABASE_NAME, [function])
+        function_id = aggregator.select_function_ids(UNIT_TEST_DATABASE_NAME)[function]
+        aggregator.merge(UNIT_TEST_DATABASE_NAME, pt.current_test_id, [
+            {"child_function_id": function_id, "parent_function_id": None, "number_of_calls": 1,
+             "total_time": 0.1, "cumulative_time": 0.2}
+        ])
+
+        def failing_insert(database, test_id, merge_payload):
+            raise ConnectionError()
+
+        aggregator.insert_performance_statistics_aggregate = failing_insert
+        with self.assertRaises(ConnectionError):
+            aggregator.flush()
+
+        del aggregator.insert_performance_statistics_aggregate
+        aggregator.flush()
+        aggregate = aggregator.select_performance_statistics_aggregate(UNIT_TEST_DATABASE_NAME, pt.current_test_id)
+        self.assertEqual(len(aggregate), 1)
+        self.assertEqual(aggregate[0]["number_of_samples"], 1)
+
+    def test_histogram_buckets(self):
+        """
+
+        """
+        buckets_per_doubling = StatisticsAggregator.HISTOGRAM_BUCKETS_PER_DOUBLING
+        self.assertEqual(StatisticsAggregator.histogram_bucket(1.0), 0)
+        self.assertEqual(StatisticsAggregator.histogram_bucket(2.0), buckets_per_doubling)
+        self.assertLess(StatisticsAggregator.histogram_bucket(0.001), StatisticsAggregator.histogram_bucket(0.002))
+        self.assertEqual(StatisticsAggregator.histogram_bucket(0.0), StatisticsAggregator.histogram_bucket(1e-12))
+
+    def test_unsupported_storage_mode(self):
+        """
+
+        """
+        options.storage_mode = "everything"
+        pt.test_case_name = UNIT_TEST_DATABASE_NAME
+        with self.assertRaises(StorageModeNotSupported):
+            pt.measure_method_performance(method=busy_method, arguments=[1000])
@@ -1,10 +1,30 @@
 from QuickPotato.profiling.intrusive import performance_test as pt
-from QuickPotato.statistical.visualizations import FlameGraph, CsvFile
+from QuickPotato.statistical.visualizations import FlameGraph, DifferentialFlameGraph, CsvFile, HeatMap, BarChart
+from QuickPotato.statistical.data import CodePaths
 from QuickPotato.configuration.management import options
 from QuickPotato.utilities.defaults import default_test_case_name
 from QuickPotato.database.queries import Crud
+from QuickPotato.utilities.exceptions import ExportFormatNotSupported, UnableToGenerateVisualizations
 from examples.example_code import fast_method
+import pandas as pd
+import importlib.util
+import tempfile
 import unittest
+import gzip
+import os
+
+PYARROW_IS_INSTALLED = importlib.util.find_spec("pyarrow") is not None
+
+
+def busy_method(size):
+    total = 0
+    for number in range(0, size):
+        total += number % 7
+    return total
+
+
+def calling_method(size):
+    return busy_method(size) + len(str(size))
 
 
 class TestFlameGraphs(unittest.TestCase):
@@ -46,3 +66,203 @@ class TestFlameGraphs(unittest.TestCase):
         self.assertIn("body", html)
         self.assertIn("html", html)
         self.assertIn("option", html)
+
+    def test_bulk_read_of_call_stacks(self):
+        """
+
+        :return:
+        """
+        for _ in range(0, 3):
+            fast_method()
+
+        test_id = pt.current_test_id
+        stacks = list(pt.select_call_stacks_by_test_ids(default_test_case_name, [test_id]))
+
+        self.assertEqual(
+            sorted(sample_id for _, sample_id, _ in stacks),
+            sorted(pt.select_all_sample_ids(default_test_case_name, test_id))
+        )
+        for tid, sample_id, stack in stacks:
+            self.assertEqual(tid, test_id)
+            self.assertEqual(stack, pt.select_call_stack_by_sample_id(default_test_case_name, sample_id))
+
+    def test_quick_profiling_heatmap(self):
+        """
+
+        :return:
+        """
+        fast_method()
+
+        heatmap = HeatMap(test_ids=[pt.current_test_id])
+        self.assertEqual(len(heatmap.sample_list[pt.current_test_id]), 1)
+        self.assertIn("x_axis_identifier_sample_ids", heatmap.json)
+        self.assertIn("html", heatmap.render_html())
+
+    def test_streamed_csv_export(self):
+        """
+
+        :return:
+        """
+        for _ in range(0, 3):
+            fast_method()
+
+        rows = sum(len(stack) for _, _, stack in pt.select_call_stacks_by_test_ids(
+            default_test_case_name, pt.current_test_id))
+
+        with tempfile.TemporaryDirectory() as directory:
+            csv_file = CsvFile(test_id=pt.current_test_id, chunk_size=2)
+            plain = pd.read_csv(csv_file.export(directory + os.sep))
+            with gzip.open(csv_file.export(directory + os.sep, compression="gzip"), "rt") as file:
+                compressed = pd.read_csv(file)
+
+        self.assertEqual(len(plain), rows)
+        self.assertEqual(list(plain.columns), list(CsvFile.EXPORTED_COLUMNS))
+        self.assertTrue(plain.equals(compressed))
+
+    def test_unsupported_export_format(self):
+        """
+
+        :return:
+        """
+        fast_method()
+        with self.assertRaises(ExportFormatNotSupported):
+            CsvFile(test_id=pt.current_test_id).export(tempfile.gettempdir() + os.sep, file_format="xlsx")
+
+    @unittest.skipUnless(PYARROW_IS_INSTALLED, "pyarrow is not installed")
+    def test_columnar_export(self):
+        """
+
+        :return:
+        """
+        import pyarrow.parquet as pq
+        import pyarrow.feather as feather
+
+        for _ in range(0, 3):
+            fast_method()
+
+        with tempfile.TemporaryDirectory() as directory:
+            csv_file = CsvFile(test_id=pt.current_test_id, chunk_size=2)
+            parquet = pq.read_table(csv_file.export(directory + os.sep, file_format="parquet"))
+            arrow = feather.read_table(csv_file.export(directory + os.sep, file_format="feather"))
+            plain = pd.read_csv(csv_file.export(directory + os.sep))
+
+        for table in (parquet, arrow):
+            self.assertEqual(table.num_rows, len(plain))
+            self.assertTrue(str(table.schema.field("child_function_name").type).startswith("dictionary"))
+            self.assertEqual(table.column("child_function_name").to_pylist(), plain["child_function_name"].tolist())
+
+    def test_hierarchical_stack_construction(self):
+        """
+
+        :return:
+        """
+        collected_stack = [
+            {"sample_id": "SAMPLE", "parent_function_name": "b", "child_function_name": "c",
+             "total_time": 0.05, "cumulative_time": 0.1},
+            {"sample_id": "SAMPLE", "parent_function_name": "SAMPLE", "child_function_name": "a",
+             "total_time": 0.1, "cumulative_time": 1.0},
+            {"sample_id": "SAMPLE", "parent_function_name": "a", "child_function_name": "b",
+             "total_time": 0.2, "cumulative_time": 0.3},
+            {"sample_id": "SAMPLE", "parent_function_name": "a", "child_function_name": "c",
+             "total_time": 0.1, "cumulative_time": 0.2},
+            {"sample_id": "SAMPLE", "parent_function_name": "c", "child_function_name": "c",
+             "total_time": 0.05, "cumulative_time": 0.15},
+        ]
+        stack = FlameGraph._weigh_frames_by_time(CodePaths._build_hierarchical_stack(collected_stack))
+
+        self.assertEqual(stack["name"], "SAMPLE")
+        self.assertAlmostEqual(stack["value"], 1.0)
+        a = stack["children"][0]
+        b, c = a["children"]
+        self.assertEqual([b["name"], c["name"]], ["b", "c"])
+        self.assertEqual(c["children"][0]["children"], [])
+
+        # Every member has the time of its own call edge, the recursive call of c
+        # below a gets the share a holds of the cumulative time of c
+        self.assertAlmostEqual(c["value"], 0.2)
+        self.assertAlmostEqual(b["value"], 0.3)
+        self.assertAlmostEqual(b["children"][0]["value"], 0.1)
+        self.assertAlmostEqual(c["children"][0]["value"], 0.15 * 0.2 / 0.3)
+
+        # A child never gets wider than its parent
+        members = [stack]
+        for member in members:
+            self.assertLessEqual(sum(child["value"] for child in member["children"]), member["value"] + 1e-12)
+            members.extend(member["children"])
+
+        code_paths = CodePaths._map_out_code_paths(stack)
+        self.assertEqual(code_paths["c"], ["SAMPLE", "a", "b", "c"])
+        self.assertEqual(code_paths["b"], ["SAMPLE", "a", "b"])
+
+        merged = CodePaths._merge_hierarchical_stacks([stack, stack], "TEST")
+        self.assertEqual(merged["name"], "TEST")
+        self.assertAlmostEqual(merged["value"], 2.0)
+        self.assertAlmostEqual(merged["children"][0]["children"][0]["value"], 0.6)
+
+    def test_aggregated_flame_graph(self):
+        """
+
+        :return:
+        """
+        pt.test_case_name = "upt_unit_tests_flame_graphs"
+        pt.measure_method_performance(method=fast_method, iteration=3)
+
+        flame_graph = FlameGraph(test_case_name="upt_unit_tests_flame_graphs", test_id=pt.current_test_id,
+                                 aggregate=True)
+        self.assertEqual(flame_graph.list_of_samples, [pt.current_test_id])
+        self.assertAlmostEqual(flame_graph.json[0]["value"], sum(pt.benchmark_measurements.response_times()), 2)
+        Crud().delete_result_database("upt_unit_tests_flame_graphs")
+
+    def test_differential_flame_graph(self):
+        """
+
+        :return:
+        """
+        database_name = "upt_unit_tests_flame_graphs"
+        pt.test_case_name = database_name
+        pt.measure_method_performance(method=busy_method, arguments=[1000], iteration=3)
+        baseline_test_id = pt.current_test_id
+
+        pt.test_case_name = database_name
+        pt.measure_method_performance(method=busy_method, arguments=[200000], iteration=3)
+        benchmark_test_id = pt.current_test_id
+
+        flame_graph = DifferentialFlameGraph(database_name, baseline_test_id, benchmark_test_id)
+        root = flame_graph.json[0]
+        method = root["children"][0]
+
+        self.assertEqual(method["name"], "busy_method")
+        self.assertGreater(method["cumulative_time_delta"], 0)
+        self.assertGreater(method["self_time_delta"], 0)
+        self.assertEqual(method["delta"], method["self_time_delta"])
+        self.assertIn(".differential(true)", flame_graph.html)
+        Crud().delete_result_database(database_name)
+
+    def test_differential_flame_graph_without_baseline(self):
+        """
+
+        :return:
+        """
+        pt.measure_method_performance(method=busy_method, arguments=[1000], iteration=3)
+
+        with self.assertRaises(UnableToGenerateVisualizations):
+            DifferentialFlameGraph()
+
+    def test_bar_chart_with_top_n(self):
+        """
+
+        :return:
+        """
+        database_name = "upt_unit_tests_bar_charts"
+        pt.test_case_name = database_name
+        pt.measure_method_performance(method=calling_method, arguments=[10000], iteration=3)
+
+        bar_chart = BarChart(test_case_name=database_name, test_ids=[pt.current_test_id])
+        signatures = bar_chart.data_frame["method_signature"].tolist()
+        self.assertEqual(len(signatures), len(set(signatures)))
+        self.assertEqual(bar_chart.json[0]["method_signature"], "calling_method")
+
+        folded_bar_chart = BarChart(test_case_name=database_name, test_ids=[pt.current_test_id], top_n=1)
+        self.assertEqual(sorted(folded_bar_chart.data_frame["method_signature"]), ["calling_method", "other"])
+        self.assertIn("html", folded_bar_chart.render_html())
+        Crud().delete_result_database(database_name)